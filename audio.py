@@ -0,0 +1,118 @@
+import logging
+import os
+import threading
+import time
+
+import metrics
+from audio_cache import AudioCache
+from noise import COLORS as NOISE_COLORS, NoiseGenerator
+
+AUDIO_READY_TIMEOUT = 0.25  # seconds a cue may wait for a mixer that's still opening
+NOISE_DECODE_LIMIT = 8 * 1024 * 1024  # Noise files bigger than this (on disk) are streamed, not decoded
+NOISE_FADE_MS = 1500  # Noise fades in at work start and out at the end; SDL_mixer steps it once per mixed block
+
+pygame = None  # Imported on the audio thread; importing it up front delays the first frame
+
+
+class AudioPlayer:
+    # Owns pygame and the mixer. Importing pygame and opening the audio
+    # device both happen on a background thread started from __init__, so
+    # the window can come up first; the cue sounds are decoded there too.
+    # If audio never comes up every call degrades to a logged no-op.
+    #
+    # `noise` is a color from noise.COLORS, synthesized on that thread, or
+    # the path of a sound file to loop.
+    def __init__(self, preload_paths=(), noise=None):
+        self.preload_paths = list(preload_paths)
+        self.noise = noise
+        self.noise_generator = None
+        self.noise_sounds = {}  # color -> Sound holding one seamless loop
+        self.ready = threading.Event()
+        self.available = False
+        self.cache = AudioCache()
+        self.noise_channel = None
+        self.sound_effects_channel = None
+        self.noise_music_loaded = None  # Path currently loaded into pygame.mixer.music, if streaming
+        self.started_at = time.perf_counter()
+        self.ready_seconds = None
+        threading.Thread(target=self._initialize, name="audio-init", daemon=True).start()
+
+    def _initialize(self):
+        global pygame
+        try:
+            import pygame as pygame_module
+            pygame = pygame_module
+            pygame.mixer.init()
+            self.noise_channel = pygame.mixer.Channel(0)
+            self.sound_effects_channel = pygame.mixer.Channel(1)
+            self.cache.preload(self.preload_paths)
+            if self.noise in NOISE_COLORS:
+                try:
+                    self._noise_sound(self.noise)
+                except ImportError as e:
+                    logging.error(f"Can't synthesize noise without NumPy: {e}")
+            elif self.noise and os.path.exists(self.noise) and os.path.getsize(self.noise) <= NOISE_DECODE_LIMIT:
+                self.cache.preload([self.noise])
+            self.available = True
+        except Exception as e:
+            logging.error(f"Audio unavailable: {e}")
+        finally:
+            self.ready_seconds = time.perf_counter() - self.started_at
+            logging.info(f"Audio ready after {self.ready_seconds * 1000:.0f} ms")
+            self.ready.set()
+
+    def _wait_ready(self):
+        if not self.ready.wait(AUDIO_READY_TIMEOUT):
+            logging.warning("Audio not ready yet, skipping sound")
+            return False
+        return self.available
+
+    def play_sound(self, sound_path):
+        if not self._wait_ready():
+            return
+        try:
+            self.sound_effects_channel.play(self.cache.get(sound_path))
+            logging.info(f"Played sound: {sound_path}")
+        except (pygame.error, OSError) as e:
+            logging.error(f"Error playing sound {sound_path}: {e}")
+
+    def _noise_sound(self, color):
+        sound = self.noise_sounds.get(color)
+        if sound is None:
+            if self.noise_generator is None:
+                self.noise_generator = NoiseGenerator.for_mixer()
+            sound = self.noise_sounds[color] = self.noise_generator.make_sound(color)
+            metrics.observe("pomodoro_audio_load_seconds", self.noise_generator.generate_seconds)
+        return sound
+
+    def play_noise(self, noise):
+        if not self._wait_ready():
+            return
+        try:
+            if noise in NOISE_COLORS:
+                self.noise_channel.play(self._noise_sound(noise), loops=-1, fade_ms=NOISE_FADE_MS)
+            elif os.path.getsize(noise) > NOISE_DECODE_LIMIT:
+                # Too big to hold decoded; stream it, but only load the file once
+                if self.noise_music_loaded != noise:
+                    started = time.perf_counter()
+                    pygame.mixer.music.load(noise)
+                    metrics.observe("pomodoro_audio_load_seconds", time.perf_counter() - started)
+                    self.noise_music_loaded = noise
+                pygame.mixer.music.play(-1, fade_ms=NOISE_FADE_MS)  # Loop indefinitely
+            else:
+                self.noise_channel.play(self.cache.get(noise, pinned=True), loops=-1, fade_ms=NOISE_FADE_MS)
+            logging.info(f"Started playing noise: {noise}")
+        except (pygame.error, OSError, ImportError, ValueError) as e:
+            logging.error(f"Error playing noise {noise}: {e}")
+
+    def stop_noise(self):
+        if not self.available:
+            return
+        self.noise_channel.fadeout(NOISE_FADE_MS)
+        pygame.mixer.music.fadeout(NOISE_FADE_MS)
+        logging.info("Fading out noise")
+
+    def quit(self):
+        if self.available:
+            pygame.mixer.quit()
+            self.available = False
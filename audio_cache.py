@@ -0,0 +1,81 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # Cap for decoded sounds that aren't pinned
+
+
+class AudioCache:
+    # Decodes each sound file once and keeps it as a ready-to-play
+    # pygame.mixer.Sound. Pinned sounds (the cues and noise track) stay
+    # resident; anything else is evicted least-recently-used once the decoded
+    # size passes max_bytes.
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.sounds = OrderedDict()  # path -> (Sound, size in bytes)
+        self.pinned = set()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def preload(self, paths, pinned=True):
+        import pygame
+        for path in paths:
+            try:
+                self.get(path, pinned=pinned)
+            except (pygame.error, OSError) as e:
+                logging.error(f"Error preloading sound {path}: {e}")
+
+    def get(self, path, pinned=False):
+        with self.lock:
+            cached = self.sounds.get(path)
+            if cached is not None:
+                self.sounds.move_to_end(path)
+                self.hits += 1
+                if pinned:
+                    self.pinned.add(path)
+                return cached[0]
+            self.misses += 1
+
+        import pygame  # Only imported once the mixer is up (see audio.AudioPlayer)
+        started = time.perf_counter()
+        sound = pygame.mixer.Sound(path)
+        size = self._decoded_size(sound)
+        elapsed = time.perf_counter() - started
+        metrics.observe("pomodoro_audio_load_seconds", elapsed)
+        logging.debug(f"Decoded {path} ({size // 1024} KiB) in {elapsed * 1000:.1f} ms")
+
+        with self.lock:
+            if path not in self.sounds:
+                self.sounds[path] = (sound, size)
+                self.total_bytes += size
+            if pinned:
+                self.pinned.add(path)
+            self._evict()
+            return self.sounds[path][0] if path in self.sounds else sound
+
+    def _decoded_size(self, sound):
+        import pygame
+        frequency, size, channels = pygame.mixer.get_init()
+        return int(sound.get_length() * frequency * channels * abs(size) // 8)
+
+    def _evict(self):
+        # Called with the lock held
+        for path in list(self.sounds):
+            if self.total_bytes <= self.max_bytes:
+                return
+            if path in self.pinned:
+                continue
+            _, size = self.sounds.pop(path)
+            self.total_bytes -= size
+            logging.debug(f"Evicted {path} from the audio cache")
+
+    def clear(self):
+        with self.lock:
+            self.sounds.clear()
+            self.pinned.clear()
+            self.total_bytes = 0
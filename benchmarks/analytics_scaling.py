@@ -0,0 +1,92 @@
+import math
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Fills a ledger with years of synthetic sessions (with habits that vary
+# by hour and weekday), then times loading it into arrays and every
+# analysis, and shows that the recommendation follows the habits.
+#   python benchmarks/analytics_scaling.py [years]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from focus_analytics import FocusAnalytics  # noqa: E402
+from session_ledger import SCHEMA  # noqa: E402
+
+
+def write_history(path, years, seed=1):
+    # Weekdays 9-18: 25 min mornings that often run long, 15 min afternoons cut short
+    rng = random.Random(seed)
+    rows = []
+    day = time.mktime(time.strptime("2020-01-06", "%Y-%m-%d"))  # a Monday
+    for _ in range(int(years * 365)):
+        weekday = time.localtime(day + 12 * 3600).tm_wday
+        if weekday < 5:
+            now = day + 9 * 3600 + rng.uniform(0, 1800)
+            while now < day + 18 * 3600:
+                hour = time.localtime(now).tm_hour
+                morning = hour < 12
+                date = time.strftime("%Y-%m-%d", time.localtime(now))
+                response = rng.expovariate(1 / 40)
+                rows.append((now, date, "local", "start_work", "work", 0, int(response // 60), response))
+                length = rng.gauss(25 if morning else 15, 3) * 60
+                if morning and rng.random() < 0.4:
+                    rows.append((now + length, date, "local", "extend_work", "work", 300, 0, None))
+                    length += 300
+                now += length
+                cut_short = not morning and rng.random() < 0.3
+                rows.append((now, date, "local", "work_stopped" if cut_short else "work_timer_end", "work", length, 0,
+                             None))
+                response = rng.expovariate(1 / 60)
+                now += response
+                rows.append((now, date, "local", "start_break", "work", 0, int(response // 60), response))
+                length = rng.gauss(6, 1) * 60
+                now += length
+                rows.append((now, date, "local", "break_timer_end", "work", length, 0, None))
+        day += 86400
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+    db.executemany("INSERT INTO events (at, day, session, kind, description, seconds, dings, response_seconds) "
+                   "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    db.commit()
+    db.close()
+    return len(rows)
+
+
+def timed(label, function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    print(f"  {label:<18} {(time.perf_counter() - started) * 1000:8.1f} ms")
+    return result
+
+
+def main():
+    years = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "ledger.sqlite3")
+        started = time.perf_counter()
+        events = write_history(path, years)
+        print(f"{years:g} years, {events} events (written in {time.perf_counter() - started:.1f} s)")
+        started = time.perf_counter()
+        timed("import numpy", __import__, "numpy")
+        analytics = timed("load", FocusAnalytics.load, path)
+        timed("heatmap", analytics.focus_heatmap)
+        timed("completion ratio", analytics.completion_ratio)
+        timed("extension rate", analytics.extension_rate)
+        timed("response times", analytics.response_times)
+        monday = time.mktime(time.strptime("2024-06-03", "%Y-%m-%d"))
+        morning = timed("recommend", analytics.recommend, monday + 10 * 3600)
+        afternoon = analytics.recommend(monday + 15 * 3600)
+        print(f"  total              {(time.perf_counter() - started) * 1000:8.1f} ms")
+        print(f"Monday 10:00: {morning}")
+        print(f"Monday 15:00: {afternoon}")
+        print(f"Response times: {analytics.response_times()}")
+        assert morning["work_time"] > afternoon["work_time"]
+        assert not math.isnan(analytics.completion_ratio()[0, 10])
+
+
+if __name__ == "__main__":
+    main()
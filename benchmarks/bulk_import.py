@@ -0,0 +1,103 @@
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from fake_toggl import start_fake_toggl
+
+# Imports a generated JSONL file of completed entries into the fake Toggl
+# server with one worker and with a pool, then interrupts and resumes an
+# import to check nothing is created twice, and imports a file with a
+# corrupt line in the middle to check it fails alone and is not retried.
+#   python benchmarks/bulk_import.py [rows] [latency_ms]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "toggl-scripts"))
+from toggl_client import TogglClient  # noqa: E402
+import toggl_import  # noqa: E402
+from toggl_import import TogglImporter  # noqa: E402
+
+
+def write_rows(path, rows):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    with open(path, "w") as f:
+        for i in range(rows):
+            began = start + timedelta(minutes=30 * i)
+            f.write(json.dumps({"description": f"imported {i}", "start": began.isoformat(),
+                                "duration": 25 * 60, "tags": "import,bench"}) + "\n")
+
+
+def run(server, path, workers, checkpoint_path=None, interrupt_after=None, failed_path=None):
+    client = TogglClient("benchmark", api_url=server.api_url, rate_limit=None)
+    importer = TogglImporter(client, workers=workers, checkpoint_path=checkpoint_path, failed_path=failed_path)
+    read_rows = toggl_import.read_rows
+    if interrupt_after is not None:
+        # Ctrl-C lands in the main thread while it is reading ahead
+        def interrupted_rows(path):
+            for index, row in enumerate(read_rows(path)):
+                if index == interrupt_after:
+                    raise KeyboardInterrupt
+                yield row
+        toggl_import.read_rows = interrupted_rows
+    try:
+        return importer.run(path)
+    except KeyboardInterrupt:
+        return None
+    finally:
+        toggl_import.read_rows = read_rows
+        client.close()
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000
+    logging.basicConfig(level=logging.WARNING)
+    server = start_fake_toggl()
+    server.state.latency = latency
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "entries.jsonl")
+        write_rows(path, rows)
+        for workers in (1, 8, 32):
+            server.state.entries.clear()
+            report = run(server, path, workers)
+            print(f"{workers:>3} workers: {report['entries_per_second']:8.1f} entries/s "
+                  f"({report['created']} created, {report['failed']} failed)")
+
+        server.state.entries.clear()
+        checkpoint_path = os.path.join(workdir, "entries.checkpoint")
+        run(server, path, 8, checkpoint_path, interrupt_after=rows // 2)
+        first = len(server.state.entries)
+        report = run(server, path, 8, checkpoint_path)
+        total = len(server.state.entries)
+        print(f"resume: {first} before interrupt, {report['created']} after, {report['skipped']} skipped, "
+              f"{total} total for {rows} rows" + (" OK" if total == rows else " MISMATCH"))
+
+        # A truncated line halfway through fails on its own and the checkpoint moves past it
+        with open(path) as f:
+            lines = f.readlines()
+        lines[rows // 2] = lines[rows // 2][:20] + "\n"
+        with open(path, "w") as f:
+            f.writelines(lines)
+        server.state.entries.clear()
+        checkpoint_path = os.path.join(workdir, "corrupt.checkpoint")
+        failed_path = os.path.join(workdir, "corrupt.failed.jsonl")
+        report = run(server, path, 8, checkpoint_path, failed_path=failed_path)
+        with open(checkpoint_path) as f:
+            watermark = json.load(f)["watermark"]
+        with open(failed_path) as f:
+            failed = [json.loads(line) for line in f]
+        resumed = run(server, path, 8, checkpoint_path, failed_path=failed_path)
+        ok = (report["created"] == rows - 1 and report["failed"] == 1 and watermark == rows - 1
+              and [row["line"] for row in failed] == [rows // 2 + 1] and resumed["created"] == 0
+              and resumed["failed"] == 0 and len(server.state.entries) == rows - 1)
+        print(f"corrupt line {rows // 2 + 1}: {report['created']} created, {report['failed']} failed, "
+              f"watermark {watermark}, resume created {resumed['created']}" + (" OK" if ok else " MISMATCH"))
+    print(f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024} MiB")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import heapq
+import os
+import random
+import sys
+
+# Runs the countdown against a simulated clock whose after() callbacks land
+# late (jitter plus occasional main-loop stalls) and reports how far the
+# session overruns and how often the loop is woken, compared with the old
+# decrement-once-per-after(1000) approach.
+#   python benchmarks/countdown_drift.py [minutes] [seed]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from countdown import Countdown  # noqa: E402
+
+
+class SimulatedLoop:
+    def __init__(self, seed, iconified_from=None):
+        self.now = 0.0
+        self.queue = []
+        self.sequence = 0
+        self.random = random.Random(seed)
+        self.iconified_from = iconified_from
+
+    def clock(self):
+        return self.now
+
+    def is_iconified(self):
+        return self.iconified_from is not None and self.now >= self.iconified_from
+
+    def after(self, delay_ms, callback):
+        # Typical Tk lateness, and a 0.5 s stall on roughly 1% of callbacks
+        lateness = self.random.uniform(0.001, 0.02)
+        if self.random.random() < 0.01:
+            lateness += 0.5
+        self.sequence += 1
+        heapq.heappush(self.queue, (self.now + delay_ms / 1000 + lateness, self.sequence, callback))
+        return self.sequence
+
+    def after_cancel(self, after_id):
+        self.queue = [item for item in self.queue if item[1] != after_id]
+        heapq.heapify(self.queue)
+
+    def run(self):
+        while self.queue:
+            self.now, _, callback = heapq.heappop(self.queue)
+            callback()
+
+
+def run_naive(duration, seed):
+    loop = SimulatedLoop(seed)
+    state = {"remaining": duration, "wakeups": 0, "ended": None}
+
+    def update():
+        state["wakeups"] += 1
+        if state["remaining"] <= 0:
+            state["ended"] = loop.now
+            return
+        state["remaining"] -= 1
+        loop.after(1000, update)
+
+    update()
+    loop.run()
+    return state["ended"], state["wakeups"], duration
+
+
+def run_deadline(duration, seed, iconified_from=None):
+    loop = SimulatedLoop(seed, iconified_from)
+    state = {"ended": None, "redraws": 0}
+
+    def on_display(text):
+        state["redraws"] += 1
+
+    def on_expire():
+        state["ended"] = loop.now
+
+    countdown = Countdown(loop.after, loop.after_cancel, on_display, on_expire,
+                          clock=loop.clock, is_iconified=loop.is_iconified)
+    countdown.start(duration)
+    loop.run()
+    return state["ended"], countdown.wakeups, state["redraws"]
+
+
+def report(label, ended, wakeups, redraws, duration):
+    minutes = duration / 60
+    print(f"{label:<22} drift {ended - duration:+8.3f} s   "
+          f"wakeups/min {wakeups / minutes:6.1f}   redraws/min {redraws / minutes:6.1f}")
+
+
+def main():
+    minutes = float(sys.argv[1]) if len(sys.argv) > 1 else 18
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    duration = int(minutes * 60)
+    report("after(1000) counter", *run_naive(duration, seed), duration)
+    report("monotonic deadline", *run_deadline(duration, seed), duration)
+    report("deadline, minimized", *run_deadline(duration, seed, iconified_from=60), duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import logging
+import os
+import sys
+import tempfile
+import time
+import timeit
+from datetime import timedelta
+
+from fake_toggl import parse_time, start_fake_toggl
+from suite import StubAudio, StubView, VirtualLoop
+
+# Kills a session seven minutes into a work period (no clean shutdown),
+# starts a fresh process-equivalent against the same checkpoint and
+# journal, and reports how long the resume took, what it restored and
+# whether Toggl ends up with exactly one running entry. Also times a
+# checkpoint save. Then resumes from a checkpoint saved 10 hours ago,
+# whose period must end at its deadline rather than count the downtime.
+#   python benchmarks/crash_resume.py
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "toggl-scripts"))
+from deadline_scheduler import DeadlineScheduler  # noqa: E402
+from pomodoro_timer import PomodoroTimer  # noqa: E402
+from session_checkpoint import SessionCheckpoint  # noqa: E402
+from toggl_client import TogglClient  # noqa: E402
+from toggl_dispatcher import TogglDispatcher  # noqa: E402
+from toggl_journal import TogglJournal  # noqa: E402
+
+
+def launch(workdir, server):
+    loop = VirtualLoop(0.005, 1)
+    client = TogglClient("benchmark", api_url=server.api_url, rate_limit=None)
+    dispatcher = TogglDispatcher(client, TogglJournal(os.path.join(workdir, "journal.jsonl")))
+    checkpoint = SessionCheckpoint(os.path.join(workdir, "session.bin"))
+    timer = PomodoroTimer(StubView(), scheduler=DeadlineScheduler(loop, clock=loop.clock), audio=StubAudio(),
+                          toggl=dispatcher, clock=loop.clock, checkpoint=checkpoint)
+    return loop, timer, dispatcher
+
+
+def wait_synced(dispatcher, timeout=10):
+    started = time.perf_counter()
+    while (dispatcher.journal.pending() or dispatcher.pending_reconcile) and time.perf_counter() - started < timeout:
+        time.sleep(0.001)
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    server = start_fake_toggl()
+    with tempfile.TemporaryDirectory() as workdir:
+        loop, timer, dispatcher = launch(workdir, server)
+        timer.description = "writing"
+        timer.start_work()
+        loop.run_until(lambda: False, loop.now + 7 * 60)
+        wait_synced(dispatcher)
+        saves = timeit.timeit(lambda: timer._checkpoint(flush=False), number=10000) / 10000
+        flushed = timeit.timeit(lambda: timer._checkpoint(flush=True), number=1000) / 1000
+        dispatcher.worker.join(0)  # "Crash": nothing is closed or flushed
+        dispatcher.closed = True
+
+        requests_before = server.state.request_count
+        started = time.perf_counter()
+        loop, timer, dispatcher = launch(workdir, server)
+        timer.restore(timer.checkpoint.load())
+        restored = time.perf_counter() - started
+        wait_synced(dispatcher)
+        reconciled = time.perf_counter() - started
+
+        print(f"checkpoint save: {saves * 1e6:.1f} us, with msync {flushed * 1e6:.1f} us")
+        print(f"restored in {restored * 1000:.1f} ms with no network, reconciled with Toggl after "
+              f"{reconciled * 1000:.1f} ms ({server.state.request_count - requests_before} requests)")
+        print(f"restored '{timer.description}', running={timer.is_running}, remaining "
+              f"{timer.remaining_time / 60:.2f} of {timer.work_time - 7} min")
+        print(f"Toggl running entries: {server.state.running_count()} (of {len(server.state.entries)} total)")
+
+        # The same checkpoint as if the machine had been off for 10 hours since
+        state = timer.checkpoint.load()
+        dispatcher.worker.join(0)
+        dispatcher.closed = True
+        for key in ("deadline", "period_started", "saved_at"):
+            state[key] -= 10 * 3600
+        for entry in server.state.entries.values():
+            entry["start"] = (parse_time(entry["start"]) - timedelta(hours=10)).isoformat()
+        loop, timer, dispatcher = launch(workdir, server)
+        timer.restore(state)
+        wait_synced(dispatcher)
+        entry = max(server.state.entries.values(), key=lambda entry: entry["id"])
+        stopped_at = parse_time(entry["stop"]).timestamp()
+        print(f"10 h later: running={timer.is_running}, prompting={timer.prompted_at is not None}, "
+              f"Toggl entry stopped {stopped_at - state['deadline']:+.1f} s from the deadline "
+              f"({entry['duration'] / 60:.1f} min), {server.state.running_count()} running")
+        dispatcher.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
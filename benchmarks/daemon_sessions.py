@@ -0,0 +1,39 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Hosts many sessions in one PomodoroDaemon and reports memory per session
+# and how much loop time their countdowns cost.
+#   python benchmarks/daemon_sessions.py [sessions]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pomodoro_daemon import PomodoroDaemon  # noqa: E402
+
+
+async def run(count):
+    ledger_dir = tempfile.TemporaryDirectory()
+    daemon = PomodoroDaemon(asyncio.get_running_loop(), ledger_path=os.path.join(ledger_dir.name, "ledger.sqlite3"))
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for i in range(count):
+        daemon.create_session(f"desk-{i}", description=f"session {i}", work_time=18 + i % 7)
+        daemon.sessions[f"desk-{i}"].start_work()
+    after = tracemalloc.take_snapshot()
+    used = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    tracemalloc.stop()
+    print(f"{count} sessions: {used / count / 1024:.2f} KiB per session")
+
+    started = time.process_time()
+    await asyncio.sleep(3)
+    cpu = time.process_time() - started
+    print(f"CPU while ticking: {cpu / 3 * 100:.2f}% of one core "
+          f"({sum(timer.countdown.wakeups for timer in daemon.sessions.values())} wakeups)")
+    daemon.close()
+    ledger_dir.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
@@ -0,0 +1,102 @@
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from fake_toggl import start_fake_toggl
+
+# Seeds the fake Toggl server with a year of entries, backfills the local
+# mirror, changes a few entries on the server and syncs again, then times
+# history queries and description autocomplete against the mirror.
+#   python benchmarks/entry_mirror.py [entries] [latency_ms]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "toggl-scripts"))
+from toggl_client import TogglClient  # noqa: E402
+from toggl_entries import EntryMirror  # noqa: E402
+
+WORDS = ["review", "write", "fix", "plan", "read", "email", "design", "deploy", "pair", "test"]
+TOPICS = ["parser", "importer", "timer", "docs", "release", "dashboard", "audio", "sync", "ledger"]
+
+
+def seed(state, count):
+    rng = random.Random(1)
+    now = datetime.now(timezone.utc)
+    for i in range(count):
+        start = now - timedelta(days=360) + timedelta(days=360) * i / count
+        entry_id = state.next_id
+        state.next_id += 1
+        state.entries[entry_id] = {
+            "id": entry_id, "workspace_id": 8404611, "project_id": rng.choice([204411781, 204411782, None]),
+            "description": f"{rng.choice(WORDS)} {rng.choice(TOPICS)} {rng.randrange(40)}",
+            "start": start.isoformat(), "stop": (start + timedelta(minutes=25)).isoformat(), "duration": 1500,
+            "at": start.isoformat(),
+        }
+
+
+def timed(function, *args, runs=200):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        function(*args)
+        samples.append(time.perf_counter() - started)
+    return f"median {statistics.median(samples) * 1000:.3f} ms, max {max(samples) * 1000:.3f} ms"
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 30) / 1000
+    logging.basicConfig(level=logging.WARNING)
+    server = start_fake_toggl()
+    server.state.latency = latency
+    seed(server.state, count)
+    client = TogglClient("benchmark", api_url=server.api_url, rate_limit=None)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        mirror = EntryMirror(os.path.join(workdir, "entries.sqlite3"), client)
+        requests = server.state.request_count
+        started = time.perf_counter()
+        assert mirror.sync()
+        print(f"backfill: {count} entries in {time.perf_counter() - started:.2f} s, "
+              f"{server.state.request_count - requests} requests")
+
+        # A few changes on the server: one edited, one deleted, one new
+        edited, deleted = list(server.state.entries)[-2:]
+        client.update_time_entry(edited, {"description": "renamed on the web"})
+        client.update_time_entry(deleted, {"description": "one-off, then deleted"})
+        assert mirror.sync() and mirror.complete("one-off") == ["one-off, then deleted"]
+        client._request("DELETE", f"/workspaces/8404611/time_entries/{deleted}")
+        created = client.start_time_entry("added elsewhere")
+        requests = server.state.request_count
+        started = time.perf_counter()
+        assert mirror.sync()
+        print(f"incremental sync: {time.perf_counter() - started:.3f} s, "
+              f"{server.state.request_count - requests} requests")
+        now = datetime.now(timezone.utc)
+        assert mirror.with_description("renamed on the web")[0]["id"] == edited
+        assert not [e for e in mirror.between(now - timedelta(days=2), now) if e["id"] == deleted]
+        assert mirror.running()["id"] == created["id"]
+        assert mirror.complete("one-off") == [], "deleted entries must not be offered"
+
+        # Offline from here on
+        server.shutdown()
+        week = (now - timedelta(days=7), now)
+        print(f"last week: {len(mirror.between(*week))} entries, {timed(mirror.between, *week)}")
+        print(f"project, last month: {timed(mirror.for_project, 204411782, now - timedelta(days=30), now)}")
+        print(f"by description: {timed(mirror.with_description, 'fix parser 7')}")
+        print(f"totals, last week: {timed(mirror.totals, *week)}")
+        print(f"running entry: {timed(mirror.running)}")
+        print(f"autocomplete 're': {mirror.complete('re', 3)}, {timed(mirror.complete, 're', runs=2000)}")
+        started = time.perf_counter()
+        EntryMirror(os.path.join(workdir, "entries.sqlite3")).close()
+        print(f"reopen (rebuilds the prefix index): {(time.perf_counter() - started) * 1000:.1f} ms")
+        mirror.close()
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# A small in-memory stand-in for the Toggl v9 API, good enough to drive the
+# client, benchmarks and outage simulations without touching the real service.
+
+ENTRY_PATH = re.compile(r'^/api/v9/workspaces/(\d+)/time_entries$')
+ENTRY_ID_PATH = re.compile(r'^/api/v9/workspaces/(\d+)/time_entries/(\d+)$')
+STOP_PATH = re.compile(r'^/api/v9/workspaces/(\d+)/time_entries/(\d+)/stop$')
+METADATA_PATH = re.compile(r'^/api/v9/workspaces/(\d+)/(projects|tags|clients)$')
+
+
+class FakeTogglState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.next_id = 1
+        self.metadata = {
+            "projects": [{"id": 204411781, "name": "Pomodoro", "workspace_id": 8404611, "at": self.now()}],
+            "tags": [],
+            "clients": [],
+        }
+        self.request_count = 0
+        self.latency = 0.0  # seconds added to every request
+        self.offline = False  # when True every request fails with 503
+        self.rate_limit = None  # requests per second per API token before answering 429
+        self.error_rate = 0.0  # fraction of requests answered with a random 502
+        self.throttled = 0
+        self.windows = {}  # API token -> [second, requests in that second]
+        self.workspaces = [{"id": 8404611, "name": "Default workspace"}]
+        self.workspace_latency = {}  # workspace id -> extra seconds on its metadata requests
+        self.failing_workspaces = set()  # workspace ids whose metadata requests get a 403 (access revoked)
+
+    def now(self):
+        return datetime.now(timezone.utc).isoformat()
+
+    def running_count(self):
+        return sum(1 for entry in self.entries.values() if entry["duration"] < 0)
+
+    def running_entry(self):
+        for entry in self.entries.values():
+            if entry["duration"] < 0 and not entry.get("server_deleted_at"):
+                return entry
+        return None
+
+
+class FakeTogglHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _send(self, status, body=None, headers=None):
+        payload = b"" if status == 304 else json.dumps(body).encode() if body is not None else b"null"
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return None
+        return json.loads(self.rfile.read(length))
+
+    def _handle(self, method):
+        body = self._read_json() if method in ("POST", "PATCH", "PUT") else None
+        state = self.state
+        with state.lock:
+            state.request_count += 1
+            latency = state.latency
+            offline = state.offline
+            throttle = False
+            if state.rate_limit:
+                second = int(time.monotonic())
+                window = state.windows.setdefault(self.headers.get("Authorization"), [second, 0])
+                if window[0] != second:
+                    window[:] = [second, 0]
+                window[1] += 1
+                throttle = window[1] > state.rate_limit
+                state.throttled += throttle
+            failed = state.error_rate and random.random() < state.error_rate
+        if throttle:
+            return self._send(429, {"error": "too many requests"}, headers={"Retry-After": "1"})
+        if latency:
+            time.sleep(latency)
+        if offline:
+            return self._send(503, {"error": "service unavailable"})
+        if failed:
+            return self._send(502, {"error": "bad gateway"})
+
+        url = urlsplit(self.path)
+        path = url.path
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        match = METADATA_PATH.match(path)
+        if match:
+            workspace_id = int(match.group(1))
+            if workspace_id in state.failing_workspaces:
+                return self._send(403, {"error": "forbidden"})
+            if state.workspace_latency.get(workspace_id):
+                time.sleep(state.workspace_latency[workspace_id])
+        with state.lock:
+            if method == "GET" and path == "/api/v9/me/workspaces":
+                return self._send(200, state.workspaces)
+            if method == "POST" and ENTRY_PATH.match(path):
+                entry = dict(body or {})
+                if entry.get("duration", -1) < 0:
+                    # Like Toggl, starting an entry stops the running one
+                    running = state.running_entry()
+                    if running is not None:
+                        running["stop"] = state.now()
+                        running["duration"] = 0
+                        running["at"] = state.now()
+                entry["id"] = state.next_id
+                entry["at"] = state.now()
+                entry.setdefault("duration", -1)
+                entry.setdefault("start", state.now())
+                state.next_id += 1
+                state.entries[entry["id"]] = entry
+                return self._send(200, entry)
+            if method == "GET" and path == "/api/v9/me/time_entries/current":
+                return self._send(200, state.running_entry())
+            if method == "GET" and path == "/api/v9/me/time_entries" and "since" in query:
+                since = datetime.fromtimestamp(int(query["since"]), timezone.utc)
+                return self._send(200, [entry for entry in state.entries.values()
+                                        if parse_time(entry.get("at", entry["start"])) >= since])
+            if method == "GET" and path == "/api/v9/me/time_entries":
+                start_date = parse_time(query["start_date"]) if "start_date" in query else None
+                end_date = parse_time(query["end_date"]) if "end_date" in query else None
+                return self._send(200, [
+                    entry for entry in state.entries.values()
+                    if not entry.get("server_deleted_at")
+                    and (start_date is None or parse_time(entry["start"]) >= start_date)
+                    and (end_date is None or parse_time(entry["start"]) <= end_date)
+                ])
+            match = ENTRY_ID_PATH.match(path)
+            if method == "PUT" and match:
+                entry = state.entries.get(int(match.group(2)))
+                if entry is None:
+                    return self._send(404, {"error": "not found"})
+                entry.update(body or {})
+                entry["at"] = state.now()
+                if entry.get("stop") and entry["duration"] < 0:
+                    entry["duration"] = int((parse_time(entry["stop"]) - parse_time(entry["start"])).total_seconds())
+                return self._send(200, entry)
+            if method == "DELETE" and match:
+                # Deleted entries stay visible to `since` queries, as on Toggl
+                entry = state.entries.get(int(match.group(2)))
+                if entry is None:
+                    return self._send(404, {"error": "not found"})
+                entry["server_deleted_at"] = entry["at"] = state.now()
+                return self._send(200)
+            match = STOP_PATH.match(path)
+            if method == "PATCH" and match:
+                entry = state.entries.get(int(match.group(2)))
+                if entry is None:
+                    return self._send(404, {"error": "not found"})
+                entry["stop"] = state.now()
+                entry["duration"] = 0 if entry["duration"] < 0 else entry["duration"]
+                entry["at"] = state.now()
+                return self._send(200, entry)
+            match = METADATA_PATH.match(path)
+            if method == "GET" and match:
+                items = [item for item in state.metadata[match.group(2)] if item["workspace_id"] == int(match.group(1))]
+                if "since" in query:
+                    since = datetime.fromtimestamp(int(query["since"]), timezone.utc)
+                    items = [item for item in items if parse_time(item["at"]) >= since]
+                etag = f'"{hash(json.dumps(items, sort_keys=True)) & 0xffffffff:x}"'
+                if self.headers.get("If-None-Match") == etag:
+                    return self._send(304, headers={"ETag": etag})
+                return self._send(200, items, headers={"ETag": etag})
+        return self._send(404, {"error": f"no route for {method} {path}"})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+def parse_time(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def start_fake_toggl(port=0):
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeTogglHandler)
+    server.state = FakeTogglState()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.api_url = f"http://127.0.0.1:{server.server_address[1]}/api/v9"
+    return server
@@ -0,0 +1,56 @@
+import os
+import sys
+import tempfile
+import time
+
+from fake_toggl import start_fake_toggl
+
+# Drives the journaled dispatcher through a simulated Toggl outage and
+# reports journal append latency and how the backlog replays afterwards.
+#   python benchmarks/journal_outage.py [transitions]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "toggl-scripts"))
+import toggl_dispatcher  # noqa: E402
+from toggl_client import TogglClient  # noqa: E402
+from toggl_journal import TogglJournal  # noqa: E402
+
+
+def main():
+    transitions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    toggl_dispatcher.RETRY_MIN = 0.2  # don't wait minutes for the outage to clear
+    server = start_fake_toggl()
+    server.state.offline = True
+
+    with tempfile.TemporaryDirectory() as workdir:
+        journal = TogglJournal(os.path.join(workdir, "journal.jsonl"))
+        client = TogglClient("benchmark", api_url=server.api_url, rate_limit=None)
+        dispatcher = toggl_dispatcher.TogglDispatcher(client, journal)
+
+        appends = []
+        for i in range(transitions):
+            started = time.perf_counter()
+            dispatcher.start(f"session {i}")
+            appends.append((time.perf_counter() - started) * 1e6)
+            time.sleep(1.05)  # Toggl keeps whole seconds; keep entries distinct
+            started = time.perf_counter()
+            dispatcher.stop()
+            appends.append((time.perf_counter() - started) * 1e6)
+        appends.sort()
+        print(f"journal append: median {appends[len(appends) // 2]:.1f} us, max {appends[-1]:.1f} us")
+        print(f"pending while offline: {len(journal.pending())}")
+
+        server.state.offline = False
+        started = time.perf_counter()
+        while journal.pending():
+            time.sleep(0.01)
+        print(f"replayed in {(time.perf_counter() - started) * 1000:.1f} ms, "
+              f"{len(server.state.entries)} entries on the server, {server.state.request_count} requests total")
+
+        dispatcher.close()
+        client.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import timeit
+import urllib.request
+
+# Cost of the hot-path instrumentation: a bare observe() call and a full
+# countdown tick, with metrics off (the default) and on, then a scrape of
+# the Prometheus endpoint.
+#   python benchmarks/metrics_overhead.py [ticks]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import metrics  # noqa: E402
+from countdown import Countdown  # noqa: E402
+
+
+class InstantLoop:
+    # after() runs the callback on the next loop turn; time advances one second per tick
+    def __init__(self):
+        self.now = 0.0
+        self.pending = None
+
+    def clock(self):
+        return self.now
+
+    def after(self, delay_ms, callback):
+        self.pending = (delay_ms, callback)
+        return callback
+
+    def after_cancel(self, handle):
+        self.pending = None
+
+    def run(self):
+        while self.pending:
+            delay_ms, callback = self.pending
+            self.pending = None
+            self.now += delay_ms / 1000 + 0.002  # a little late, as under Tk
+            callback()
+
+
+def tick_cost(ticks):
+    loop = InstantLoop()
+    countdown = Countdown(loop.after, loop.after_cancel, lambda text: None, lambda: None, clock=loop.clock)
+    started = time.perf_counter()
+    countdown.start(ticks)
+    loop.run()
+    return (time.perf_counter() - started) / countdown.wakeups * 1e9
+
+
+def main():
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    calls = 1000000
+    off_call = timeit.timeit(lambda: metrics.observe("pomodoro_tick_lateness_seconds", 0.002), number=calls)
+    off_tick = tick_cost(ticks)
+    metrics.enable()
+    on_call = timeit.timeit(lambda: metrics.observe("pomodoro_tick_lateness_seconds", 0.002), number=calls)
+    on_tick = tick_cost(ticks)
+    print(f"observe() call    off {off_call / calls * 1e9:6.0f} ns   on {on_call / calls * 1e9:6.0f} ns")
+    print(f"countdown tick    off {off_tick:6.0f} ns   on {on_tick:6.0f} ns   "
+          f"(+{(on_tick - off_tick) / off_tick * 100:.0f}% of a tick that runs once a second)")
+
+    metrics.inc("pomodoro_toggl_responses_total", labels=(("method", "POST"), ("status", "200")))
+    server = metrics.serve(0)
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as response:
+        body = response.read().decode()
+    print(f"scrape: {len(body.splitlines())} lines, e.g.")
+    print("\n".join(line for line in body.splitlines() if "_count" in line or "_total" in line))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import os
+import sys
+import time
+import tracemalloc
+
+# CPU cost of synthesizing each noise color, per second of audio produced,
+# a check that the loop point is as smooth as the rest of the signal, and
+# how much a warm generator still allocates per loop.
+#   python benchmarks/noise_cost.py [runs]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np  # noqa: E402
+from noise import COLORS, LOOP_SECONDS, NoiseGenerator  # noqa: E402
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    generator = NoiseGenerator(sample_rate=44100, channels=2, seed=1)
+    print(f"{LOOP_SECONDS} s stereo loop at 44.1 kHz, {generator.pcm.nbytes // 1024} KiB")
+    for color in COLORS:
+        cpu_started = time.process_time()
+        wall_started = time.perf_counter()
+        for _ in range(runs):
+            pcm = generator.generate(color)
+        cpu = (time.process_time() - cpu_started) / runs
+        wall = (time.perf_counter() - wall_started) / runs
+        steps = np.abs(np.diff(pcm[:, 0].astype(np.int32)))
+        seam = abs(int(pcm[0, 0]) - int(pcm[-1, 0]))
+        print(f"{color:<6} {wall * 1000:7.1f} ms per loop   {cpu / LOOP_SECONDS * 1000:6.2f} ms CPU per second "
+              f"of audio ({LOOP_SECONDS / cpu:5.0f}x realtime)   seam step {seam} vs p99 step "
+              f"{int(np.percentile(steps, 99))}")
+    print("playback loops the block in the mixer: 0 ms CPU per second once generated")
+    tracemalloc.start()
+    generator.generate("pink")
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"warm generate(): peak {peak / 1024:.0f} KiB allocated, vs {generator.pcm.nbytes // 1024} KiB of PCM")
+
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    pygame.mixer.init()
+    started = time.perf_counter()
+    NoiseGenerator.for_mixer().make_sound("pink").play(loops=-1)
+    print(f"mixer {pygame.mixer.get_init()}: pink noise playing {(time.perf_counter() - started) * 1000:.1f} ms "
+          f"after asking, from a cold generator")
+    pygame.mixer.quit()
+
+
+if __name__ == "__main__":
+    main()
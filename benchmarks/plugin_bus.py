@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+# Publishes bursts of events to a bus with well-behaved, slow, hanging and
+# failing hooks plus an external command, and checks what the publisher
+# pays (it should never wait on a hook) against what each hook reports.
+# The hanging hook should end up with dropped events and a bounded
+# backlog on its thread, and events published before the bus loop runs
+# should still be delivered.
+#   python benchmarks/plugin_bus.py [events]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from event_bus import Event, EventBus  # noqa: E402
+from pomodoro_timer import PomodoroTimer  # noqa: E402
+from suite import StubAudio, StubView, VirtualLoop  # noqa: E402
+
+KINDS = ("work_started", "extended", "work_ended", "break_started", "reminder_fired")
+
+
+def fast(event):
+    pass
+
+
+async def slow(event):
+    await asyncio.sleep(0.05)
+
+
+def hangs(event):
+    time.sleep(2)
+
+
+def fails(event):
+    raise RuntimeError("plugin bug")
+
+
+def transition_cost(bus, runs=200):
+    # Wall time of start_work/start_break with and without the bus attached
+    loop = VirtualLoop(0, 1)
+    from deadline_scheduler import DeadlineScheduler
+    timer = PomodoroTimer(StubView(), scheduler=DeadlineScheduler(loop, clock=loop.clock), audio=StubAudio(),
+                          clock=loop.clock, events=bus)
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        timer.start_work()
+        timer.start_break()
+        samples.append((time.perf_counter() - started) / 2)
+    timer.cancel_timer()
+    return statistics.median(samples) * 1e6
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    logging.basicConfig(level=logging.CRITICAL)
+    quiet = EventBus()
+    quiet.register("fast", fast)
+    print(f"transition with a bus: {transition_cost(quiet):.1f} us, without: {transition_cost(None):.1f} us")
+    quiet.close()
+
+    bus = EventBus(queue_size=32)
+    bus.register("fast", fast)
+    bus.register("slow", slow)
+    bus.register("hangs", hangs, events=("work_ended",), timeout=0.2)
+    bus.register("fails", fails, events=("extended",))
+    bus.add_command(f"{sys.executable} -c pass", events=("work_started", "break_started"))
+    time.sleep(0.1)
+
+    publish = []
+    for i in range(events):
+        event = Event(KINDS[i % len(KINDS)], "bench", f"task {i}", seconds=60)
+        started = time.perf_counter()
+        bus.publish(event)
+        publish.append(time.perf_counter() - started)
+        time.sleep(0.001)  # a burst, not one call
+    print(f"publish(): median {statistics.median(publish) * 1e6:.1f} us, max {max(publish) * 1e6:.1f} us "
+          f"over {events} events")
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline and any(stats["queued"] for stats in bus.stats().values()):
+        time.sleep(0.1)
+    for name, stats in bus.stats().items():
+        print(f"  {name[:24]:<24} {stats}")
+    hung = next(plugin for plugin in bus.plugins if plugin.name == "hangs")
+    print(f"  calls waiting on the hanging hook's thread: {hung.executor._work_queue.qsize()}")
+    bus.close()
+
+    # The daemon hands the bus its loop before running it
+    loop = asyncio.new_event_loop()
+    early = EventBus(loop)
+    early.register("fast", fast)
+    for i in range(3):
+        early.publish(Event("work_started", "bench", f"task {i}"))
+    loop.run_until_complete(asyncio.sleep(0.1))
+    print(f"published before the loop ran: {early.stats()['fast']}")
+    early.close()
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import logging
+import os
+import sys
+import threading
+import time
+
+from fake_toggl import start_fake_toggl
+
+# Hammers a fake Toggl that enforces a per-token rate limit from several
+# threads, with and without the client-side token bucket, then checks
+# reads survive flaky 5xx responses through the retry layer.
+#   python benchmarks/rate_limit.py [requests] [server_limit_per_second]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "toggl-scripts"))
+import toggl_http  # noqa: E402
+from toggl_client import TogglClient  # noqa: E402
+
+
+def hammer(server, api_key, total, threads, **client_options):
+    client = TogglClient(api_key, api_url=server.api_url, **client_options)
+    client.set_pool_size(threads)
+    server.state.throttled = 0
+    lost = []
+    per_thread = total // threads
+
+    def worker():
+        for _ in range(per_thread):
+            if client.get_time_entries("2024-01-01T00:00:00Z", "2024-01-02T00:00:00Z") is None:
+                lost.append(1)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    counters = client.http.counters()
+    client.close()
+    return per_thread * threads / elapsed, len(lost), server.state.throttled, counters
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    logging.basicConfig(level=logging.ERROR)
+    server = start_fake_toggl()
+    server.state.rate_limit = limit
+
+    for label, options in (("no bucket", {"rate_limit": None}),
+                           ("bucket", {"rate_limit": limit * 0.9, "burst": 1})):
+        rate, lost, throttled, counters = hammer(server, label, total, 8, **options)
+        print(f"{label:<10} {rate:6.1f} req/s (server allows {limit}), {throttled} answered 429, "
+              f"{lost} lost, {counters['retries']} retries, {counters['wait_seconds']:.1f} s queued")
+
+    server.state.rate_limit = None
+    server.state.error_rate = 0.2
+    toggl_http.BACKOFF_BASE = 0.01  # keep the run short
+    rate, lost, _, counters = hammer(server, "flaky", total, 8, rate_limit=None)
+    print(f"20% 502s   {lost} of {total} reads lost, {counters['server_errors']} errors absorbed "
+          f"by {counters['retries']} retries")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import io
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+# Writes synthetic Toggl exports (JSON array, JSONL, CSV) and aggregates
+# them with toggl_report in a fresh process each, reporting throughput and
+# peak RSS, next to json.load on the same file. Flat RSS from 100k to 1M
+# entries is the point. Finally streams entries from the fake Toggl server.
+# First, checks the streaming decoder against json.loads with the input
+# split at every offset, so values cut off mid-number are covered.
+#   python benchmarks/report_stream.py [entries]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "toggl-scripts"))
+
+PROJECTS = [204411781, 204411782, 204411783, None]
+WORDS = ["review", "write", "fix", "plan", "read", "email", "design", "deploy", "pair", "test"]
+TOPICS = ["parser", "importer", "timer", "docs", "release", "dashboard", "audio", "sync", "ledger"]
+
+
+def synthetic_entries(count):
+    rng = random.Random(1)
+    start = datetime(2021, 1, 1, tzinfo=timezone.utc)
+    step = timedelta(days=4 * 365) / count  # four years of a team's entries
+    for i in range(count):
+        began = start + step * i
+        yield {"id": i + 1, "workspace_id": 8404611, "project_id": rng.choice(PROJECTS),
+               "description": f"{rng.choice(WORDS)} {rng.choice(TOPICS)} {rng.randrange(200)}",
+               "start": began.isoformat(), "stop": (began + timedelta(seconds=1500)).isoformat(),
+               "duration": 1500, "tags": ["bench"], "rate": rng.uniform(10, 200),
+               "weight": rng.choice([12345.5e3, 2.5e-7, -1E+21, 0.0])}
+
+
+def check_chunk_boundaries():
+    from toggl_report import iter_json_array
+    document = json.dumps(list(synthetic_entries(3)) + [1.5, 12345.5e3, -2.25e-7, 10, "x", None, True, [4.0]])
+    expected = json.loads(document)
+    for offset in range(len(document) + 1):
+        head, tail = document[:offset], document[offset:]
+        for chunks in ([head, tail], [head.encode(), tail.encode()]):
+            assert list(iter_json_array(chunks)) == expected, f"split at {offset}"
+    for size in range(1, 16):
+        assert list(iter_json_array(document[i:i + size] for i in range(0, len(document), size))) == expected, \
+            f"{size}-character chunks"
+    print(f"chunk boundaries: {len(document) + 1} split points and chunk sizes 1-15 decode like json.loads")
+
+
+def check_malformed():
+    from toggl_report import iter_json_array
+    for document in ("[1 2]", "[1,,2]", "[1,]", "[,1]", '[{"a": 1} {"b": 2}]', '["a" 1]', "[tru]",
+                     '["a\\q"]', "[1.5.2]", "[nul", "[1", "{}"):
+        for size in (1, 2, len(document)):
+            try:
+                list(iter_json_array(document[i:i + size] for i in range(0, len(document), size)))
+            except ValueError:
+                continue
+            raise AssertionError(f"{document!r} in {size}-character chunks decoded")
+
+    def never_ending():
+        # A malformed element must fail without reading the rest of the stream
+        yield '[{"id": 1}, {"id": 2 "x": 3}, '
+        while True:
+            yield '{"id": 4}, '
+    try:
+        list(iter_json_array(never_ending()))
+    except ValueError as e:
+        print(f"malformed input: rejected ({e})")
+
+
+def write_export(path, count):
+    with open(path, "w") as f:
+        if path.endswith(".json"):
+            f.write("[\n")
+            for i, entry in enumerate(synthetic_entries(count)):
+                f.write(("," if i else "") + json.dumps(entry) + "\n")
+            f.write("]\n")
+        elif path.endswith(".jsonl"):
+            for entry in synthetic_entries(count):
+                f.write(json.dumps(entry) + "\n")
+        else:
+            f.write("description,start,duration,project_id\n")
+            for entry in synthetic_entries(count):
+                f.write(f"{entry['description']},{entry['start']},{entry['duration']},{entry['project_id'] or ''}\n")
+
+
+def child(mode, path):
+    # Runs in its own process so ru_maxrss belongs to this measurement alone
+    from toggl_report import ReportTotals, build_report, normalize, read_entries
+    started = time.perf_counter()
+    if mode == "stream":
+        totals = build_report(read_entries(path))
+    else:
+        with open(path) as f:
+            totals = ReportTotals().consume(normalize(json.load(f)))
+    seconds = time.perf_counter() - started
+    totals.write_csv(io.StringIO())
+    print(json.dumps({"seconds": seconds, "entries": totals.entries,
+                      "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+
+
+def measure(mode, path):
+    output = subprocess.run([sys.executable, __file__, "--child", mode, path], capture_output=True, text=True,
+                            check=True).stdout
+    result = json.loads(output)
+    print(f"  {mode:<10} {os.path.basename(path):<22} {result['entries']:>8} entries  "
+          f"{result['entries'] / result['seconds']:>9,.0f} entries/s  peak RSS {result['peak_rss_mib']:6.1f} MiB")
+
+
+def stream_from_fake_server(count):
+    from fake_toggl import start_fake_toggl
+    from toggl_client import TogglClient
+    from toggl_report import api_entries, build_report
+
+    server = start_fake_toggl()
+    now = datetime.now(timezone.utc)
+    for i, entry in enumerate(synthetic_entries(count)):
+        entry["start"] = (now - timedelta(days=360) + timedelta(days=360) * i / count).isoformat()
+        server.state.entries[entry["id"]] = entry
+    client = TogglClient("benchmark", api_url=server.api_url, rate_limit=None)
+    started = time.perf_counter()
+    totals = build_report(api_entries(client, now - timedelta(days=365), now))
+    seconds = time.perf_counter() - started
+    print(f"  api        {totals.entries:>8} entries in {seconds:.2f} s over {client.http.counters()['requests']} "
+          f"requests")
+    client.close()
+    server.shutdown()
+
+
+def main():
+    if sys.argv[1:2] == ["--child"]:
+        return child(sys.argv[2], sys.argv[3])
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    check_chunk_boundaries()
+    check_malformed()
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sorted({count // 10, count}):
+            paths = [os.path.join(workdir, f"entries-{size}.{extension}") for extension in ("json", "jsonl", "csv")]
+            started = time.perf_counter()
+            for path in paths:
+                write_export(path, size)
+            print(f"{size} entries (exports written in {time.perf_counter() - started:.1f} s, "
+                  f"{os.path.getsize(paths[0]) / 2 ** 20:.0f} MiB as JSON):")
+            for path in paths:
+                measure("stream", path)
+            measure("json.load", paths[0])
+    stream_from_fake_server(min(count, 50_000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import os
+import random
+import sys
+import time
+
+# Cost of arming, cancelling and firing timers on the DeadlineScheduler as
+# the number of armed timers grows, and how many host wakeups it asks for.
+#   python benchmarks/scheduler_scaling.py
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from deadline_scheduler import DeadlineScheduler  # noqa: E402
+
+
+class FakeHost:
+    # Records the single pending after() the scheduler keeps on its host
+    def __init__(self):
+        self.pending = None
+        self.arms = 0
+
+    def after(self, delay_ms, callback):
+        self.arms += 1
+        self.pending = callback
+        return self.arms
+
+    def after_cancel(self, after_id):
+        self.pending = None
+
+
+def measure(armed, operations=20000, seed=1):
+    rng = random.Random(seed)
+    clock = [0.0]
+    host = FakeHost()
+    scheduler = DeadlineScheduler(host, clock=lambda: clock[0])
+    handles = [scheduler.after(rng.uniform(1000, 3_600_000), lambda: None) for _ in range(armed)]
+
+    # Arm + cancel pairs at a steady population of `armed` timers
+    host.arms = 0
+    started = time.perf_counter()
+    for _ in range(operations):
+        index = rng.randrange(armed)
+        scheduler.after_cancel(handles[index])
+        handles[index] = scheduler.after(rng.uniform(1000, 3_600_000), lambda: None)
+    churn_ns = (time.perf_counter() - started) / operations * 1e9
+    churn_arms = host.arms
+
+    # Fire everything in deadline order
+    fired = [0]
+
+    def count():
+        fired[0] += 1
+
+    for handle in handles:
+        scheduler.after_cancel(handle)
+    for _ in range(armed):
+        scheduler.after(rng.uniform(1000, 3_600_000), count)
+    started = time.perf_counter()
+    while host.pending is not None:
+        clock[0] = scheduler.host_deadline
+        callback, host.pending = host.pending, None
+        callback()
+    fire_ns = (time.perf_counter() - started) / max(fired[0], 1) * 1e9
+    return churn_ns, churn_arms / operations, fire_ns
+
+
+def main():
+    print(f"{'armed':>7} {'arm+cancel':>12} {'host re-arms/op':>16} {'fire':>10}")
+    for armed in (1, 10, 100, 1000, 10000):
+        churn_ns, arms_per_op, fire_ns = measure(armed)
+        print(f"{armed:>7} {churn_ns:>10.0f}ns {arms_per_op:>16.3f} {fire_ns:>8.0f}ns")
+
+
+if __name__ == "__main__":
+    main()
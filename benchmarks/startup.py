@@ -0,0 +1,77 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Repeatable cold-start benchmark: time to import the app, time to the first
+# drawn frame and time until the audio thread reports ready, plus the
+# slowest imports from `python -X importtime`. Needs a display.
+#   python benchmarks/startup.py [runs]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r'''
+import importlib.util, json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+spec = importlib.util.spec_from_file_location("toggl_pomodoro", {app!r})
+app = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app)
+imported = time.perf_counter()
+root = app.tk.Tk()
+timer = app.create_timer(root)
+gui = app.PomodoroGUI(root, timer)
+root.update()
+first_frame = time.perf_counter()
+timer.audio.ready.wait(10)
+audio_ready = time.perf_counter()
+print(json.dumps({{"import": imported - started, "first_frame": first_frame - started,
+                  "audio_ready": audio_ready - started, "audio_available": timer.audio.available}}))
+timer.toggl.close()
+root.destroy()
+'''
+
+
+def probe(workdir, extra_args=()):
+    code = PROBE.format(root=ROOT, app=os.path.join(ROOT, "toggl-pomodoro.py"))
+    return subprocess.run([sys.executable, *extra_args, "-c", code], cwd=workdir,
+                          capture_output=True, text=True, check=True)
+
+
+def import_breakdown(stderr, top=10):
+    # -X importtime lines: "import time: self [us] | cumulative | imported package"
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.startswith("  "):
+            # Only top-level imports; nested ones are indented further
+            continue
+        name = name.strip()
+        totals[name] = totals.get(name, 0) + int(cumulative)
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    with tempfile.TemporaryDirectory() as workdir:
+        with open(os.path.join(workdir, "config.json"), "w") as config_file:
+            json.dump({"api_key": "benchmark", "api_url": "http://127.0.0.1:9/api/v9"}, config_file)
+        os.symlink(os.path.join(ROOT, "noises"), os.path.join(workdir, "noises"))
+
+        results = [json.loads(probe(workdir).stdout.strip().splitlines()[-1]) for _ in range(runs)]
+        for key in ("import", "first_frame", "audio_ready"):
+            values = [result[key] * 1000 for result in results]
+            print(f"{key:<12} median {statistics.median(values):8.1f} ms   max {max(values):8.1f} ms")
+        print(f"audio available: {all(result['audio_available'] for result in results)}")
+
+        print("\nslowest top-level imports (cumulative):")
+        for name, micros in import_breakdown(probe(workdir, ["-X", "importtime"]).stderr):
+            print(f"  {name:<24} {micros / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
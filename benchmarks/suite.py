@@ -0,0 +1,313 @@
+import argparse
+import heapq
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from fake_toggl import start_fake_toggl
+
+# Reproducible end-to-end run: PomodoroTimer driven through full
+# work -> break -> extend -> work cycles on a virtual clock, with stub view
+# and audio, the real dispatcher/journal/ledger, and the fake Toggl server
+# (configurable latency and failure rate). Results go to a JSON file named
+# after the commit so runs can be compared:
+#   python benchmarks/suite.py [--cycles N] [--latency-ms MS] [--error-rate R]
+#   python benchmarks/suite.py --compare benchmarks/results/<old>.json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "toggl-scripts"))
+import toggl_dispatcher  # noqa: E402
+import toggl_http  # noqa: E402
+from deadline_scheduler import DeadlineScheduler  # noqa: E402
+from pomodoro_timer import PomodoroTimer  # noqa: E402
+from session_ledger import SessionLedger  # noqa: E402
+from toggl_client import TogglClient  # noqa: E402
+from toggl_journal import TogglJournal  # noqa: E402
+
+SYNC_TIMEOUT = 30.0  # wall seconds to wait for the journal to drain after a transition
+
+STARTUP_PROBE = r'''
+import sys, time
+started = time.perf_counter()
+sys.path[:0] = [{root!r}, {scripts!r}]
+from deadline_scheduler import DeadlineScheduler
+from pomodoro_timer import PomodoroTimer
+from session_ledger import SessionLedger
+from toggl_client import TogglClient
+from toggl_dispatcher import TogglDispatcher
+print(time.perf_counter() - started)
+'''
+
+
+class VirtualLoop:
+    # after/after_cancel against a virtual clock. Callbacks land a little
+    # late, as under a busy Tk loop; time only moves when run_until is called.
+    def __init__(self, lateness, seed):
+        self.now = 0.0
+        self.queue = []
+        self.sequence = 0
+        self.lateness = lateness
+        self.random = random.Random(seed)
+        self.wakeups = 0
+
+    def clock(self):
+        return self.now
+
+    def after(self, delay_ms, callback):
+        self.sequence += 1
+        entry = [self.now + delay_ms / 1000 + self.random.uniform(0, self.lateness), self.sequence, callback]
+        heapq.heappush(self.queue, entry)
+        return entry
+
+    def after_cancel(self, entry):
+        entry[2] = None
+
+    def run_until(self, predicate, limit):
+        # Runs callbacks in order until predicate() holds or virtual time passes limit
+        while self.queue and not predicate():
+            if self.queue[0][0] > limit:
+                break
+            deadline, _, callback = heapq.heappop(self.queue)
+            if callback is None:
+                continue
+            self.now = deadline
+            self.wakeups += 1
+            callback()
+        if predicate():
+            return True
+        self.now = max(self.now, limit)  # Nothing else due: time still passes
+        return False
+
+
+class StubView:
+    def __init__(self):
+        self.displays = 0
+        self.prompts = 0
+        self.quit_called = False
+
+    def update_ui_state(self):
+        pass
+
+    def display_time(self, text):
+        self.displays += 1
+
+    def is_iconified(self):
+        return False
+
+    def restore_window(self):
+        pass
+
+    def maximize_window(self):
+        pass
+
+    def prompt_action(self, message, submessage):
+        self.prompts += 1
+
+    def hide_prompt(self):
+        pass
+
+    def show_totals(self, totals):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+class StubAudio:
+    def __init__(self):
+        self.sounds = 0
+        self.noise_starts = 0
+
+    def play_sound(self, sound_path):
+        self.sounds += 1
+
+    def play_noise(self, noise_path):
+        self.noise_starts += 1
+
+    def stop_noise(self):
+        pass
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))] if samples else None
+
+
+def summarize(samples, scale=1.0, digits=3):
+    if not samples:
+        return None
+    return {"median": round(statistics.median(samples) * scale, digits),
+            "p95": round(percentile(samples, 0.95) * scale, digits),
+            "max": round(max(samples) * scale, digits)}
+
+
+def run_cycles(args, workdir):
+    server = start_fake_toggl()
+    server.state.latency = args.latency_ms / 1000
+    server.state.error_rate = args.error_rate
+    toggl_http.BACKOFF_BASE = 0.01  # failures are the point; don't sit in backoff
+    toggl_dispatcher.RETRY_MIN = 0.05
+
+    loop = VirtualLoop(args.lateness_ms / 1000, args.seed)
+    view = StubView()
+    audio = StubAudio()
+    client = TogglClient("benchmark", api_url=server.api_url, rate_limit=None)
+    journal = TogglJournal(os.path.join(workdir, "journal.jsonl"))
+    dispatcher = toggl_dispatcher.TogglDispatcher(client, journal)
+    ledger = SessionLedger(os.path.join(workdir, "ledger.sqlite3"))
+    timer = PomodoroTimer(view, scheduler=DeadlineScheduler(loop, clock=loop.clock), audio=audio,
+                          toggl=dispatcher, ledger=ledger, session_name="bench", clock=loop.clock)
+    timer.work_time = args.work_minutes
+    timer.break_time = args.break_minutes
+
+    transitions = []  # wall seconds spent inside the timer method
+    syncs = []  # wall seconds until Toggl had the transition
+    overruns = []  # virtual seconds a period ended past its deadline
+    unsynced = 0
+
+    def transition(action, *action_args):
+        nonlocal unsynced
+        started = time.perf_counter()
+        action(*action_args)
+        transitions.append(time.perf_counter() - started)
+        while journal.pending() and time.perf_counter() - started < SYNC_TIMEOUT:
+            time.sleep(0.0005)
+        if journal.pending():
+            unsynced += 1
+        else:
+            syncs.append(time.perf_counter() - started)
+
+    def run_period(expected_seconds):
+        # Until the countdown expires, then note how late that was
+        deadline = loop.now + expected_seconds
+        loop.run_until(lambda: not timer.is_running, deadline + 60)
+        overruns.append(loop.now - deadline)
+
+    requests_before = server.state.request_count
+    wall_started = time.perf_counter()
+    for cycle in range(args.cycles):
+        timer.description = f"cycle {cycle}"
+        transition(timer.start_work)
+        run_period(timer.work_time * 60)
+        loop.run_until(lambda: False, loop.now + args.response_seconds)  # the user reacts
+        transition(timer.start_break)
+        loop.run_until(lambda: False, loop.now + timer.break_time * 30)  # halfway through the break
+        transition(timer.extend_break, 1)
+        run_period(timer.break_time * 30 + 60)
+        loop.run_until(lambda: False, loop.now + args.response_seconds)
+    wall_seconds = time.perf_counter() - wall_started
+    requests = server.state.request_count - requests_before
+
+    http_counters = client.http.counters()
+    timer.cancel_timer()
+    timer.stop_reminder()
+    dispatcher.close()
+    ledger.close()
+    client.close()
+    server.shutdown()
+    return {
+        "transition_ms": summarize(transitions, 1000),
+        "toggl_sync_ms": summarize(syncs, 1000),
+        "unsynced_transitions": unsynced,
+        "countdown_overrun_s": summarize(overruns),
+        "virtual_seconds": round(loop.now, 1),
+        "wakeups_per_virtual_minute": round(loop.wakeups / (loop.now / 60), 2),
+        "api_requests_per_cycle": round(requests / args.cycles, 2),
+        "api_retries": http_counters["retries"],
+        "server_entries": len(server.state.entries),
+        "sounds_played": audio.sounds,
+        "wall_seconds": round(wall_seconds, 3),
+    }
+
+
+def measure_startup(runs=5):
+    code = STARTUP_PROBE.format(root=ROOT, scripts=os.path.join(ROOT, "toggl-scripts"))
+    imports = []
+    processes = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        processes.append(time.perf_counter() - started)
+        imports.append(float(output))
+    return {"import_ms": summarize(imports, 1000, 1), "process_ms": summarize(processes, 1000, 1)}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current, previous):
+    # Prints every numeric result that moved, flattened to dotted keys
+    def flatten(value, prefix=""):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                yield from flatten(item, f"{prefix}{key}.")
+        elif isinstance(value, (int, float)):
+            yield prefix.rstrip("."), value
+
+    old = dict(flatten(previous["results"]))
+    print(f"compared with {previous['commit']}:")
+    for key, value in flatten(current["results"]):
+        before = old.get(key)
+        if before is None or before == value:
+            continue
+        change = f"{(value - before) / before * 100:+.1f}%" if before else "new"
+        print(f"  {key:<40} {before:>12} -> {value:<12} {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end Pomodoro benchmark with JSON results.")
+    parser.add_argument('--cycles', type=int, default=20)
+    parser.add_argument('--work-minutes', type=float, default=18)
+    parser.add_argument('--break-minutes', type=float, default=8)
+    parser.add_argument('--response-seconds', type=float, default=20, help='Virtual delay before each reaction')
+    parser.add_argument('--latency-ms', type=float, default=30, help='Fake Toggl latency per request')
+    parser.add_argument('--error-rate', type=float, default=0.05, help='Fraction of requests answered with 502')
+    parser.add_argument('--lateness-ms', type=float, default=20, help='Maximum lateness of each after() callback')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Results file (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', help='Earlier results file to diff against')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+
+    commit = git_commit()
+    with tempfile.TemporaryDirectory() as workdir:
+        results = run_cycles(args, workdir)
+    results["startup"] = measure_startup()
+    results["peak_rss_kib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    report = {
+        "commit": commit,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": results,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"saved {output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
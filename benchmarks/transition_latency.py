@@ -0,0 +1,50 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from fake_toggl import start_fake_toggl
+
+# Compares transition-to-entry-created latency of the old path (spawn a
+# python interpreter running start-timer.py) with the in-process client.
+#   python benchmarks/transition_latency.py [runs]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = os.path.join(ROOT, "toggl-scripts")
+sys.path.insert(0, SCRIPTS)
+from toggl_client import TogglClient  # noqa: E402
+
+
+def measure(label, fn, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    print(f"{label:<12} median {samples[len(samples) // 2]:8.1f} ms   max {samples[-1]:8.1f} ms")
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    server = start_fake_toggl()
+    with tempfile.TemporaryDirectory() as workdir:
+        with open(os.path.join(workdir, "config.json"), "w") as config_file:
+            json.dump({"api_key": "benchmark", "api_url": server.api_url}, config_file)
+
+        def spawn():
+            subprocess.run([sys.executable, os.path.join(SCRIPTS, "start-timer.py"), "--description", "bench"],
+                           cwd=workdir, stdout=subprocess.DEVNULL, check=True)
+
+        client = TogglClient("benchmark", api_url=server.api_url, rate_limit=None)
+
+        measure("subprocess", spawn, runs)
+        measure("in-process", lambda: client.start_time_entry("bench"), runs)
+        client.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+from fake_toggl import start_fake_toggl
+
+# Gives the fake Toggl server a number of workspaces with different
+# latencies, one of which always fails, and refreshes projects, tags and
+# clients for all of them one request at a time and then concurrently.
+# The concurrent run should take about as long as the slowest workspace,
+# or sequential / workers when there are more requests than workers.
+#   python benchmarks/workspace_fanout.py [workspaces] [workers]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "toggl-scripts"))
+from toggl_client import TogglClient  # noqa: E402
+from toggl_metadata import KINDS, MetadataCache  # noqa: E402
+
+
+def seed(state, count):
+    rng = random.Random(1)
+    now = state.now()
+    state.workspaces = [{"id": 9000000 + i, "name": f"Workspace {i}"} for i in range(count)]
+    state.metadata = {kind: [] for kind in KINDS}
+    for workspace in state.workspaces:
+        workspace_id = workspace["id"]
+        # Every workspace has a "Pomodoro" project, so lookups have to pick one
+        for i, name in enumerate(["Pomodoro"] + [f"Project {n}" for n in range(rng.randrange(5, 40))]):
+            state.metadata["projects"].append({"id": workspace_id * 100 + i, "name": name,
+                                               "workspace_id": workspace_id, "at": now})
+        for i in range(rng.randrange(0, 10)):
+            state.metadata["tags"].append({"id": workspace_id * 100 + i, "name": f"tag {i}",
+                                           "workspace_id": workspace_id, "at": now})
+            state.metadata["clients"].append({"id": workspace_id * 100 + i, "name": f"Client {i}",
+                                              "workspace_id": workspace_id, "wid": workspace_id, "at": now})
+        state.workspace_latency[workspace_id] = rng.uniform(0.02, 0.15)
+    state.failing_workspaces = {state.workspaces[-1]["id"]}
+
+
+def run(client, workdir, name, workers):
+    cache = MetadataCache(os.path.join(workdir, f"{name}.sqlite3"), client)
+    report = cache.refresh_workspaces(workers=workers)
+    projects = len(cache.all("projects"))
+    cache.close()
+    return report, projects
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    logging.basicConfig(level=logging.CRITICAL)
+    server = start_fake_toggl()
+    server.state.latency = 0.01
+    seed(server.state, count)
+    client = TogglClient("benchmark", api_url=server.api_url, rate_limit=None)
+    slowest = max(server.state.workspace_latency.values()) + server.state.latency
+
+    with tempfile.TemporaryDirectory() as workdir:
+        sequential, projects = run(client, workdir, "sequential", 1)
+        print(f"sequential: {sequential['seconds']:.2f} s for {count} workspaces x {len(KINDS)} kinds")
+        concurrent, concurrent_projects = run(client, workdir, "concurrent", workers)
+        print(f"concurrent, {workers} workers: {concurrent['seconds']:.2f} s "
+              f"({sequential['seconds'] / concurrent['seconds']:.1f}x)")
+        # With more requests than workers the pool, not the slowest workspace, sets the floor
+        print(f"floor: {max(slowest, sequential['seconds'] / workers):.2f} s (slowest request {slowest:.2f} s, "
+              f"sequential / workers {sequential['seconds'] / workers:.2f} s)")
+        assert projects == concurrent_projects
+        failed = {workspace_id: result["failed"] for workspace_id, result in concurrent["workspaces"].items()
+                  if result["failed"]}
+        print(f"merged index: {concurrent_projects} projects; failed: {failed}")
+        assert list(failed) == list(server.state.failing_workspaces)
+
+        # Incremental: nothing changed, so every request is a cheap since/ETag round trip
+        cache = MetadataCache(os.path.join(workdir, "concurrent.sqlite3"), client)
+        started = time.perf_counter()
+        cache.refresh_workspaces(workers=workers)
+        print(f"incremental refresh: {time.perf_counter() - started:.2f} s")
+        client.workspace_id = server.state.workspaces[0]["id"]
+        print(f"'pomodoro' resolves to workspace {cache.lookup('projects', 'pomodoro')['workspace_id']} "
+              f"(default {client.workspace_id}), in workspace {server.state.workspaces[1]['id']}: "
+              f"{cache.lookup('projects', 'pomodoro', server.state.workspaces[1]['id'])['id']}")
+        cache.close()
+    server.shutdown()
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
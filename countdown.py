@@ -0,0 +1,107 @@
+import math
+import time
+
+import metrics
+
+ICONIFIED_TICK = 15  # seconds between redraws while the window is minimized
+
+
+def format_remaining(seconds):
+    mins, secs = divmod(seconds, 60)
+    return f"{int(mins):02d}:{int(secs):02d}"
+
+
+class Countdown:
+    # Countdown driven by a monotonic deadline instead of a decremented
+    # counter, so late callbacks and main-loop stalls don't accumulate as
+    # drift. Each tick is scheduled to land just after the next whole-second
+    # boundary and on_display only fires when the shown MM:SS changes.
+    #
+    # schedule(delay_ms, callback) -> handle and cancel(handle) are
+    # root.after / root.after_cancel in the GUI; the clock and scheduler are
+    # injectable so the countdown can run against a simulated clock.
+    def __init__(self, schedule, cancel, on_display, on_expire, clock=time.monotonic, is_iconified=None):
+        self.schedule = schedule
+        self.cancel_scheduled = cancel
+        self.on_display = on_display
+        self.on_expire = on_expire
+        self.clock = clock
+        self.is_iconified = is_iconified or (lambda: False)
+        self.deadline = None
+        self.after_id = None
+        self.due = None  # When the pending tick should run, for the lateness histogram
+        self.displayed = None
+        self.wakeups = 0
+
+    @property
+    def running(self):
+        return self.deadline is not None
+
+    def remaining(self):
+        if self.deadline is None:
+            return 0
+        return max(0.0, self.deadline - self.clock())
+
+    def start(self, duration):
+        self.cancel()
+        self.deadline = self.clock() + duration
+        self._tick()
+
+    def start_until(self, deadline):
+        # Resume against an existing deadline on this clock
+        self.cancel()
+        self.deadline = deadline
+        self._tick()
+
+    def extend(self, seconds):
+        if self.deadline is None:
+            return
+        self.deadline += seconds
+        self.refresh()
+
+    def refresh(self):
+        # Redraw now (e.g. after an extension or when the window is restored)
+        if self.deadline is None:
+            return
+        self._cancel_after()
+        self._tick()
+
+    def cancel(self):
+        self._cancel_after()
+        self.deadline = None
+        self.displayed = None
+
+    def _cancel_after(self):
+        if self.after_id is not None:
+            self.cancel_scheduled(self.after_id)
+            self.after_id = None
+            self.due = None
+
+    def _show(self, text):
+        if text != self.displayed:
+            self.displayed = text
+            self.on_display(text)
+
+    def _tick(self):
+        self.after_id = None
+        self.wakeups += 1
+        now = self.clock()
+        if self.due is not None:
+            metrics.observe("pomodoro_tick_lateness_seconds", max(0.0, now - self.due))
+            self.due = None
+        remaining = self.deadline - now
+        if remaining <= 0:
+            self._show(format_remaining(0))
+            self.deadline = None
+            self.on_expire()
+            return
+        self._show(format_remaining(math.ceil(remaining)))
+        # Time until the displayed second changes, plus a millisecond so we
+        # land just after the boundary rather than just before it
+        delay = remaining - math.floor(remaining) or 1.0
+        if self.is_iconified():
+            delay += ICONIFIED_TICK - 1
+        delay = min(delay, remaining)
+        delay_ms = int(math.ceil(delay * 1000)) + 1
+        self.due = now + delay_ms / 1000
+        self.after_id = self.schedule(delay_ms, self._tick)
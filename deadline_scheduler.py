@@ -0,0 +1,86 @@
+import heapq
+import itertools
+import logging
+import math
+import time
+
+
+class DeadlineScheduler:
+    # One heap of deadlines shared by everything a process needs to time:
+    # countdown ticks and ends, reminder dings, escalation and auto-quit, for
+    # one session or hundreds. Arming is O(log n), cancelling is O(1) (the
+    # entry is marked and skipped when it surfaces), and the host loop only
+    # ever holds a single wakeup, for the nearest live deadline.
+    #
+    # Offers Tk's after/after_cancel, so it drops in wherever a Tk root or
+    # pomodoro_daemon.AsyncioScheduler was used; `host` is one of those.
+    def __init__(self, host, clock=time.monotonic):
+        self.host = host
+        self.clock = clock
+        self.heap = []  # [deadline, sequence, callback]; callback None once cancelled
+        self.sequence = itertools.count()
+        self.cancelled = 0
+        self.host_id = None
+        self.host_deadline = None
+        self.wakeups = 0
+
+    def __len__(self):
+        return len(self.heap) - self.cancelled
+
+    def after(self, delay_ms, callback):
+        return self.call_at(self.clock() + delay_ms / 1000, callback)
+
+    def call_at(self, deadline, callback):
+        entry = [deadline, next(self.sequence), callback]
+        heapq.heappush(self.heap, entry)
+        if self.host_deadline is None or deadline < self.host_deadline:
+            self._arm_host()
+        return entry
+
+    def after_cancel(self, entry):
+        if entry is None or entry[2] is None:
+            return
+        entry[2] = None
+        self.cancelled += 1
+        if self.cancelled > 64 and self.cancelled > len(self.heap) // 2:
+            # Mostly tombstones: rebuild so the heap doesn't grow without bound
+            self.heap = [live for live in self.heap if live[2] is not None]
+            heapq.heapify(self.heap)
+            self.cancelled = 0
+
+    def _arm_host(self):
+        self._drop_cancelled_head()
+        if self.host_id is not None:
+            self.host.after_cancel(self.host_id)
+            self.host_id = None
+            self.host_deadline = None
+        if not self.heap:
+            return
+        deadline = self.heap[0][0]
+        delay_ms = max(0, int(math.ceil((deadline - self.clock()) * 1000)))
+        self.host_deadline = deadline
+        self.host_id = self.host.after(delay_ms, self._fire)
+
+    def _drop_cancelled_head(self):
+        while self.heap and self.heap[0][2] is None:
+            heapq.heappop(self.heap)
+            self.cancelled -= 1
+
+    def _fire(self):
+        self.host_id = None
+        self.host_deadline = None
+        self.wakeups += 1
+        now = self.clock()
+        while self.heap and self.heap[0][0] <= now:
+            entry = heapq.heappop(self.heap)
+            callback = entry[2]
+            if callback is None:
+                self.cancelled -= 1
+                continue
+            entry[2] = None  # Fired; a late after_cancel is a no-op
+            try:
+                callback()
+            except Exception as e:
+                logging.exception(f"Error in scheduled callback: {e}")
+        if self.host_id is None:
+            self._arm_host()
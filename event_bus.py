@@ -0,0 +1,276 @@
+import asyncio
+import importlib
+import importlib.util
+import inspect
+import json
+import logging
+import os
+import shlex
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+# What PomodoroTimer publishes; a plugin subscribes to any subset
+EVENT_TYPES = ("work_started", "work_ended", "extended", "break_started", "reminder_fired", "idle_quit")
+
+QUEUE_SIZE = 64  # events waiting per plugin; beyond this new events are dropped for that plugin
+PLUGIN_TIMEOUT = 5.0  # seconds a hook may take before it's abandoned
+LATENCY_SAMPLES = 1000  # most recent latencies kept per hook for percentiles
+MAX_STUCK_CALLS = 4  # calls a plain-function hook may have hung past their timeout before events are dropped
+
+
+class Event:
+    # One session transition. Plugins get the Event; external commands get
+    # to_dict() as JSON on stdin, and the basics as POMODORO_* variables.
+    def __init__(self, kind, session, description="", in_break=False, at=None, **details):
+        if kind not in EVENT_TYPES:
+            raise ValueError(f"Unknown event type {kind!r}")
+        self.kind = kind
+        self.session = session
+        self.description = description
+        self.in_break = in_break
+        self.at = at if at is not None else time.time()
+        self.details = details  # seconds, minutes, reason, ding... depending on the kind
+
+    def to_dict(self):
+        return dict(self.details, event=self.kind, session=self.session, description=self.description,
+                    in_break=self.in_break, at=self.at)
+
+    def __repr__(self):
+        return f"Event({self.kind!r}, session={self.session!r}, {self.details})"
+
+
+class CommandHook:
+    # Runs an external command per event, e.g. a DND toggle or a status
+    # script. A command still running at the timeout is killed.
+    def __init__(self, command):
+        self.argv = shlex.split(command)
+        self.command = command
+
+    async def __call__(self, event):
+        env = dict(os.environ, POMODORO_EVENT=event.kind, POMODORO_SESSION=event.session,
+                   POMODORO_DESCRIPTION=event.description)
+        process = await asyncio.create_subprocess_exec(*self.argv, stdin=asyncio.subprocess.PIPE,
+                                                       stdout=asyncio.subprocess.DEVNULL,
+                                                       stderr=asyncio.subprocess.PIPE, env=env)
+        try:
+            _, stderr = await process.communicate(json.dumps(event.to_dict()).encode())
+        except asyncio.CancelledError:
+            process.kill()
+            await process.wait()
+            raise
+        if process.returncode != 0:
+            raise RuntimeError(f"exited with {process.returncode}: {stderr.decode(errors='replace').strip()[-200:]}")
+
+
+class Plugin:
+    # A registered hook with its own bounded queue, worker task and stats,
+    # so one slow or failing hook never holds up another
+    def __init__(self, name, handler, events, timeout):
+        self.name = name
+        self.handler = handler
+        self.events = set(events) if events else set(EVENT_TYPES)
+        self.timeout = timeout
+        self.is_async = inspect.iscoroutinefunction(handler) or inspect.iscoroutinefunction(
+            getattr(handler, "__call__", None))
+        # A plain function gets a thread of its own, so a hung one only ever holds up itself
+        self.executor = None if self.is_async else ThreadPoolExecutor(max_workers=1,
+                                                                      thread_name_prefix=f"plugin-{name}"[:32])
+        self.queue = None  # Created on the bus loop
+        self.early = []  # Events published before the queue existed, handed over once it does
+        self.unfinished = 0  # Executor calls submitted and not yet returned, timed out ones included
+        self.task = None
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.outcomes = {"ok": 0, "error": 0, "timeout": 0, "dropped": 0}
+
+
+class EventBus:
+    # Delivers timer events to plugins without ever blocking the publisher:
+    # publish() hands the event to the bus's asyncio loop and returns. There
+    # each plugin has a bounded queue (full means the event is dropped for
+    # that plugin, and counted) drained by its own task, which runs the
+    # hook under a timeout. Async hooks and commands run on the loop; plain
+    # functions on a thread per plugin, and while MAX_STUCK_CALLS of those
+    # are still running past their timeout, further events are dropped.
+    # Events published before a plugin's queue exists are buffered. By
+    # default the bus runs its own loop on a daemon thread; the daemon
+    # passes its loop instead.
+    def __init__(self, loop=None, queue_size=QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.plugins = []
+        self.lock = threading.Lock()  # Guards plugin stats, read from other threads
+        self.thread = None
+        if loop is None:
+            loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=loop.run_forever, name="event-bus", daemon=True)
+            self.thread.start()
+        self.loop = loop
+
+    def register(self, name, handler, events=None, timeout=PLUGIN_TIMEOUT):
+        # handler(event), a function or coroutine function; events limits which kinds it gets
+        unknown = set(events or ()) - set(EVENT_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown event types {sorted(unknown)}")
+        plugin = Plugin(name, handler, events, timeout)
+        self.plugins.append(plugin)
+        self.loop.call_soon_threadsafe(self._start, plugin)
+        logging.info(f"Registered plugin {name} for {', '.join(sorted(plugin.events))}")
+        return plugin
+
+    def add_command(self, command, events=None, timeout=PLUGIN_TIMEOUT):
+        return self.register(command, CommandHook(command), events, timeout)
+
+    def _start(self, plugin):
+        plugin.queue = asyncio.Queue(maxsize=self.queue_size)
+        for event in plugin.early:
+            plugin.queue.put_nowait(event)
+        plugin.early = []
+        plugin.task = self.loop.create_task(self._drain(plugin))
+
+    def publish(self, event):
+        # Safe from any thread; costs one call_soon_threadsafe
+        self.loop.call_soon_threadsafe(self._fan_out, event)
+
+    def _fan_out(self, event):
+        for plugin in self.plugins:
+            if event.kind not in plugin.events:
+                continue
+            try:
+                if plugin.queue is not None:
+                    plugin.queue.put_nowait(event)
+                elif len(plugin.early) < self.queue_size:
+                    plugin.early.append(event)
+                else:
+                    raise asyncio.QueueFull
+            except asyncio.QueueFull:
+                logging.warning(f"Plugin {plugin.name} is {self.queue_size} events behind, dropping {event.kind}")
+                self._count(plugin, "dropped")
+
+    async def _drain(self, plugin):
+        while True:
+            event = await plugin.queue.get()
+            if event is None:
+                return
+            if not plugin.is_async and plugin.unfinished >= MAX_STUCK_CALLS:
+                # Its thread is still stuck in earlier calls; queueing more behind them would only grow
+                logging.warning(f"Plugin {plugin.name} has {plugin.unfinished} calls still running, "
+                                f"dropping {event.kind}")
+                self._count(plugin, "dropped")
+                continue
+            started = time.perf_counter()
+            try:
+                if plugin.is_async:
+                    call = plugin.handler(event)
+                else:
+                    # Counted off when the thread returns, not when wait_for gives up on it
+                    future = plugin.executor.submit(plugin.handler, event)
+                    plugin.unfinished += 1
+                    future.add_done_callback(lambda _, plugin=plugin: self._finished(plugin))
+                    call = asyncio.wrap_future(future, loop=self.loop)
+                await asyncio.wait_for(call, plugin.timeout)
+                outcome = "ok"
+            except asyncio.TimeoutError:
+                # A plain function can't be stopped; its thread finishes whenever it does
+                logging.warning(f"Plugin {plugin.name} timed out on {event.kind} after {plugin.timeout} s")
+                outcome = "timeout"
+            except Exception as e:
+                logging.error(f"Plugin {plugin.name} failed on {event.kind}: {e}")
+                outcome = "error"
+            seconds = time.perf_counter() - started
+            with self.lock:
+                plugin.latencies.append(seconds)
+            self._count(plugin, outcome)
+            metrics.observe("pomodoro_plugin_seconds", seconds, (("plugin", plugin.name),))
+
+    def _finished(self, plugin):
+        # Called on the plugin's thread; the count belongs to the loop
+        try:
+            self.loop.call_soon_threadsafe(self._decrement, plugin)
+        except RuntimeError:  # The loop is already closed
+            pass
+
+    def _decrement(self, plugin):
+        plugin.unfinished -= 1
+
+    def _count(self, plugin, outcome):
+        with self.lock:
+            plugin.outcomes[outcome] += 1
+        metrics.inc("pomodoro_plugin_events_total", labels=(("plugin", plugin.name), ("outcome", outcome)))
+
+    def stats(self):
+        # Per hook: outcome counts, events waiting, and latency over the last LATENCY_SAMPLES runs
+        report = {}
+        with self.lock:
+            for plugin in self.plugins:
+                latencies = sorted(plugin.latencies)
+                entry = dict(plugin.outcomes, queued=plugin.queue.qsize() if plugin.queue is not None else 0)
+                if latencies:
+                    entry.update(median_ms=round(latencies[len(latencies) // 2] * 1000, 3),
+                                 p95_ms=round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 3),
+                                 max_ms=round(latencies[-1] * 1000, 3))
+                report[plugin.name] = entry
+        return report
+
+    def close(self, timeout=2.0):
+        # Lets queued events run for up to `timeout` seconds, then stops
+        async def finish():
+            for plugin in self.plugins:
+                if plugin.queue is None:
+                    continue
+                if plugin.queue.full():
+                    plugin.task.cancel()
+                else:
+                    plugin.queue.put_nowait(None)
+            tasks = [plugin.task for plugin in self.plugins if plugin.task is not None]
+            if tasks:
+                _, pending = await asyncio.wait(tasks, timeout=timeout)
+                for task in pending:
+                    task.cancel()
+
+        if self.thread is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(finish(), self.loop).result(timeout + 1)
+            except Exception as e:
+                logging.error(f"Error closing event bus: {e}")
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=1)
+        else:
+            # Someone else's loop, likely shutting down: just stop the workers
+            for plugin in self.plugins:
+                if plugin.task is not None:
+                    plugin.task.cancel()
+        for plugin in self.plugins:
+            if plugin.executor is not None:
+                plugin.executor.shutdown(wait=False)
+        logging.info(f"Plugin stats: {self.stats()}")
+
+
+def load_plugin(bus, spec):
+    # A module name or .py path whose register(bus) adds its hooks
+    if spec.endswith(".py"):
+        module_spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(spec))[0], spec)
+        module = importlib.util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(spec)
+    module.register(bus)
+
+
+def from_args(hooks=(), plugins=(), loop=None):
+    # Builds a bus from --hook [EVENT[,EVENT...]=]COMMAND and --plugin MODULE
+    # options, or returns None when there is nothing to run
+    if not hooks and not plugins:
+        return None
+    bus = EventBus(loop)
+    for hook in hooks:
+        events, separator, command = hook.partition("=")
+        if separator and events and all(kind.strip() in EVENT_TYPES for kind in events.split(",")):
+            bus.add_command(command, [kind.strip() for kind in events.split(",")])
+        else:
+            bus.add_command(hook)
+    for plugin in plugins:
+        load_plugin(bus, plugin)
+    return bus
@@ -0,0 +1,45 @@
+import argparse
+import json
+import time
+import warnings
+
+import numpy
+
+from focus_analytics import FocusAnalytics
+from session_ledger import LEDGER_PATH
+
+# What the ledger says about when and how you focus, e.g.
+#   python focus-report.py --days 90
+
+DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+parser = argparse.ArgumentParser(description="Focus heatmap, rates and recommended durations from the session ledger.")
+parser.add_argument('--ledger', default=LEDGER_PATH)
+parser.add_argument('--session', help='Only this session (default: all)')
+parser.add_argument('--days', type=int, help='Only the last DAYS days of history')
+args = parser.parse_args()
+
+started = time.perf_counter()
+analytics = FocusAnalytics.load(args.ledger, session=args.session,
+                                since=time.time() - args.days * 86400 if args.days else None)
+heatmap = analytics.focus_heatmap()
+completion = analytics.completion_ratio()
+extensions = analytics.extension_rate()
+responses = analytics.response_times()
+recommendation = analytics.recommend()
+elapsed = time.perf_counter() - started
+
+print(f"{len(analytics)} events analysed in {elapsed * 1000:.0f} ms\n")
+print("Average focused minutes per week, by hour:")
+print("     " + "".join(f"{hour:>4}" for hour in range(24)))
+for day, row in zip(DAYS, heatmap):
+    print(f"{day:<5}" + "".join(f"{minutes:>4.0f}" if minutes >= 0.5 else "   ." for minutes in row))
+print()
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", RuntimeWarning)  # Days with no sessions at all average to NaN
+    for name, table in (("Completion ratio", completion), ("Extensions per work period", extensions)):
+        by_day = numpy.nanmean(table, axis=1)
+        print(f"{name}:", json.dumps({day: round(float(value), 2)
+                                      for day, value in zip(DAYS, by_day) if not numpy.isnan(value)}))
+print("Reminder response times:", json.dumps(responses))
+print("Recommended now:", json.dumps(recommendation))
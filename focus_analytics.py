@@ -0,0 +1,185 @@
+import itertools
+import logging
+import sqlite3
+import threading
+import time
+
+from pomodoro_timer import DEFAULT_BREAK_TIME, DEFAULT_DELAY_TIME, DEFAULT_WORK_TIME
+from session_ledger import LEDGER_PATH
+
+# Ledger event kinds, in the order of the codes they get in the arrays
+KINDS = ("start_work", "work_timer_end", "work_stopped", "start_break", "break_timer_end", "break_stopped",
+         "extend_work", "extend_break", "idle_quit")
+(START_WORK, WORK_END, WORK_STOPPED, START_BREAK, BREAK_END, BREAK_STOPPED, EXTEND_WORK, EXTEND_BREAK,
+ IDLE_QUIT) = range(len(KINDS))
+
+SLOTS = 7 * 24  # hour-of-week slots, Monday 00:00 first, in local time
+MIN_SAMPLES = 5  # periods needed in a slot before its own numbers are trusted
+WORK_RANGE = (10, 60)  # minutes a recommendation is clamped to
+BREAK_RANGE = (3, 30)
+EXTEND_RANGE = (1, 15)
+
+np = None  # NumPy is only imported once history is actually analysed
+
+
+class FocusAnalytics:
+    # Session history from the ledger as columnar arrays (time, kind code,
+    # seconds, dings, response seconds), one row per event, plus each
+    # event's hour-of-week slot. Everything below is whole-array work:
+    # bincount per slot for the heatmaps and rates, masks and medians for
+    # the recommendations.
+    def __init__(self, at, kind, seconds, dings, response):
+        global np
+        import numpy
+        np = numpy
+        self.at = np.asarray(at, dtype=np.float64)
+        self.kind = np.asarray(kind, dtype=np.int8)
+        self.seconds = np.asarray(seconds, dtype=np.float64)
+        self.dings = np.asarray(dings, dtype=np.int16)
+        self.response = np.asarray(response, dtype=np.float64)  # NaN where nothing was prompted
+        # Periods belong to the slot they started in, not the one they ended in
+        ends = np.isin(self.kind, (WORK_END, WORK_STOPPED, BREAK_END, BREAK_STOPPED))
+        self.slot = hour_of_week(np.where(ends, self.at - self.seconds, self.at))
+
+    @classmethod
+    def load(cls, path=LEDGER_PATH, session=None, since=None):
+        # Kinds are coded and NULLs replaced in SQL, so every row goes
+        # straight into one float array in a single pass
+        import numpy
+        codes = " ".join(f"WHEN '{kind}' THEN {code}" for code, kind in enumerate(KINDS))
+        where = ["1"]
+        params = []
+        if session is not None:
+            where.append("session = ?")
+            params.append(session)
+        if since is not None:
+            where.append("at >= ?")
+            params.append(since)
+        db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            # Events are appended as they happen, so id order is time order without a sort
+            rows = db.execute(f"SELECT at, CASE kind {codes} ELSE -1 END, seconds, dings, "
+                              f"IFNULL(response_seconds, -1) FROM events WHERE {' AND '.join(where)} ORDER BY id",
+                              params).fetchall()
+        finally:
+            db.close()
+        table = numpy.fromiter(itertools.chain.from_iterable(rows), dtype=numpy.float64,
+                               count=len(rows) * 5).reshape(-1, 5)
+        table = table[table[:, 1] >= 0]
+        table[table[:, 4] < 0, 4] = numpy.nan
+        return cls(*table.T)
+
+    def __len__(self):
+        return len(self.at)
+
+    def _per_slot(self, mask, weights=None):
+        return np.bincount(self.slot[mask], weights=None if weights is None else weights[mask], minlength=SLOTS)
+
+    def _weeks(self):
+        # How many times each slot came around over the history, to turn totals into averages
+        return max(1.0, (self.at[-1] - self.at[0]) / (7 * 86400)) if len(self) else 1.0
+
+    def focus_heatmap(self):
+        # 7 x 24 average minutes of work per week, Monday first
+        work = np.isin(self.kind, (WORK_END, WORK_STOPPED))
+        return (self._per_slot(work, self.seconds) / 60 / self._weeks()).reshape(7, 24)
+
+    def completion_ratio(self):
+        # 7 x 24 share of work periods that ran to the end rather than being cut short; NaN with no data
+        completed = self._per_slot(self.kind == WORK_END)
+        interrupted = self._per_slot(self.kind == WORK_STOPPED)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (completed / (completed + interrupted)).reshape(7, 24)
+
+    def extension_rate(self):
+        # 7 x 24 work extensions per work period started
+        starts = self._per_slot(self.kind == START_WORK)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (self._per_slot(self.kind == EXTEND_WORK) / starts).reshape(7, 24)
+
+    def response_times(self, percentiles=(50, 90, 99)):
+        # Seconds from the end-of-period prompt to the next action, and dings
+        # heard first: back to work after a break, and off to a break after work
+        report = {}
+        for name, kind in (("to_work", START_WORK), ("to_break", START_BREAK)):
+            mask = (self.kind == kind) & ~np.isnan(self.response)
+            values = self.response[mask]
+            report[name] = {
+                "count": int(mask.sum()),
+                "seconds": dict(zip((f"p{p}" for p in percentiles),
+                                    np.percentile(values, percentiles).round(1).tolist())) if len(values) else {},
+                "mean_dings": round(float(self.dings[mask].mean()), 2) if len(values) else None,
+            }
+        return report
+
+    def _samples_near(self, mask, slot):
+        # The masked events in this slot, widening to the same hour on any
+        # day, then to all history, until there are MIN_SAMPLES (else None)
+        hour = slot % 24
+        for scope in (self.slot == slot, self.slot % 24 == hour, None):
+            selected = mask if scope is None else mask & scope
+            if selected.sum() >= MIN_SAMPLES:
+                return selected
+        return None
+
+    def recommend(self, at=None):
+        # Durations in minutes for a session starting at `at` (default now):
+        # work is how long work periods here actually last (extensions
+        # included, interruptions cut short), break is how long breaks last
+        # plus how long it takes to come back, and extend is the usual extension
+        slot = int(hour_of_week(np.array([at if at is not None else time.time()]))[0])
+        recommendation = {"work_time": DEFAULT_WORK_TIME, "break_time": DEFAULT_BREAK_TIME,
+                          "extend_work_time": DEFAULT_DELAY_TIME, "extend_break_time": DEFAULT_DELAY_TIME,
+                          "slot": slot, "samples": 0}
+        work = self._samples_near(np.isin(self.kind, (WORK_END, WORK_STOPPED)), slot)
+        if work is not None:
+            recommendation["work_time"] = clamp(np.median(self.seconds[work]) / 60, WORK_RANGE)
+            recommendation["samples"] = int(work.sum())
+        breaks = self._samples_near(np.isin(self.kind, (BREAK_END, BREAK_STOPPED)), slot)
+        if breaks is not None:
+            returns = self._samples_near((self.kind == START_WORK) & ~np.isnan(self.response), slot)
+            back = np.median(self.response[returns]) if returns is not None else 0.0
+            recommendation["break_time"] = clamp((np.median(self.seconds[breaks]) + back) / 60, BREAK_RANGE)
+        for key, kind in (("extend_work_time", EXTEND_WORK), ("extend_break_time", EXTEND_BREAK)):
+            extensions = self._samples_near(self.kind == kind, slot)
+            if extensions is not None:
+                recommendation[key] = clamp(np.median(self.seconds[extensions]) / 60, EXTEND_RANGE)
+        return recommendation
+
+
+def hour_of_week(at):
+    # Local hour-of-week (0 = Monday 00:00) for an array of epoch seconds.
+    # The UTC offset is looked up once per distinct UTC hour rather than
+    # per event, which keeps DST right without a Python call per row.
+    hours = np.floor(at / 3600).astype(np.int64)
+    unique_hours, inverse = np.unique(hours, return_inverse=True)
+    offsets = np.fromiter((time.localtime(hour * 3600).tm_gmtoff for hour in unique_hours.tolist()),
+                          dtype=np.int64, count=len(unique_hours))
+    local = (hours * 3600 + offsets[inverse.reshape(-1)]) // 3600
+    # 1970-01-01 was a Thursday, day 3 counting from Monday
+    return (((local // 24 + 3) % 7) * 24 + local % 24).astype(np.int16)
+
+
+def clamp(minutes, bounds):
+    return int(min(max(round(float(minutes)), bounds[0]), bounds[1]))
+
+
+def recommend_in_background(path, callback, session=None):
+    # callback(recommendation) on a worker thread once history is analysed;
+    # nothing is called if there is no history or NumPy isn't installed
+    def run():
+        try:
+            started = time.perf_counter()
+            analytics = FocusAnalytics.load(path, session=session)
+            if not len(analytics):
+                return
+            recommendation = analytics.recommend()
+            logging.info(f"Recommended durations from {len(analytics)} ledger events in "
+                         f"{(time.perf_counter() - started) * 1000:.0f} ms: {recommendation}")
+            callback(recommendation)
+        except ImportError:
+            logging.info("NumPy is not installed; keeping the default durations")
+        except sqlite3.Error as e:
+            logging.warning(f"Could not read the session ledger for recommendations: {e}")
+
+    threading.Thread(target=run, name="focus-analytics", daemon=True).start()
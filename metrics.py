@@ -0,0 +1,164 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Hot-path timings for the timer, kept in fixed-bucket histograms. Off by
+# default: until enable() is called, observe() and inc() return after a
+# single global check, so call sites can stay in place unconditionally.
+
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)  # seconds
+SLOW_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800)  # seconds, for things a person has to do
+
+HISTOGRAMS = {
+    "pomodoro_tick_lateness_seconds": ("How late countdown ticks fire after their scheduled time", FAST_BUCKETS),
+    "pomodoro_audio_load_seconds": ("Time to load and decode a sound file", FAST_BUCKETS),
+    "pomodoro_toggl_request_seconds": ("Latency of each Toggl API attempt", FAST_BUCKETS),
+    "pomodoro_ui_render_seconds": ("Time to apply a UI state change", FAST_BUCKETS),
+    "pomodoro_reminder_ack_seconds": ("Time from the end-of-period prompt to the next action", SLOW_BUCKETS),
+    "pomodoro_plugin_seconds": ("Time each plugin hook took per event", FAST_BUCKETS),
+}
+COUNTERS = {
+    "pomodoro_toggl_responses_total": "Toggl API responses by method and status code",
+    "pomodoro_plugin_events_total": "Events per plugin hook by outcome (ok, error, timeout, dropped)",
+}
+
+FLUSH_INTERVAL = 15.0  # seconds between metrics file rewrites
+
+registry = None
+
+
+class Histogram:
+    # Updated in place by Registry.observe, under its lock
+    def __init__(self, buckets):
+        self.bounds = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+
+class Registry:
+    # Histograms and counters keyed by (name, labels), where labels is a
+    # tuple of (key, value) pairs. One lock; every update is a few list and
+    # float operations, so contention between the Tk and Toggl threads is nil.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    def observe(self, name, value, labels=()):
+        key = (name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(HISTOGRAMS[name][1])
+            histogram.counts[bisect.bisect_left(histogram.bounds, value)] += 1
+            histogram.sum += value
+            histogram.count += 1
+
+    def inc(self, name, amount=1, labels=()):
+        with self.lock:
+            self.counters[(name, labels)] = self.counters.get((name, labels), 0) + amount
+
+    def render(self):
+        # Prometheus text exposition format, version 0.0.4
+        lines = []
+        with self.lock:
+            for name, (help_text, _) in HISTOGRAMS.items():
+                series = [(labels, h) for (metric, labels), h in sorted(self.histograms.items()) if metric == name]
+                if not series:
+                    continue
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for labels, histogram in series:
+                    cumulative = 0
+                    for bound, count in zip(histogram.bounds + ("+Inf",), histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+            for name, help_text in COUNTERS.items():
+                series = [(labels, value) for (metric, labels), value in sorted(self.counters.items())
+                          if metric == name]
+                if not series:
+                    continue
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                lines += [f"{name}{_labels(labels)} {value}" for labels, value in series]
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+def enable():
+    global registry
+    if registry is None:
+        registry = Registry()
+    return registry
+
+
+def observe(name, value, labels=()):
+    if registry is not None:
+        registry.observe(name, value, labels)
+
+
+def inc(name, amount=1, labels=()):
+    if registry is not None:
+        registry.inc(name, amount, labels)
+
+
+def observe_toggl(method, status, seconds):
+    # Hook for toggl_http.TogglHTTP.observe; status is None when no response came back
+    observe("pomodoro_toggl_request_seconds", seconds, (("method", method),))
+    inc("pomodoro_toggl_responses_total", labels=(("method", method), ("status", str(status or "error"))))
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        payload = registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def serve(port, host="127.0.0.1"):
+    # Prometheus scrape endpoint at http://host:port/metrics, on a daemon thread
+    enable()
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logging.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+def write_file(path):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        f.write(registry.render())
+    os.replace(temp_path, path)
+
+
+def flush_periodically(path, interval=FLUSH_INTERVAL):
+    # For node_exporter's textfile collector, or just `cat`
+    enable()
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                write_file(path)
+            except OSError as e:
+                logging.error(f"Error writing metrics to {path}: {e}")
+
+    threading.Thread(target=run, name="metrics-file", daemon=True).start()
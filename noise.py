@@ -0,0 +1,75 @@
+import logging
+import time
+
+COLORS = ("white", "pink", "brown")
+LOOP_SECONDS = 8  # length of the synthesized loop; long enough that nobody hears it repeat
+LEVEL = 0.1  # RMS level as a fraction of full scale (about -20 dBFS)
+
+np = None  # NumPy is only needed once noise is actually generated
+
+
+class NoiseGenerator:
+    # Synthesizes white, pink or brown noise by spectral shaping: random
+    # phases and gaussian magnitudes across every FFT bin, scaled by 1/f^a
+    # (a = 0, 1/2, 1), then one inverse real FFT. The result is periodic by
+    # construction, so the block loops with no seam and the mixer can repeat
+    # it forever at zero CPU cost. Buffers, the inverse FFT's output
+    # included, are allocated once per mixer format and reused whenever
+    # another color is generated (NumPy before 2.0 has no irfft out=, so
+    # there the transform still allocates its result).
+    def __init__(self, sample_rate=44100, channels=2, loop_seconds=LOOP_SECONDS, seed=None):
+        global np
+        import numpy
+        np = numpy
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frames = int(sample_rate * loop_seconds)
+        self.rng = np.random.default_rng(seed)
+        bins = self.frames // 2 + 1
+        self.real = np.empty((channels, bins))
+        self.imag = np.empty((channels, bins))
+        self.spectrum = np.empty((channels, bins), dtype=np.complex128)
+        self.samples = np.empty((channels, self.frames))
+        self.pcm = np.empty((self.frames, channels), dtype=np.int16)  # interleaved, as the mixer wants it
+        frequencies = np.fft.rfftfreq(self.frames, 1 / sample_rate)
+        frequencies[0] = frequencies[1]  # DC is zeroed below; avoid dividing by zero
+        self.shapes = {color: frequencies ** -exponent
+                       for color, exponent in zip(COLORS, (0.0, 0.5, 1.0))}
+        for shape in self.shapes.values():
+            shape[0] = 0.0  # No DC offset
+        self.generate_seconds = 0.0
+
+    def generate(self, color):
+        # Fills and returns self.pcm (frames x channels int16) with one loop of noise
+        started = time.perf_counter()
+        self.rng.standard_normal(out=self.real)
+        self.rng.standard_normal(out=self.imag)
+        self.spectrum.real = self.real
+        self.spectrum.imag = self.imag
+        self.spectrum *= self.shapes[color]
+        samples = self.samples
+        try:
+            np.fft.irfft(self.spectrum, n=self.frames, axis=1, out=samples)
+        except TypeError:  # NumPy < 2.0
+            samples[:] = np.fft.irfft(self.spectrum, n=self.frames, axis=1)
+        samples *= LEVEL * 32767 / np.sqrt(np.vdot(samples, samples) / samples.size)  # RMS without a squared copy
+        np.clip(samples, -32768, 32767, out=samples)
+        self.pcm[:] = samples.T  # Cast and interleave in one copy
+        self.generate_seconds = time.perf_counter() - started
+        logging.debug(f"Generated {self.frames / self.sample_rate:.0f} s of {color} noise "
+                      f"in {self.generate_seconds * 1000:.1f} ms")
+        return self.pcm
+
+    def make_sound(self, color):
+        # A pygame Sound holding one seamless loop; call once the mixer is up
+        import pygame
+        return pygame.mixer.Sound(buffer=self.generate(color))
+
+    @classmethod
+    def for_mixer(cls, **kwargs):
+        # Matches whatever format pygame.mixer.init() actually opened
+        import pygame
+        frequency, size, channels = pygame.mixer.get_init()
+        if size != -16:
+            raise ValueError(f"Unsupported mixer sample size {size}; expected signed 16-bit")
+        return cls(sample_rate=frequency, channels=channels, **kwargs)
@@ -0,0 +1,36 @@
+import json
+import os
+import time
+
+# Slack-style status, written to a local file instead of Slack: point a
+# status bar, a chat bridge or a teammate's dashboard at it. Load with
+#   python toggl-pomodoro.py --plugin plugins/status_file.py
+
+STATUS_PATH = "./pomodoro-status.json"
+
+
+def status_for(event):
+    # (text, emoji, expires in seconds or None) for the new state
+    if event.kind == "work_started":
+        return f"Focusing: {event.description}" if event.description else "Focusing", ":tomato:", \
+            event.details["minutes"] * 60
+    if event.kind == "break_started":
+        return "On a break", ":coffee:", event.details["minutes"] * 60
+    if event.kind == "work_ended":
+        return "Between pomodoros", ":hourglass:", None
+    return "", "", None  # idle_quit: clear it
+
+
+def write_status(event):
+    text, emoji, expires_in = status_for(event)
+    status = {"status_text": text, "status_emoji": emoji,
+              "status_expiration": int(time.time() + expires_in) if expires_in else 0,
+              "session": event.session, "updated": event.at}
+    temp_path = f"{STATUS_PATH}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(status, f)
+    os.replace(temp_path, STATUS_PATH)
+
+
+def register(bus):
+    bus.register("status_file", write_status, events=("work_started", "break_started", "work_ended", "idle_quit"))
@@ -0,0 +1,40 @@
+import argparse
+import json
+import socket
+
+from pomodoro_daemon import SOCKET_PATH
+
+# Command-line client for pomodoro_daemon.py, e.g.
+#   python pomodoro-ctl.py create desk-3 --description "Deep work" --work-time 25
+#   python pomodoro-ctl.py start_work desk-3
+#   python pomodoro-ctl.py attach desk-3      (prints events until interrupted)
+
+parser = argparse.ArgumentParser(description="Control sessions hosted by the Pomodoro daemon.")
+parser.add_argument('command', choices=['list', 'hooks', 'create', 'state', 'set', 'start_work', 'start_break',
+                                        'extend_work', 'extend_break', 'attach', 'remove'])
+parser.add_argument('session', nargs='?', default='default')
+parser.add_argument('--socket', default=SOCKET_PATH)
+parser.add_argument('--description', type=str)
+parser.add_argument('--work-time', type=int)
+parser.add_argument('--break-time', type=int)
+parser.add_argument('--minutes', type=int, help='Extension length for extend_work / extend_break')
+parser.add_argument('--api-key', type=str, help='Toggl API key for a new session (omit for no Toggl)')
+args = parser.parse_args()
+
+request = {"cmd": args.command, "session": args.session}
+for field, value in (("description", args.description), ("work_time", args.work_time),
+                     ("break_time", args.break_time), ("minutes", args.minutes), ("api_key", args.api_key)):
+    if value is not None:
+        request[field] = value
+
+with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+    sock.connect(args.socket)
+    sock.sendall((json.dumps(request) + "\n").encode())
+    lines = sock.makefile("rb")
+    try:
+        for line in lines:
+            print(json.dumps(json.loads(line)))
+            if args.command != "attach":
+                break
+    except KeyboardInterrupt:
+        pass
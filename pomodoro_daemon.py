@@ -0,0 +1,281 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sys
+
+import event_bus
+import metrics
+from deadline_scheduler import DeadlineScheduler
+from pomodoro_timer import PomodoroTimer
+from session_ledger import LEDGER_PATH, SessionLedger
+
+SOCKET_PATH = "./pomodoro.sock"
+MAX_CLIENT_BUFFER = 256 * 1024  # Drop subscribers that stop reading rather than buffer for them
+
+# Fields a client may set on a session before starting it
+SESSION_FIELDS = ("description", "work_time", "break_time", "extend_work_time", "extend_break_time")
+
+
+class AsyncioScheduler:
+    # Tk's after/after_cancel on top of an asyncio loop
+    def __init__(self, loop):
+        self.loop = loop
+
+    def after(self, delay_ms, callback):
+        return self.loop.call_later(delay_ms / 1000, callback)
+
+    def after_cancel(self, handle):
+        handle.cancel()
+
+
+class HeadlessView:
+    # Stands in for PomodoroGUI: everything the timer would show is
+    # published as an event to the clients attached to this session.
+    def __init__(self, daemon, name):
+        self.daemon = daemon
+        self.name = name
+        self.prompt = None
+
+    def publish(self, event, **fields):
+        self.daemon.publish(self.name, dict(fields, event=event))
+
+    def update_ui_state(self):
+        self.publish("state", **self.daemon.snapshot(self.name))
+
+    def display_time(self, text):
+        self.publish("tick", text=text)
+
+    def is_iconified(self):
+        # Nobody watching: tick as rarely as a minimized window would
+        return not self.daemon.subscribers.get(self.name)
+
+    def restore_window(self):
+        self.publish("restore_window")
+
+    def maximize_window(self):
+        self.publish("maximize_window")
+
+    def prompt_action(self, message, submessage):
+        self.prompt = f"{message}\n{submessage}"
+        self.publish("prompt", message=message, submessage=submessage)
+
+    def hide_prompt(self):
+        self.prompt = None
+        self.publish("hide_prompt")
+
+    def show_totals(self, totals):
+        self.publish("totals", **totals)
+
+    def quit(self):
+        self.publish("quit")
+        self.daemon.remove_session(self.name)
+
+
+class EventAudio:
+    # Headless sessions have no mixer; attached clients play the cues
+    def __init__(self, view):
+        self.view = view
+
+    def play_sound(self, sound_path):
+        self.view.publish("sound", action="play", path=sound_path)
+
+    def play_noise(self, noise):
+        self.view.publish("sound", action="noise", path=noise)
+
+    def stop_noise(self):
+        self.view.publish("sound", action="stop_noise")
+
+
+class PomodoroDaemon:
+    # Hosts any number of independent PomodoroTimer sessions on one asyncio
+    # loop. Clients speak newline-delimited JSON over a Unix socket: each
+    # request is {"cmd": ..., "session": ..., ...} and gets one reply line;
+    # attached clients also receive the session's events.
+    def __init__(self, loop, ledger_path=LEDGER_PATH, events=None):
+        self.loop = loop
+        self.events = events  # One event bus for every session's plugins and hooks, on this loop
+        # Every session's deadlines live in one heap: the loop holds a single
+        # timer handle, for the nearest deadline across all sessions
+        self.scheduler = DeadlineScheduler(AsyncioScheduler(loop))
+        self.sessions = {}
+        self.subscribers = {}  # session name -> set of StreamWriters
+        self.dispatchers = {}  # Toggl API key -> TogglDispatcher shared by that user's sessions
+        self.ledger = SessionLedger(ledger_path)  # Shared; events and daily totals are keyed by session name
+
+    def create_session(self, name, api_key=None, **fields):
+        if name in self.sessions:
+            raise ValueError(f"Session {name!r} already exists")
+        view = HeadlessView(self, name)
+        timer = PomodoroTimer(view, scheduler=self.scheduler, audio=EventAudio(view),
+                              toggl=self._dispatcher(api_key) if api_key else None,
+                              ledger=self.ledger, session_name=name, events=self.events)
+        self._apply_fields(timer, fields)
+        self.sessions[name] = timer
+        logging.info(f"Created session {name}")
+        return timer
+
+    def remove_session(self, name):
+        timer = self.sessions.pop(name, None)
+        self.subscribers.pop(name, None)
+        if timer is not None:
+            timer.stop()
+            logging.info(f"Removed session {name}")
+
+    def _dispatcher(self, api_key):
+        dispatcher = self.dispatchers.get(api_key)
+        if dispatcher is None:
+            sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "toggl-scripts"))
+            from toggl_client import TogglClient
+            from toggl_dispatcher import TogglDispatcher
+            from toggl_journal import TogglJournal
+            # One journal per Toggl user, since each has its own running entry
+            key_hash = hashlib.sha256(api_key.encode()).hexdigest()[:12]
+            client = TogglClient(api_key)
+            client.http.observe = metrics.observe_toggl
+            dispatcher = TogglDispatcher(client, TogglJournal(f"./toggl-journal-{key_hash}.jsonl"),
+                                         post=self.loop.call_soon_threadsafe)
+            self.dispatchers[api_key] = dispatcher
+        return dispatcher
+
+    def _apply_fields(self, timer, fields):
+        for field in SESSION_FIELDS:
+            if field in fields:
+                setattr(timer, field, fields[field])
+
+    def snapshot(self, name):
+        timer = self.sessions[name]
+        state = {field: getattr(timer, field) for field in SESSION_FIELDS}
+        state.update(session=name, is_running=timer.is_running, in_break=timer.in_break,
+                     remaining=timer.remaining_time, prompt=timer.gui.prompt,
+                     focused_minutes=self.ledger.focused_minutes_today(name))
+        return state
+
+    def publish(self, name, event):
+        writers = self.subscribers.get(name)
+        if not writers:
+            return
+        line = (json.dumps(dict(event, session=name)) + "\n").encode()
+        for writer in list(writers):
+            if writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                logging.warning(f"Dropping slow subscriber from session {name}")
+                writers.discard(writer)
+                writer.close()
+                continue
+            writer.write(line)
+
+    def handle_command(self, request, writer):
+        command = request.get("cmd")
+        name = request.get("session")
+        if command == "list":
+            return {"sessions": sorted(self.sessions)}
+        if command == "hooks":
+            return {"hooks": self.events.stats() if self.events is not None else {}}
+        if command == "create":
+            if not isinstance(name, str) or not name:
+                raise ValueError(f"Session name must be a non-empty string, got {name!r}")
+            fields = {key: value for key, value in request.items() if key in SESSION_FIELDS}
+            self.create_session(name, api_key=request.get("api_key"), **fields)
+            return self.snapshot(name)
+        if name not in self.sessions:
+            raise KeyError(f"No session {name!r}")
+        timer = self.sessions[name]
+        if command == "attach":
+            self.subscribers.setdefault(name, set()).add(writer)
+            # Unwatched sessions tick as if minimized (every ICONIFIED_TICK
+            # seconds), so the last published time may be stale; redrawing
+            # now brings the new client up to date and reschedules the next
+            # tick at the watched rate
+            timer.refresh_display()
+            return self.snapshot(name)
+        if command == "detach":
+            self.subscribers.get(name, set()).discard(writer)
+        elif command == "set":
+            self._apply_fields(timer, request)
+        elif command == "start_work":
+            self._apply_fields(timer, request)
+            timer.start_work()
+        elif command == "start_break":
+            self._apply_fields(timer, request)
+            timer.start_break()
+        elif command == "extend_work":
+            timer.extend_work(request.get("minutes"))
+        elif command == "extend_break":
+            timer.extend_break(request.get("minutes"))
+        elif command == "remove":
+            timer.gui.quit()
+            return {}
+        elif command != "state":
+            raise ValueError(f"Unknown command {command!r}")
+        return self.snapshot(name)
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = None
+                try:
+                    request = json.loads(line)
+                    reply = {"ok": True, **self.handle_command(request, writer)}
+                except Exception as e:
+                    reply = {"ok": False, "error": str(e)}
+                reply["reply"] = request.get("cmd") if isinstance(request, dict) else None
+                writer.write((json.dumps(reply) + "\n").encode())
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            for writers in self.subscribers.values():
+                writers.discard(writer)
+            writer.close()
+
+    def close(self):
+        for name in list(self.sessions):
+            self.remove_session(name)
+        for dispatcher in self.dispatchers.values():
+            dispatcher.close()
+            dispatcher.client.close()
+        if self.events is not None:
+            self.events.close()
+        self.ledger.close()
+
+
+async def serve(socket_path, hooks=(), plugins=()):
+    loop = asyncio.get_running_loop()
+    daemon = PomodoroDaemon(loop, events=event_bus.from_args(hooks, plugins, loop))
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = await asyncio.start_unix_server(daemon.handle_client, path=socket_path)
+    logging.info(f"Pomodoro daemon listening on {socket_path}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        daemon.close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Headless Pomodoro server hosting many sessions.")
+    parser.add_argument('--socket', default=SOCKET_PATH, help='Unix socket to listen on')
+    parser.add_argument('--metrics-port', type=int, help='Serve Prometheus metrics on localhost:PORT/metrics')
+    parser.add_argument('--metrics-file', help='Rewrite Prometheus metrics to this file every few seconds')
+    parser.add_argument('--hook', action='append', default=[], metavar='[EVENTS=]COMMAND',
+                        help='Run COMMAND on each transition, or only on the comma-separated EVENTS; repeatable')
+    parser.add_argument('--plugin', action='append', default=[], metavar='MODULE',
+                        help='Module or .py file whose register(bus) adds in-process hooks; repeatable')
+    args = parser.parse_args()
+    if args.metrics_port is not None:
+        metrics.serve(args.metrics_port)
+    if args.metrics_file:
+        metrics.flush_periodically(args.metrics_file)
+    try:
+        asyncio.run(serve(args.socket, args.hook, args.plugin))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,118 @@
+import json
+import logging
+import socket
+import threading
+import time
+
+from pomodoro_timer import DEFAULT_BREAK_TIME, DEFAULT_DELAY_TIME, DEFAULT_WORK_TIME
+
+SESSION_FIELDS = ("description", "work_time", "break_time", "extend_work_time", "extend_break_time")
+
+
+class RemoteTimer:
+    # Same surface PomodoroGUI uses on PomodoroTimer, backed by a session
+    # in pomodoro_daemon.py. Actions are sent over the Unix socket; the
+    # daemon's events come back on a reader thread and are handed to the Tk
+    # loop with root.after. Cues are played locally if audio is given.
+    def __init__(self, socket_path, session, root, audio=None):
+        self.gui = None
+        self.scheduler = root
+        self.audio = audio
+        self.toggl = None
+        self.ledger = None  # The daemon keeps the ledger; totals arrive as events
+        self.checkpoint = None  # Sessions outlive this window; the daemon holds their state
+        self.events = None  # The daemon publishes plugin events
+        self.session = session
+        self.description = ""
+        self.work_time = DEFAULT_WORK_TIME
+        self.break_time = DEFAULT_BREAK_TIME
+        self.extend_work_time = DEFAULT_DELAY_TIME
+        self.extend_break_time = DEFAULT_DELAY_TIME
+        self.is_running = False
+        self.in_break = False
+        self.remaining = 0
+        self.remaining_at = time.monotonic()
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self.reader = self.sock.makefile("rb")
+        self._send("create")  # Fails harmlessly if the session already exists
+        self._send("attach")
+        threading.Thread(target=self._read_events, name="pomodoro-remote", daemon=True).start()
+
+    def _send(self, command, **fields):
+        request = dict(fields, cmd=command, session=self.session)
+        self.sock.sendall((json.dumps(request) + "\n").encode())
+
+    def _fields(self):
+        return {field: getattr(self, field) for field in SESSION_FIELDS}
+
+    def _read_events(self):
+        for line in self.reader:
+            message = json.loads(line)
+            self.scheduler.after(0, lambda message=message: self._handle(message))
+        logging.warning("Lost connection to the Pomodoro daemon")
+
+    def _apply_state(self, state):
+        for field in SESSION_FIELDS + ("is_running", "in_break"):
+            if field in state:
+                setattr(self, field, state[field])
+        self.remaining = state.get("remaining", 0)
+        self.remaining_at = time.monotonic()
+
+    def _handle(self, message):
+        if "reply" in message:
+            if message.get("ok"):
+                self._apply_state(message)
+                if message["reply"] == "attach" and self.gui is not None:
+                    self.gui.update_ui_state()
+            elif message["reply"] != "create":
+                logging.error(f"Daemon rejected {message['reply']}: {message.get('error')}")
+            return
+        event = message.get("event")
+        if event == "state":
+            self._apply_state(message)
+            self.gui.update_ui_state()
+        elif event == "tick":
+            self.gui.display_time(message["text"])
+        elif event == "prompt":
+            self.gui.prompt_action(message["message"], message["submessage"])
+        elif event == "hide_prompt":
+            self.gui.hide_prompt()
+        elif event == "totals":
+            self.gui.show_totals(message)
+        elif event == "restore_window":
+            self.gui.restore_window()
+        elif event == "maximize_window":
+            self.gui.maximize_window()
+        elif event == "sound" and self.audio is not None:
+            if message["action"] == "play":
+                self.audio.play_sound(message["path"])
+            elif message["action"] == "noise":
+                self.audio.play_noise(message["path"])
+            else:
+                self.audio.stop_noise()
+        elif event == "quit":
+            self.gui.quit()
+
+    @property
+    def remaining_time(self):
+        if not self.is_running:
+            return 0
+        return max(0.0, self.remaining - (time.monotonic() - self.remaining_at))
+
+    def start_work(self):
+        self._send("start_work", **self._fields())
+
+    def start_break(self):
+        self._send("start_break", **self._fields())
+
+    def extend_work(self, minutes=None):
+        self._send("extend_work", minutes=minutes)
+
+    def extend_break(self, minutes=None):
+        self._send("extend_break", minutes=minutes)
+
+    def refresh_display(self):
+        # The daemon drives the countdown and sends a tick on every change
+        pass
@@ -0,0 +1,377 @@
+import logging
+import time
+from datetime import datetime, timezone
+
+import metrics
+from countdown import Countdown
+from event_bus import Event
+
+# Constants and Configurable Variables
+NOISE = "pink"  # "white", "pink" or "brown" (synthesized), or the path of a sound file to loop
+STOP_WORK_SOUND_PATH = "./noises/stop-work.mp3"
+START_WORK_SOUND_PATH = "./noises/start-work.mp3"
+
+DEFAULT_WORK_TIME = 18  # in minutes
+DEFAULT_BREAK_TIME = 8  # in minutes
+DEFAULT_DELAY_TIME = 5  # in minutes
+DING_QUIT_THRESHOLD = 5  # Number of dings after which it quits if no response
+
+# What to ask once a period runs out, keyed by whether it was a break
+END_PROMPTS = {
+    False: ("Time to start your break!", "CTRL + B - Start Break\nCTRL + E - Extend Work"),
+    True: ("Time to get back to work!", "CTRL + W - Start Work\nCTRL + E - Extend Break"),
+}
+
+
+class PomodoroTimer:
+    # Session logic only: the view (`gui`), the after/after_cancel scheduler,
+    # audio and Toggl dispatcher are all supplied from outside, so the same
+    # timer runs under Tk (toggl-pomodoro.py) or headless on an asyncio loop
+    # (pomodoro_daemon.py). A None audio or toggl just skips that side effect.
+    def __init__(self, gui, scheduler=None, audio=None, toggl=None, ledger=None, session_name="local",
+                 clock=time.monotonic, checkpoint=None, events=None):
+        # Variables
+        self.gui = gui
+        self.scheduler = scheduler  # Anything with Tk's after/after_cancel, normally a DeadlineScheduler
+        self.clock = clock  # Must be the clock the scheduler counts in
+        self.description = ""
+        self.work_time = DEFAULT_WORK_TIME
+        self.break_time = DEFAULT_BREAK_TIME
+        self.extend_work_time = DEFAULT_DELAY_TIME
+        self.extend_break_time = DEFAULT_DELAY_TIME
+        self.is_running = False
+        self.in_break = False
+        self.ding_count = 0  # Track number of dings
+        self.timer_callback = None
+        self.reminder_after_ids = []
+
+        # Deadline-based countdown; the view and scheduler are attached after
+        # construction, so reach them lazily
+        self.countdown = Countdown(
+            schedule=lambda delay_ms, callback: self.scheduler.after(delay_ms, callback),
+            cancel=lambda after_id: self.scheduler.after_cancel(after_id),
+            on_display=self._display_time,
+            on_expire=self._timer_expired,
+            clock=clock,
+            is_iconified=lambda: self.gui.is_iconified(),
+        )
+
+        # Sounds are decoded once and kept ready to play; swap these paths to
+        # pick different cues or noise
+        self.start_work_sound = START_WORK_SOUND_PATH
+        self.stop_work_sound = STOP_WORK_SOUND_PATH
+        self.noise = NOISE
+
+        self.audio = audio
+        self.toggl = toggl
+
+        # Transitions are recorded in the local ledger (session_ledger.py)
+        self.ledger = ledger
+        self.session_name = session_name
+        self.period_started_at = None  # monotonic start of the current work/break countdown
+        self.prompted_at = None  # monotonic time of the last "time to ..." prompt, until answered
+
+        # Saved on every transition and minute so a restart resumes the session (session_checkpoint.py)
+        self.checkpoint = checkpoint
+
+        # Transitions are published to plugins and hook commands (event_bus.py)
+        self.events = events
+
+    def start_work(self):
+        logging.info("Starting work session")
+        self._record_interrupted()
+        self._record("start_work")
+        self.cancel_timer()
+        self.stop_reminder()
+        self.is_running = True
+        self.in_break = False
+        self.ding_count = 0
+        self.play_pink_noise()
+        self.start_toggl_entry()
+        self.start_timer(self.work_time * 60, self.work_timer_end)
+        self._checkpoint()
+        self._publish("work_started", minutes=self.work_time)
+        self.gui.update_ui_state()
+
+    def work_timer_end(self, ended_at=None):
+        # ended_at: our clock time the period actually ran out, when that was
+        # earlier (a deadline that passed while we were down)
+        logging.info("Work timer ended")
+        self.is_running = False
+        seconds = self._period_seconds(ended_at)
+        self._record("work_timer_end", seconds=seconds, at=self._wall_time(ended_at))
+        self.prompted_at = self.clock()
+        self.stop_pink_noise()
+        self.play_sound(self.stop_work_sound)
+        self.stop_toggl_entry(at=self._wall_time(ended_at))
+        self._checkpoint()
+        self._publish("work_ended", seconds=seconds, reason="expired")
+        self.gui.restore_window()
+        self.start_reminder()
+        self.gui.prompt_action(*END_PROMPTS[False])
+
+    def start_break(self):
+        logging.info("Starting break session")
+        self._record_interrupted()
+        self._record("start_break")
+        self.cancel_timer()
+        self.stop_reminder()
+        self.is_running = True
+        self.in_break = True
+        self.ding_count = 0
+        self.stop_pink_noise()
+        self.start_timer(self.break_time * 60, self.break_timer_end)
+        self._checkpoint()
+        self._publish("break_started", minutes=self.break_time)
+        self.gui.update_ui_state()
+
+    def break_timer_end(self, ended_at=None):
+        logging.info("Break timer ended")
+        self.is_running = False
+        self._record("break_timer_end", seconds=self._period_seconds(ended_at), at=self._wall_time(ended_at))
+        self.prompted_at = self.clock()
+        self.play_sound(self.start_work_sound)
+        self.start_toggl_entry()
+        self._checkpoint()
+        self.gui.restore_window()
+        self.start_reminder()
+        self.gui.prompt_action(*END_PROMPTS[True])
+
+    def extend_work(self, minutes=None):
+        if self.is_running and not self.in_break:
+            extension = (minutes if minutes is not None else self.extend_work_time) * 60
+            logging.info(f"Extending work session by {extension // 60} minutes")
+            self._record("extend_work", seconds=extension)
+            self.stop_reminder()
+            self.countdown.extend(extension)
+            self._checkpoint()
+            self._publish("extended", seconds=extension)
+            self.gui.hide_prompt()
+            self.gui.update_ui_state()
+        else:
+            logging.warning("Cannot extend work session: either not running or in break")
+
+    def extend_break(self, minutes=None):
+        if self.is_running and self.in_break:
+            extension = (minutes if minutes is not None else self.extend_break_time) * 60
+            logging.info(f"Extending break session by {extension // 60} minutes")
+            self._record("extend_break", seconds=extension)
+            self.stop_reminder()
+            self.countdown.extend(extension)
+            self._checkpoint()
+            self._publish("extended", seconds=extension)
+            self.gui.hide_prompt()
+            self.gui.update_ui_state()
+        else:
+            logging.warning("Cannot extend break session: either not running or not in break")
+
+    def start_timer(self, duration, callback):
+        self.cancel_timer()  # Stop any existing timer
+        self.is_running = True
+        self.timer_callback = callback
+        self.period_started_at = self.clock()
+        self.countdown.start(duration)
+
+    @property
+    def remaining_time(self):
+        # Remaining time in seconds
+        return self.countdown.remaining()
+
+    def _timer_expired(self):
+        self.is_running = False
+        logging.info("Timer reached zero")
+        self.timer_callback()
+
+    def cancel_timer(self):
+        if self.countdown.running:
+            self.countdown.cancel()
+            logging.debug("Cancelled existing timer")
+
+    def start_reminder(self):
+        # Every ding up to the auto-quit is armed up front on the scheduler,
+        # so there's no chain of after() calls to re-arm or leak
+        self.cancel_reminder()
+        self.ding_count = 0
+        self.reminder_intervals = [30, 60, 60]  # Intervals between beeps in seconds
+        offset = 0
+        for ding in range(1, DING_QUIT_THRESHOLD + 1):
+            if ding <= len(self.reminder_intervals):
+                offset += self.reminder_intervals[ding - 1]
+            else:
+                offset += 60  # Continue reminders every 60 seconds
+            self.reminder_after_ids.append(
+                self.scheduler.after(offset * 1000, lambda ding=ding: self._reminder_action(ding)))
+        logging.debug(f"Scheduled {DING_QUIT_THRESHOLD} reminders over {offset} seconds")
+
+    def _reminder_action(self, ding):
+        self.ding_count = ding
+        logging.info(f"Reminder {self.ding_count}")
+        if self.ding_count >= DING_QUIT_THRESHOLD:
+            self.reminder_after_ids = []
+            self.quit_application()
+            return
+        self._publish("reminder_fired", ding=ding)
+        if self.in_break:
+            self.play_sound(self.start_work_sound)
+        else:
+            self.play_sound(self.stop_work_sound)
+        if self.ding_count == 1:
+            self.gui.restore_window()
+        elif self.ding_count == 3:
+            self.gui.maximize_window()
+
+    def cancel_reminder(self):
+        if self.reminder_after_ids:
+            for after_id in self.reminder_after_ids:
+                self.scheduler.after_cancel(after_id)
+            self.reminder_after_ids = []
+            logging.debug("Cancelled existing reminder")
+
+    def stop_reminder(self):
+        self.cancel_reminder()
+
+    def play_pink_noise(self):
+        if self.audio is not None:
+            self.audio.play_noise(self.noise)
+
+    def stop_pink_noise(self):
+        if self.audio is not None:
+            self.audio.stop_noise()
+
+    def play_sound(self, sound_path):
+        if self.audio is not None:
+            self.audio.play_sound(sound_path)
+
+    def start_toggl_entry(self):
+        if self.toggl is None:
+            return
+        description = self.description  # Assuming self.description is updated from the view
+        logging.info(f"Queueing Toggl start with description '{description}'")
+        self.toggl.start(description, on_complete=self._toggl_entry_started)
+
+    def stop_toggl_entry(self, at=None):
+        # at: wall-clock epoch seconds the entry should stop at, if not now
+        if self.toggl is None:
+            return
+        logging.info("Queueing Toggl stop")
+        stop = datetime.fromtimestamp(at, timezone.utc).replace(microsecond=0).isoformat() if at else None
+        self.toggl.stop(on_complete=self._toggl_entry_stopped, at=stop)
+
+    def stop(self):
+        # Ends the session where it stands (the daemon removing it): what ran
+        # is recorded, and the countdown, reminders and this session's Toggl
+        # entry are stopped. Another session's entry on the same account is
+        # left running.
+        self._record_interrupted()
+        self.is_running = False
+        self.cancel_timer()
+        self.stop_reminder()
+        self.stop_pink_noise()
+        if self.toggl is not None:
+            running = self.toggl.journal.running_entry()
+            if running is not None and running.description == self.description:
+                self.stop_toggl_entry()
+
+    def _toggl_entry_started(self, client_id):
+        logging.info(f"Toggl entry {client_id} started")
+
+    def _toggl_entry_stopped(self, client_id):
+        logging.info(f"Toggl entry {client_id} stopped")
+
+    def _period_seconds(self, until=None):
+        if self.period_started_at is None:
+            return 0
+        return (until if until is not None else self.clock()) - self.period_started_at
+
+    def _wall_time(self, at):
+        # Our clock's time as epoch seconds, or None for now
+        return at + time.time() - self.clock() if at is not None else None
+
+    def _record_interrupted(self):
+        # A countdown cut short by a new transition still counts what ran
+        if self.is_running:
+            self._record("break_stopped" if self.in_break else "work_stopped", seconds=self._period_seconds())
+            if not self.in_break:
+                self._publish("work_ended", seconds=self._period_seconds(), reason="interrupted")
+
+    def _record(self, kind, seconds=0, at=None):
+        # Reminders that fired before this transition went unanswered
+        dings = self.ding_count if self.prompted_at is not None else 0
+        response_seconds = self.clock() - self.prompted_at if self.prompted_at is not None else None
+        self.prompted_at = None
+        if response_seconds is not None:
+            metrics.observe("pomodoro_reminder_ack_seconds", response_seconds)
+        if self.ledger is None:
+            return
+        self.ledger.record(kind, self.description, session=self.session_name, seconds=seconds,
+                           dings=dings, response_seconds=response_seconds, at=at)
+        self.gui.show_totals(self.ledger.today(self.session_name))
+
+    def _publish(self, kind, **details):
+        if self.events is not None:
+            self.events.publish(Event(kind, self.session_name, self.description, self.in_break, **details))
+
+    def _display_time(self, text):
+        self.gui.display_time(text)
+        if text.endswith(":00"):
+            self._checkpoint(flush=False)  # Minute boundary: just touch the mapping
+
+    def _checkpoint(self, flush=True):
+        if self.checkpoint is None:
+            return
+        # The checkpoint holds wall-clock times; convert from our clock
+        wall_offset = time.time() - self.clock()
+        self.checkpoint.save(
+            running=self.is_running, in_break=self.in_break, prompting=self.prompted_at is not None,
+            deadline=self.countdown.deadline + wall_offset if self.countdown.running else None,
+            period_started=self.period_started_at + wall_offset if self.period_started_at is not None else None,
+            prompted_at=self.prompted_at + wall_offset if self.prompted_at is not None else None,
+            work_time=self.work_time, break_time=self.break_time, description=self.description,
+            saved_at=time.time(), flush=flush)
+
+    def restore(self, state):
+        # Resume a checkpointed session from local state alone; Toggl is
+        # brought in line afterwards, on the dispatcher's thread
+        logging.info(f"Restoring {'break' if state['in_break'] else 'work'} session '{state['description']}'")
+        wall_offset = time.time() - self.clock()
+        self.description = state["description"]
+        self.work_time = state["work_time"]
+        self.break_time = state["break_time"]
+        self.in_break = state["in_break"]
+        if state["running"] and state["deadline"]:
+            self.is_running = True
+            self.timer_callback = self.break_timer_end if self.in_break else self.work_timer_end
+            self.period_started_at = (state["period_started"] or time.time()) - wall_offset
+            deadline = state["deadline"] - wall_offset
+            if deadline <= self.clock():
+                # Ran out while we were down: the period ends at its deadline,
+                # so the downtime counts neither as focus nor in Toggl
+                logging.info(f"Period ran out {self.clock() - deadline:.0f} s ago, ending it at its deadline")
+                self.timer_callback(ended_at=deadline)
+            else:
+                if not self.in_break:
+                    self.play_pink_noise()
+                self.countdown.start_until(deadline)
+        elif state["prompting"]:
+            self.prompted_at = (state["prompted_at"] or time.time()) - wall_offset
+            self.gui.restore_window()
+            self.start_reminder()
+            self.gui.prompt_action(*END_PROMPTS[self.in_break])
+        self.gui.update_ui_state()
+        if self.toggl is not None:
+            self.toggl.reconcile(self.description, working=self.is_running and not self.in_break)
+
+    def refresh_display(self):
+        self.countdown.refresh()
+
+    def quit_application(self):
+        logging.info("Quitting application due to inactivity")
+        self._record("idle_quit")
+        self._publish("idle_quit")
+        # Stop the timer and reminders; the view decides what quitting means
+        # (closing the window, or ending one session in the daemon)
+        self.cancel_timer()
+        self.stop_reminder()
+        self._checkpoint()  # Nothing to resume after walking away
+        self.stop_pink_noise()
+        self.gui.quit()
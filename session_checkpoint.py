@@ -0,0 +1,90 @@
+import logging
+import mmap
+import os
+import struct
+import zlib
+
+CHECKPOINT_PATH = "./pomodoro-session.bin"
+MAGIC = b"PMDR"
+VERSION = 1
+DESCRIPTION_BYTES = 256  # UTF-8 bytes kept of the description
+
+# magic, version, flags, sequence, saved_at, deadline, period_started,
+# prompted_at, work_time, break_time, description length, description.
+# Times are wall-clock epoch seconds (monotonic clocks don't survive a
+# reboot); 0 means "not set". A CRC32 of all of it follows.
+RECORD = struct.Struct(f"<4sHHQdddddd H{DESCRIPTION_BYTES}s")
+SLOT_SIZE = 512  # two slots, written alternately, so a torn write never loses the previous state
+assert RECORD.size + 4 <= SLOT_SIZE
+
+RUNNING = 1
+IN_BREAK = 2
+PROMPTING = 4
+
+
+class SessionCheckpoint:
+    # The current session in a fixed-layout, memory-mapped file. A save is
+    # a struct.pack_into over the mapping, with no syscall, so it can run
+    # on every minute boundary. The page cache outlives a crashed or killed
+    # process; transitions also msync, so even a power cut loses at most
+    # the last minute of progress, never a transition.
+    def __init__(self, path=CHECKPOINT_PATH):
+        self.path = path
+        self.file = open(path, "r+b" if os.path.exists(path) else "w+b")
+        if os.fstat(self.file.fileno()).st_size < 2 * SLOT_SIZE:
+            self.file.truncate(2 * SLOT_SIZE)
+        self.map = mmap.mmap(self.file.fileno(), 2 * SLOT_SIZE)
+        self.sequence = max((state["sequence"] for state in self._slots() if state), default=0)
+
+    def _slots(self):
+        return [self._read(slot) for slot in (0, 1)]
+
+    def _read(self, slot):
+        offset = slot * SLOT_SIZE
+        record = self.map[offset:offset + RECORD.size]
+        crc, = struct.unpack_from("<I", self.map, offset + RECORD.size)
+        if record[:4] != MAGIC or zlib.crc32(record) != crc:
+            return None
+        (_, version, flags, sequence, saved_at, deadline, period_started, prompted_at,
+         work_time, break_time, length, description) = RECORD.unpack(record)
+        if version != VERSION:
+            return None
+        return {
+            "sequence": sequence,
+            "saved_at": saved_at,
+            "running": bool(flags & RUNNING),
+            "in_break": bool(flags & IN_BREAK),
+            "prompting": bool(flags & PROMPTING),
+            "deadline": deadline or None,
+            "period_started": period_started or None,
+            "prompted_at": prompted_at or None,
+            "work_time": int(work_time),  # Stored as doubles; the view and ledger want whole minutes
+            "break_time": int(break_time),
+            "description": description[:length].decode("utf-8", errors="ignore"),
+        }
+
+    def load(self):
+        # The newest intact record, or None if there's never been one
+        states = [state for state in self._slots() if state]
+        return max(states, key=lambda state: state["sequence"]) if states else None
+
+    def save(self, running, in_break, prompting, deadline, period_started, prompted_at, work_time, break_time,
+             description, saved_at, flush=False):
+        self.sequence += 1
+        offset = (self.sequence % 2) * SLOT_SIZE
+        encoded = description.encode("utf-8")[:DESCRIPTION_BYTES]
+        flags = (RUNNING if running else 0) | (IN_BREAK if in_break else 0) | (PROMPTING if prompting else 0)
+        RECORD.pack_into(self.map, offset, MAGIC, VERSION, flags, self.sequence, saved_at, deadline or 0,
+                         period_started or 0, prompted_at or 0, work_time, break_time, len(encoded), encoded)
+        struct.pack_into("<I", self.map, offset + RECORD.size,
+                         zlib.crc32(self.map[offset:offset + RECORD.size]))
+        if flush:
+            try:
+                self.map.flush()
+            except OSError as e:
+                logging.error(f"Error flushing session checkpoint: {e}")
+
+    def close(self):
+        self.map.flush()
+        self.map.close()
+        self.file.close()
@@ -0,0 +1,209 @@
+import logging
+import sqlite3
+import threading
+import time
+
+LEDGER_PATH = "./pomodoro-ledger.sqlite3"
+FLUSH_INTERVAL = 2.0  # seconds between batched writes
+FLUSH_BATCH = 100  # write early once this many events are waiting
+RETRY_MAX = 60.0  # longest wait between attempts while writes keep failing
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    at REAL NOT NULL,
+    day TEXT NOT NULL,
+    session TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    description TEXT NOT NULL,
+    seconds REAL NOT NULL DEFAULT 0,
+    dings INTEGER NOT NULL DEFAULT 0,
+    response_seconds REAL
+);
+CREATE INDEX IF NOT EXISTS events_by_day ON events (day);
+CREATE INDEX IF NOT EXISTS events_by_description ON events (description);
+CREATE TABLE IF NOT EXISTS daily_totals (
+    day TEXT NOT NULL,
+    session TEXT NOT NULL,
+    work_seconds REAL NOT NULL DEFAULT 0,
+    break_seconds REAL NOT NULL DEFAULT 0,
+    work_sessions INTEGER NOT NULL DEFAULT 0,
+    extensions INTEGER NOT NULL DEFAULT 0,
+    ignored_reminders INTEGER NOT NULL DEFAULT 0,
+    idle_quits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, session)
+);
+CREATE TABLE IF NOT EXISTS description_totals (
+    description TEXT PRIMARY KEY,
+    work_seconds REAL NOT NULL DEFAULT 0,
+    work_sessions INTEGER NOT NULL DEFAULT 0,
+    extensions INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+DAILY_COLUMNS = ("work_seconds", "break_seconds", "work_sessions", "extensions", "ignored_reminders", "idle_quits")
+DESCRIPTION_COLUMNS = ("work_seconds", "work_sessions", "extensions")
+
+
+def rollup_deltas(kind, seconds, dings):
+    # How one event moves the rollups; shared by the flush and the in-memory view of today
+    deltas = {"ignored_reminders": dings}
+    if kind in ("work_timer_end", "work_stopped"):
+        deltas["work_seconds"] = seconds
+    elif kind in ("break_timer_end", "break_stopped"):
+        deltas["break_seconds"] = seconds
+    elif kind == "start_work":
+        deltas["work_sessions"] = 1
+    elif kind in ("extend_work", "extend_break"):
+        deltas["extensions"] = 1
+    elif kind == "idle_quit":
+        deltas["idle_quits"] = 1
+    return deltas
+
+
+class SessionLedger:
+    # Local record of every transition. Events are queued in memory and
+    # written in batches (WAL mode, one transaction per batch) by a
+    # background thread; the same transaction bumps the per-day and
+    # per-description rollups, so totals never need a scan of history.
+    # Today's totals are also kept in memory, so reading them is instant.
+    def __init__(self, path=LEDGER_PATH):
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.pending = []
+        self.in_flight = []  # Taken by the writer but not committed yet; guarded by db_lock
+        self.condition = threading.Condition()
+        self.db_lock = threading.Lock()
+        self.today_day = None
+        self.today_totals = {}  # session -> {column: value} for today_day
+        self.closed = False
+        self.worker = threading.Thread(target=self._run, name="session-ledger", daemon=True)
+        self.worker.start()
+
+    def record(self, kind, description, session="local", seconds=0, dings=0, response_seconds=None, at=None):
+        # at: when it happened (epoch seconds), if not just now
+        now = at if at is not None else time.time()
+        day = time.strftime("%Y-%m-%d", time.localtime(now))
+        with self.condition:
+            totals = self._today(day, session)  # Load before queueing, or the event would count twice
+            self.pending.append((now, day, session, kind, description or "", seconds, dings, response_seconds))
+            for column, delta in rollup_deltas(kind, seconds, dings).items():
+                totals[column] += delta
+            if len(self.pending) >= FLUSH_BATCH:
+                self.condition.notify()
+
+    def _today(self, day, session):
+        # Called with the condition held
+        if day != self.today_day:
+            self.today_day = day
+            self.today_totals = {}
+        totals = self.today_totals.get(session)
+        if totals is None:
+            with self.db_lock:
+                row = self.db.execute(f"SELECT {', '.join(DAILY_COLUMNS)} FROM daily_totals "
+                                      "WHERE day = ? AND session = ?", (day, session)).fetchone()
+                unwritten = self.in_flight + self.pending
+            totals = dict(zip(DAILY_COLUMNS, row or (0,) * len(DAILY_COLUMNS)))
+            # Anything still queued for today is not in the table yet
+            for at, event_day, event_session, kind, _, seconds, dings, _ in unwritten:
+                if event_day == day and event_session == session:
+                    for column, delta in rollup_deltas(kind, seconds, dings).items():
+                        totals[column] += delta
+            self.today_totals[session] = totals
+        return totals
+
+    def today(self, session="local"):
+        day = time.strftime("%Y-%m-%d")
+        with self.condition:
+            return dict(self._today(day, session))
+
+    def focused_minutes_today(self, session="local"):
+        return int(self.today(session)["work_seconds"] // 60)
+
+    def _run(self):
+        retry_delay = None  # Set while writes are failing
+        while True:
+            with self.condition:
+                if retry_delay is not None:
+                    # Backing off: a full queue doesn't bring the retry forward
+                    deadline = time.monotonic() + retry_delay
+                    while not self.closed and time.monotonic() < deadline:
+                        self.condition.wait(deadline - time.monotonic())
+                elif not self.closed and len(self.pending) < FLUSH_BATCH:
+                    self.condition.wait(FLUSH_INTERVAL)
+                batch, self.pending = self.pending, []
+                closing = self.closed
+                with self.db_lock:
+                    self.in_flight = batch
+            if not batch:
+                retry_delay = None
+            else:
+                try:
+                    self._write(batch)
+                    retry_delay = None
+                except sqlite3.Error as e:
+                    # Today's totals already count these events, so keep them
+                    # and try again rather than let the table fall behind
+                    retry_delay = min(RETRY_MAX, retry_delay * 2 if retry_delay else FLUSH_INTERVAL)
+                    with self.condition:
+                        with self.db_lock:
+                            self.in_flight = []
+                            if closing:
+                                logging.warning(f"Dropping {len(batch)} ledger events on close: {e}")
+                            else:
+                                self.pending = batch + self.pending
+                    if not closing:
+                        logging.error(f"Error writing session ledger, retrying {len(batch)} events in "
+                                      f"{retry_delay:.1f} s: {e}")
+            if closing:
+                return
+
+    def _write(self, batch):
+        daily = {}
+        by_description = {}
+        for at, day, session, kind, description, seconds, dings, _ in batch:
+            deltas = rollup_deltas(kind, seconds, dings)
+            row = daily.setdefault((day, session), dict.fromkeys(DAILY_COLUMNS, 0))
+            for column, delta in deltas.items():
+                row[column] += delta
+            row = by_description.setdefault(description, dict.fromkeys(DESCRIPTION_COLUMNS, 0))
+            for column in DESCRIPTION_COLUMNS:
+                row[column] += deltas.get(column, 0)
+
+        with self.db_lock, self.db:
+            self.db.executemany("INSERT INTO events (at, day, session, kind, description, seconds, dings, "
+                                "response_seconds) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+            updates = ", ".join(f"{column} = {column} + excluded.{column}" for column in DAILY_COLUMNS)
+            self.db.executemany(
+                f"INSERT INTO daily_totals (day, session, {', '.join(DAILY_COLUMNS)}) "
+                f"VALUES (?, ?, {', '.join('?' * len(DAILY_COLUMNS))}) "
+                f"ON CONFLICT (day, session) DO UPDATE SET {updates}",
+                [(day, session, *(row[column] for column in DAILY_COLUMNS))
+                 for (day, session), row in daily.items()])
+            updates = ", ".join(f"{column} = {column} + excluded.{column}" for column in DESCRIPTION_COLUMNS)
+            self.db.executemany(
+                f"INSERT INTO description_totals (description, {', '.join(DESCRIPTION_COLUMNS)}) "
+                f"VALUES (?, {', '.join('?' * len(DESCRIPTION_COLUMNS))}) "
+                f"ON CONFLICT (description) DO UPDATE SET {updates}",
+                [(description, *(row[column] for column in DESCRIPTION_COLUMNS))
+                 for description, row in by_description.items()])
+            # Cleared while db_lock is held, which it stays until the commit,
+            # so _today() never sees the batch both in the table and in flight
+            self.in_flight = []
+        logging.debug(f"Wrote {len(batch)} ledger events")
+
+    def description_totals(self, limit=20):
+        with self.db_lock:
+            return self.db.execute("SELECT description, work_seconds, work_sessions, extensions "
+                                   "FROM description_totals ORDER BY work_seconds DESC LIMIT ?",
+                                   (limit,)).fetchall()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.worker.join()
+        with self.db_lock:
+            self.db.close()
@@ -1,228 +1,41 @@
+import argparse
 import tkinter as tk
-import time
-import subprocess
-import pygame
+import os
+import sys
 import tkinter.font as tkFont
+import tkinter.ttk as ttk
 import logging
 
+import event_bus
+import focus_analytics
+import metrics
+from audio import AudioPlayer
+from deadline_scheduler import DeadlineScheduler
+from pomodoro_remote import RemoteTimer
+from pomodoro_timer import NOISE, START_WORK_SOUND_PATH, STOP_WORK_SOUND_PATH, PomodoroTimer
+from session_checkpoint import SessionCheckpoint
+from session_ledger import LEDGER_PATH, SessionLedger
+from view_state import ViewRenderer, desired_view
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "toggl-scripts"))
+from toggl_client import TogglClient  # noqa: E402
+from toggl_dispatcher import TogglDispatcher  # noqa: E402
+from toggl_entries import EntryMirror  # noqa: E402
+from toggl_metadata import MetadataCache  # noqa: E402
+
 # Configure Logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Constants and Configurable Variables
-PINK_NOISE_PATH = "./noises/pink_noise.mp3"
-STOP_WORK_SOUND_PATH = "./noises/stop-work.mp3"
-START_WORK_SOUND_PATH = "./noises/start-work.mp3"
-START_TIMER_SCRIPT = "./toggl-scripts/start-timer.py"
-STOP_TIMER_SCRIPT = "./toggl-scripts/stop-timer.py"
-
-DEFAULT_WORK_TIME = 18  # in minutes
-DEFAULT_BREAK_TIME = 8  # in minutes
-DEFAULT_DELAY_TIME = 5  # in minutes
-DING_QUIT_THRESHOLD = 5  # Number of dings after which it quits if no response
-
-
-class PomodoroTimer:
-    def __init__(self, gui):
-        # Initialize pygame for audio playback
-        pygame.mixer.init()
-
-        # Variables
-        self.gui = gui
-        self.description = ""
-        self.work_time = DEFAULT_WORK_TIME
-        self.break_time = DEFAULT_BREAK_TIME
-        self.extend_work_time = DEFAULT_DELAY_TIME
-        self.extend_break_time = DEFAULT_DELAY_TIME
-        self.is_running = False
-        self.in_break = False
-        self.ding_count = 0  # Track number of dings
-        self.remaining_time = 0  # Remaining time in seconds
-        self.timer_after_id = None
-        self.reminder_after_id = None
-
-        # Initialize audio channels
-        # Remove pink_noise_channel as we are using pygame.mixer.music
-        self.sound_effects_channel = pygame.mixer.Channel(1)
-
-    def start_work(self):
-        logging.info("Starting work session")
-        self.cancel_timer()
-        self.stop_reminder()
-        self.is_running = True
-        self.in_break = False
-        self.ding_count = 0
-        self.play_pink_noise()
-        self.call_script(START_TIMER_SCRIPT)
-        self.start_timer(self.work_time * 60, self.work_timer_end)
-        self.gui.update_ui_state()
-
-    def work_timer_end(self):
-        logging.info("Work timer ended")
-        self.is_running = False
-        self.stop_pink_noise()
-        self.play_sound(STOP_WORK_SOUND_PATH)
-        self.call_script(STOP_TIMER_SCRIPT)
-        self.gui.restore_window()
-        self.start_reminder()
-        self.gui.prompt_action(
-            "Time to start your break!",
-            "CTRL + B - Start Break\nCTRL + E - Extend Work"
-        )
-
-    def start_break(self):
-        logging.info("Starting break session")
-        self.cancel_timer()
-        self.stop_reminder()
-        self.is_running = True
-        self.in_break = True
-        self.ding_count = 0
-        self.stop_pink_noise()
-        self.start_timer(self.break_time * 60, self.break_timer_end)
-        self.gui.update_ui_state()
-
-    def break_timer_end(self):
-        logging.info("Break timer ended")
-        self.is_running = False
-        self.play_sound(START_WORK_SOUND_PATH)
-        self.call_script(START_TIMER_SCRIPT)
-        self.gui.restore_window()
-        self.start_reminder()
-        self.gui.prompt_action(
-            "Time to get back to work!",
-            "CTRL + W - Start Work\nCTRL + E - Extend Break"
-        )
-
-    def extend_work(self, minutes=None):
-        if self.is_running and not self.in_break:
-            extension = (minutes if minutes is not None else self.extend_work_time) * 60
-            logging.info(f"Extending work session by {extension // 60} minutes")
-            self.stop_reminder()
-            self.remaining_time += extension
-            self.gui.hide_prompt()
-            self.gui.update_ui_state()
-        else:
-            logging.warning("Cannot extend work session: either not running or in break")
-
-    def extend_break(self, minutes=None):
-        if self.is_running and self.in_break:
-            extension = (minutes if minutes is not None else self.extend_break_time) * 60
-            logging.info(f"Extending break session by {extension // 60} minutes")
-            self.stop_reminder()
-            self.remaining_time += extension
-            self.gui.hide_prompt()
-            self.gui.update_ui_state()
-        else:
-            logging.warning("Cannot extend break session: either not running or not in break")
-
-    def start_timer(self, duration, callback):
-        self.cancel_timer()  # Stop any existing timer
-        self.remaining_time = duration
-        self.is_running = True
-        self.timer_callback = callback
-        self._timer_update()
-
-    def _timer_update(self):
-        if self.remaining_time <= 0:
-            self.is_running = False
-            self.gui.timer_var.set("Time Left: 00:00")
-            logging.info("Timer reached zero")
-            self.timer_callback()
-        else:
-            mins, secs = divmod(self.remaining_time, 60)
-            time_format = f"{int(mins):02d}:{int(secs):02d}"
-            self.gui.timer_var.set(f"Time Left: {time_format}")
-            self.remaining_time -= 1
-            # Schedule the next update and store the after_id
-            self.timer_after_id = self.gui.root.after(1000, self._timer_update)
-
-    def cancel_timer(self):
-        if self.timer_after_id:
-            self.gui.root.after_cancel(self.timer_after_id)
-            self.timer_after_id = None
-            logging.debug("Cancelled existing timer")
-
-    def start_reminder(self):
-        self.cancel_reminder()
-        self.ding_count = 0
-        self.reminder_intervals = [30, 60, 60]  # Intervals between beeps in seconds
-        self._reminder_update()
-
-    def _reminder_update(self):
-        if self.ding_count < len(self.reminder_intervals):
-            interval = self.reminder_intervals[self.ding_count]
-        else:
-            interval = 60  # Continue reminders every 60 seconds
-        self.ding_count += 1
-        logging.debug(f"Scheduling reminder {self.ding_count} in {interval} seconds")
-        self.reminder_after_id = self.gui.root.after(interval * 1000, self._reminder_action)
-
-    def _reminder_action(self):
-        logging.info(f"Reminder {self.ding_count}")
-        if self.ding_count >= DING_QUIT_THRESHOLD:
-            self.quit_application()
-            return
-        if self.in_break:
-            self.play_sound(START_WORK_SOUND_PATH)
-        else:
-            self.play_sound(STOP_WORK_SOUND_PATH)
-        if self.ding_count == 1:
-            self.gui.restore_window()
-        elif self.ding_count == 3:
-            self.gui.maximize_window()
-        self._reminder_update()
-
-    def cancel_reminder(self):
-        if self.reminder_after_id:
-            self.gui.root.after_cancel(self.reminder_after_id)
-            self.reminder_after_id = None
-            logging.debug("Cancelled existing reminder")
-
-    def stop_reminder(self):
-        self.cancel_reminder()
-
-    def play_pink_noise(self):
-        try:
-            pygame.mixer.music.load(PINK_NOISE_PATH)
-            pygame.mixer.music.play(-1)  # Loop indefinitely
-            logging.info("Started playing pink noise")
-        except pygame.error as e:
-            logging.error(f"Error playing pink noise: {e}")
-
-    def stop_pink_noise(self):
-        pygame.mixer.music.stop()
-        logging.info("Stopped pink noise")
-
-    def play_sound(self, sound_path):
-        try:
-            sound = pygame.mixer.Sound(sound_path)
-            self.sound_effects_channel.play(sound)
-            logging.info(f"Played sound: {sound_path}")
-        except pygame.error as e:
-            logging.error(f"Error playing sound {sound_path}: {e}")
-
-    def call_script(self, script_path):
-        description = self.description  # Assuming self.description is updated from Tkinter
-        logging.info(f"Calling script {script_path} with description '{description}'")
-        try:
-            subprocess.Popen(["python", script_path, "--description", description])
-        except Exception as e:
-            logging.error(f"Error calling script {script_path}: {e}")
-
-    def quit_application(self):
-        logging.info("Quitting application due to inactivity")
-        # Stop the timer, close the reminder thread, and exit the application
-        self.cancel_timer()
-        self.stop_reminder()
-        self.stop_pink_noise()
-        pygame.mixer.quit()
-        self.gui.root.quit()  # Close the Tkinter window
-
 
 class PomodoroGUI:
-    def __init__(self, root, timer):
+    def __init__(self, root, timer, entries=None, projects=None):
         self.root = root
         self.timer = timer
+        self.entries = entries  # Local mirror of past time entries, for autocomplete
+        self.projects = projects  # Local metadata cache, for the project picker
         self.timer.gui = self
+        if self.timer.scheduler is None:
+            self.timer.scheduler = DeadlineScheduler(root)
         self.root.title("Brians-Toggl-Pomodoro")
         self.root.geometry("800x600")  # Set window size
 
@@ -233,20 +46,24 @@ class PomodoroGUI:
 
         # Tkinter Variables
         self.description_var = tk.StringVar(value=self.timer.description)
+        self.project_var = tk.StringVar(value="")
         self.work_time_var = tk.IntVar(value=self.timer.work_time)
         self.break_time_var = tk.IntVar(value=self.timer.break_time)
         self.extend_work_var = tk.IntVar(value=self.timer.extend_work_time)
         self.extend_break_var = tk.IntVar(value=self.timer.extend_break_time)
         self.mode_var = tk.StringVar(value="Currently Working 💸 🛠️ 🫅")
         self.timer_var = tk.StringVar(value="")
+        self.today_var = tk.StringVar(value="")
 
         # Build GUI
         self.create_widgets()
         self.bind_hotkeys()
+        # Ticks back off while minimized; catch up as soon as we're visible again
+        self.root.bind('<Map>', self.on_map)
 
     def create_widgets(self):
         # Configure grid spacing
-        for i in range(9):
+        for i in range(11):
             self.root.rowconfigure(i, pad=10)
         for i in range(3):
             self.root.columnconfigure(i, pad=20)
@@ -255,62 +72,102 @@ class PomodoroGUI:
         tk.Label(self.root, text="Description:", font=self.default_font).grid(row=0, column=0, sticky="e")
         self.description_entry = tk.Entry(self.root, textvariable=self.description_var, font=self.default_font)
         self.description_entry.grid(row=0, column=1)
+        self.description_entry.bind('<KeyRelease>', self.complete_description)
+        self.description_entry.bind('<Tab>', self.accept_completion)
+        self.description_entry.bind('<Right>', self.accept_completion)
         self.go_button = tk.Button(self.root, text="Start Work", command=self.go_action, font=self.default_font)
         self.go_button.grid(row=0, column=2)
 
+        # Project picker: names come from the local metadata cache, never the network
+        self.project_label = tk.Label(self.root, text="Project:", font=self.default_font)
+        self.project_label.grid(row=1, column=0, sticky="e")
+        self.project_entry = ttk.Combobox(self.root, textvariable=self.project_var, font=self.default_font,
+                                          postcommand=self.list_projects)
+        self.project_entry.grid(row=1, column=1)
+        self.project_entry.bind('<<ComboboxSelected>>', self.select_project)
+        self.project_entry.bind('<Return>', self.select_project)
+        self.project_entry.bind('<FocusOut>', self.select_project)
+        if self.projects is None:
+            # Attached to the daemon, which tracks its own Toggl project
+            self.project_label.grid_remove()
+            self.project_entry.grid_remove()
+
         # Work Time Entry
-        tk.Label(self.root, text="Work Duration (minutes):", font=self.default_font).grid(row=1, column=0, sticky="e")
-        tk.Entry(self.root, textvariable=self.work_time_var, font=self.default_font).grid(row=1, column=1)
+        tk.Label(self.root, text="Work Duration (minutes):", font=self.default_font).grid(row=2, column=0, sticky="e")
+        self.work_time_entry = tk.Entry(self.root, textvariable=self.work_time_var, font=self.default_font)
+        self.work_time_entry.grid(row=2, column=1)
 
         # Break Time Entry
-        tk.Label(self.root, text="Break Duration (minutes):", font=self.default_font).grid(row=2, column=0, sticky="e")
-        tk.Entry(self.root, textvariable=self.break_time_var, font=self.default_font).grid(row=2, column=1)
+        tk.Label(self.root, text="Break Duration (minutes):", font=self.default_font).grid(row=3, column=0, sticky="e")
+        self.break_time_entry = tk.Entry(self.root, textvariable=self.break_time_var, font=self.default_font)
+        self.break_time_entry.grid(row=3, column=1)
         self.break_button = tk.Button(self.root, text="Break", command=self.break_action, font=self.default_font)
-        self.break_button.grid(row=2, column=2)
+        self.break_button.grid(row=3, column=2)
 
         # Extend Work Entry
-        tk.Label(self.root, text="Extend Work (minutes):", font=self.default_font).grid(row=3, column=0, sticky="e")
+        tk.Label(self.root, text="Extend Work (minutes):", font=self.default_font).grid(row=4, column=0, sticky="e")
         self.extend_work_entry = tk.Entry(self.root, textvariable=self.extend_work_var, font=self.default_font)
-        self.extend_work_entry.grid(row=3, column=1)
+        self.extend_work_entry.grid(row=4, column=1)
         self.extend_work_entry.bind('<Return>', self.update_extend_work)  # Bind Enter key
         self.update_extend_work_button = tk.Button(self.root, text="Update", command=self.update_extend_work, font=self.default_font)
-        self.update_extend_work_button.grid(row=3, column=2)
+        self.update_extend_work_button.grid(row=4, column=2)
 
         # Extend Break Entry
-        tk.Label(self.root, text="Extend Break (minutes):", font=self.default_font).grid(row=4, column=0, sticky="e")
+        tk.Label(self.root, text="Extend Break (minutes):", font=self.default_font).grid(row=5, column=0, sticky="e")
         self.extend_break_entry = tk.Entry(self.root, textvariable=self.extend_break_var, font=self.default_font)
-        self.extend_break_entry.grid(row=4, column=1)
+        self.extend_break_entry.grid(row=5, column=1)
         self.extend_break_entry.bind('<Return>', self.update_extend_break)  # Bind Enter key
         self.update_extend_break_button = tk.Button(self.root, text="Update", command=self.update_extend_break, font=self.default_font)
-        self.update_extend_break_button.grid(row=4, column=2)
+        self.update_extend_break_button.grid(row=5, column=2)
 
         # Timer Label
         self.timer_label = tk.Label(self.root, textvariable=self.timer_var, font=self.mode_font)
-        self.timer_label.grid(row=5, column=0, columnspan=3, pady=10)
+        self.timer_label.grid(row=6, column=0, columnspan=3, pady=10)
 
         # Mode Indicator
         self.mode_label = tk.Label(self.root, textvariable=self.mode_var, font=self.mode_font)
-        self.mode_label.grid(row=6, column=0, columnspan=3, pady=10)
+        self.mode_label.grid(row=7, column=0, columnspan=3, pady=10)
 
         # Prompt Label (initially hidden)
         self.prompt_var = tk.StringVar(value="")
         self.prompt_label = tk.Label(self.root, textvariable=self.prompt_var, font=self.prompt_font, fg="red")
-        self.prompt_label.grid(row=7, column=0, columnspan=3, pady=10)
+        self.prompt_label.grid(row=8, column=0, columnspan=3, pady=10)
         self.prompt_label.grid_remove()
 
         # Hotkeys Label
         self.hotkeys_label = tk.Label(self.root, text="Shortcuts:", font=self.default_font)
-        self.hotkeys_label.grid(row=8, column=0, sticky="e")
+        self.hotkeys_label.grid(row=9, column=0, sticky="e")
 
         self.hotkeys_text = tk.Label(
             self.root,
             text="Ctrl+W: Start Work  |  Ctrl+B: Break  |  Ctrl+D: Description  |  Ctrl+E: Extend",
             font=self.default_font
         )
-        self.hotkeys_text.grid(row=8, column=1, columnspan=2, sticky="w")
+        self.hotkeys_text.grid(row=9, column=1, columnspan=2, sticky="w")
+
+        # Today's totals from the session ledger
+        self.today_label = tk.Label(self.root, textvariable=self.today_var, font=self.default_font)
+        self.today_label.grid(row=10, column=0, columnspan=3)
+
+        # Everything update_ui_state may touch goes through the renderer, so
+        # it can skip properties that are already in the desired state
+        self.default_bg = self.root.cget("bg")
+        self.renderer = ViewRenderer()
+        for key in ("root", "go_button", "description_entry", "project_entry", "work_time_entry", "break_time_entry",
+                    "break_button", "extend_work_entry", "update_extend_work_button", "extend_break_entry",
+                    "update_extend_break_button", "prompt_label", "description_var", "work_time_var",
+                    "break_time_var", "mode_var", "timer_var", "prompt_var", "today_var"):
+            self.renderer.register(key, getattr(self, key))
 
         # Initial State
+        if self.projects is not None:
+            # A cold or stale cache refreshes in the background; the name shows up once it's picked again
+            project = self.projects.get("projects", self.timer.toggl.client.project_id)
+            if project is not None:
+                self.project_var.set(project["name"])
         self.update_ui_state()
+        if self.timer.ledger is not None:
+            self.show_totals(self.timer.ledger.today(self.timer.session_name))
 
     def bind_hotkeys(self):
         self.root.bind('<Control-d>', self.focus_description)
@@ -321,6 +178,48 @@ class PomodoroGUI:
     def focus_description(self, event=None):
         self.description_entry.focus_set()
 
+    def complete_description(self, event):
+        # Inline autocomplete: the most recent past description starting
+        # with what was typed fills in the rest, selected, so typing on
+        # simply replaces it and Tab/Right accepts it
+        if self.entries is None or not event.char or not event.char.isprintable():
+            return
+        typed = self.description_entry.get()[:self.description_entry.index(tk.INSERT)]
+        completions = self.entries.complete(typed, limit=1)
+        if not completions or len(completions[0]) <= len(typed):
+            return
+        self.description_entry.delete(0, tk.END)
+        self.description_entry.insert(0, typed + completions[0][len(typed):])
+        self.description_entry.select_range(len(typed), tk.END)
+        self.description_entry.icursor(len(typed))
+
+    def accept_completion(self, event):
+        if not self.description_entry.selection_present():
+            return None
+        self.description_entry.select_clear()
+        self.description_entry.icursor(tk.END)
+        return "break"
+
+    def list_projects(self):
+        self.project_entry["values"] = self.projects.names("projects") if self.projects is not None else []
+
+    def select_project(self, event=None):
+        # Resolves the typed or picked name locally: a hit costs no request,
+        # and a stale cache or a miss revalidates on a background thread
+        name = self.project_var.get().strip()
+        if self.projects is None or not name:
+            return
+        client = self.timer.toggl.client
+        project = self.projects.lookup("projects", name)
+        if project is None:
+            logging.warning(f"Unknown project '{name}', keeping project {client.project_id}")
+            return
+        if project["id"] != client.project_id:
+            logging.info(f"Tracking project '{project['name']}' ({project['id']})")
+        client.project_id = project["id"]
+        client.workspace_id = project["workspace_id"]
+        self.project_var.set(project["name"])
+
     def focus_extend_entry(self, event=None):
         if self.timer.in_break:
             self.extend_break_entry.focus_set()
@@ -338,12 +237,65 @@ class PomodoroGUI:
         self.root.deiconify()
         self.root.state('normal')
 
+    def on_map(self, event):
+        # <Map> on the root also fires for every child widget that appears
+        if event.widget is self.root:
+            self.timer.refresh_display()
+
     def maximize_window(self):
         # Maximize the window
         self.root.state('zoomed')
 
+    def is_iconified(self):
+        return self.root.state() == 'iconic'
+
+    def display_time(self, text):
+        self.timer_var.set(f"Time Left: {text}")
+
+    def show_totals(self, totals):
+        self.renderer.render({"today_var": {"value": f"Focused today: {int(totals['work_seconds'] // 60)} min"}})
+
+    def quit(self):
+        if self.timer.ledger is not None:
+            self.timer.ledger.close()
+        if self.entries is not None:
+            self.entries.close()
+        if self.projects is not None:
+            self.projects.close()
+        if self.timer.checkpoint is not None:
+            self.timer.checkpoint.close()
+        if self.timer.events is not None:
+            self.timer.events.close()
+        if self.timer.audio is not None:
+            self.timer.audio.quit()
+        if self.timer.toggl is not None:
+            self.timer.toggl.close()
+            self.timer.toggl.client.close()
+        self.root.quit()  # Close the Tkinter window
+
+    def prefill_durations(self, recommendation):
+        # Suggested durations for this time of week (focus_analytics.py), unless
+        # a session is under way or the fields were already edited
+        if self.timer.is_running:
+            return
+        fields = ("work_time", "break_time", "extend_work_time", "extend_break_time")
+        variables = (self.work_time_var, self.break_time_var, self.extend_work_var, self.extend_break_var)
+        try:
+            if any(variable.get() != getattr(self.timer, field) for field, variable in zip(fields, variables)):
+                return
+        except tk.TclError:
+            return  # Half-typed number in one of the fields
+        for field, variable in zip(fields, variables):
+            setattr(self.timer, field, recommendation[field])
+            variable.set(recommendation[field])
+        logging.info(f"Pre-filled durations from history: {recommendation['work_time']} min work, "
+                     f"{recommendation['break_time']} min break")
+
     def go_action(self):
         self.update_timer_variables()
+        self.select_project()
+        if self.entries is not None:
+            self.entries.remember(self.timer.description)
         self.timer.start_work()
         self.update_ui_state()
 
@@ -383,80 +335,70 @@ class PomodoroGUI:
         logging.debug("Updated timer variables from GUI")
 
     def update_ui_state(self):
-        if self.timer.is_running:
-            # Disable input fields during timer
-            self.disable_inputs()
-            if self.timer.in_break:
-                # Break mode
-                self.mode_var.set("Currently on Break 🏖️")
-                self.root.configure(bg="light sky blue")
-                # Disable Extend Work controls
-                self.extend_work_entry.config(state="disabled")
-                self.update_extend_work_button.config(state="disabled")
-                # Enable Extend Break controls
-                self.extend_break_entry.config(state="normal")
-                self.update_extend_break_button.config(state="normal")
-            else:
-                # Work mode
-                self.mode_var.set("Currently Working 💸")
-                self.root.configure(bg="light green")
-                # Enable Extend Work controls
-                self.extend_work_entry.config(state="normal")
-                self.update_extend_work_button.config(state="normal")
-                # Disable Extend Break controls
-                self.extend_break_entry.config(state="disabled")
-                self.update_extend_break_button.config(state="disabled")
-        else:
-            # Enable input fields when timer is not running
-            self.enable_inputs()
-            # Reset the timer label
-            self.timer_var.set("")
-            self.extend_work_entry.config(state="normal")
-            self.update_extend_work_button.config(state="normal")
-            self.extend_break_entry.config(state="normal")
-            self.update_extend_break_button.config(state="normal")
-            # Update mode indicator and background based on break/work mode
-            if self.timer.in_break:
-                self.mode_var.set("Break Time!")
-                self.root.configure(bg="light sky blue")
-            else:
-                self.mode_var.set("Work Time!")
-                self.root.configure(bg="SystemButtonFace")  # Default background color
-            self.hide_prompt()
-
-    def disable_inputs(self):
-        self.go_button.config(state="disabled")
-        self.description_var.set(self.timer.description)
-        self.work_time_var.set(self.timer.work_time)
-        self.break_time_var.set(self.timer.break_time)
-        # Disable description, work time, and break time entries
-        for child in self.root.grid_slaves():
-            if isinstance(child, tk.Entry):
-                if child not in [self.extend_work_entry, self.extend_break_entry]:
-                    child.config(state="disabled")
-        self.break_button.config(state="disabled")
-        logging.debug("Disabled inputs during active session")
-
-    def enable_inputs(self):
-        self.go_button.config(state="normal")
-        # Enable description, work time, and break time entries
-        for child in self.root.grid_slaves():
-            if isinstance(child, tk.Entry):
-                child.config(state="normal")
-        self.break_button.config(state="normal")
-        logging.debug("Enabled inputs")
+        # Cheap when nothing changed: only differing properties reach Tk
+        self.renderer.render(desired_view(self.timer, self.default_bg))
 
     def prompt_action(self, message, submessage):
-        self.prompt_var.set(f"{message}\n{submessage}")
-        self.prompt_label.grid()
+        self.renderer.render({"prompt_var": {"value": f"{message}\n{submessage}"},
+                              "prompt_label": {"visible": True}})
 
     def hide_prompt(self):
-        self.prompt_label.grid_remove()
-        self.prompt_var.set("")
+        self.renderer.render({"prompt_label": {"visible": False}, "prompt_var": {"value": ""}})
+
+
+def create_timer(root, events=None):
+    # Local mode: this process owns the audio mixer and the Toggl client
+    audio = AudioPlayer([START_WORK_SOUND_PATH, STOP_WORK_SOUND_PATH], noise=NOISE)
+    # Single Toggl client reused for every transition (keep-alive session),
+    # driven from a background thread so the mainloop never waits on it.
+    # Every start/stop is journaled first, so offline time isn't lost.
+    client = TogglClient.from_config()
+    client.http.observe = metrics.observe_toggl
+    toggl = TogglDispatcher(client, post=lambda callback: root.after(0, callback))
+    # All countdown and reminder deadlines share one heap and one pending after()
+    return PomodoroTimer(None, scheduler=DeadlineScheduler(root), audio=audio, toggl=toggl, ledger=SessionLedger(),
+                         checkpoint=SessionCheckpoint(), events=events)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Toggl Pomodoro timer.")
+    parser.add_argument('--attach', metavar='SOCKET', help='Attach to a session hosted by pomodoro_daemon.py')
+    parser.add_argument('--session', default='default', help='Session name when attaching')
+    parser.add_argument('--metrics-port', type=int, help='Serve Prometheus metrics on localhost:PORT/metrics')
+    parser.add_argument('--metrics-file', help='Rewrite Prometheus metrics to this file every few seconds')
+    parser.add_argument('--hook', action='append', default=[], metavar='[EVENTS=]COMMAND',
+                        help='Run COMMAND on each transition, or only on the comma-separated EVENTS; repeatable')
+    parser.add_argument('--plugin', action='append', default=[], metavar='MODULE',
+                        help='Module or .py file whose register(bus) adds in-process hooks; repeatable')
+    args = parser.parse_args()
+    if args.metrics_port is not None:
+        metrics.serve(args.metrics_port)
+    if args.metrics_file:
+        metrics.flush_periodically(args.metrics_file)
+
     root = tk.Tk()
-    timer = PomodoroTimer(None)
-    gui = PomodoroGUI(root, timer)
+    if args.attach:
+        timer = RemoteTimer(args.attach, args.session, root,
+                            audio=AudioPlayer([START_WORK_SOUND_PATH, STOP_WORK_SOUND_PATH],
+                                              noise=NOISE))
+        entries = projects = None
+    else:
+        # Hooks run on the bus's own thread, never on the Tk loop
+        timer = create_timer(root, events=event_bus.from_args(args.hook, args.plugin))
+        # History comes from the local mirror; only changes are fetched, off the mainloop
+        entries = EntryMirror(client=timer.toggl.client)
+        entries.sync_in_background()
+        projects = MetadataCache(client=timer.toggl.client)
+    gui = PomodoroGUI(root, timer, entries, projects)
+    # Closing the window shuts down like Quit: batched ledger events get written and everything is closed
+    root.protocol("WM_DELETE_WINDOW", gui.quit)
+    if timer.checkpoint is not None:
+        # Pick up where a crashed or logged-out run left off
+        state = timer.checkpoint.load()
+        if state is not None:
+            timer.restore(state)
+        # Durations that suit this time of week, worked out from the ledger off the mainloop
+        focus_analytics.recommend_in_background(
+            LEDGER_PATH, lambda recommendation: root.after(0, gui.prefill_durations, recommendation),
+            session=timer.session_name)
     root.mainloop()
@@ -1,38 +1,30 @@
-import requests
-import base64
-import json
-
-# Load the API key from config.json
-with open('./config.json') as config_file:
-    config = json.load(config_file)
-    api_key = config['api_key']
-
-
-# API Token (replace with your actual API token)
-
-encoded_credentials = base64.b64encode(f"{api_key}:api_token".encode()).decode()
-
-# Headers for the request
-headers = {
-    'Authorization': f'Basic {encoded_credentials}',
-    'Content-Type': 'application/json'
-}
-
-# Workspace ID (replace with your actual workspace ID)
-workspace_id = 8404611  # Replace with your actual workspace ID
-
-# API URL to fetch projects
-url = f'https://api.track.toggl.com/api/v9/workspaces/{workspace_id}/projects'
-
-# Send GET request to the Toggl API
-response = requests.get(url, headers=headers)
-
-# Check if the request was successful
-if response.status_code == 200:
-    # Parse the response JSON if successful
-    projects = response.json()
-    print("Projects:", projects)
-else:
-    # Print the error if the request failed
-    print(f"Failed to fetch projects. Status code: {response.status_code}")
-    print("Response:", response.text)
+import argparse
+
+from toggl_client import TogglClient
+from toggl_metadata import KINDS, WORKERS, MetadataCache
+
+parser = argparse.ArgumentParser(description="Refresh and list projects across Toggl workspaces.")
+parser.add_argument('--workspace', type=int, action='append',
+                    help='Only this workspace ID (repeatable; default: every workspace the token can see)')
+parser.add_argument('--workers', type=int, default=WORKERS, help='Concurrent requests')
+args = parser.parse_args()
+
+client = TogglClient.from_config()
+cache = MetadataCache(client=client, revalidate=False)
+
+# Every workspace is refreshed at once; only what changed since the last run is
+# downloaded, and a workspace that fails keeps its cached copy
+try:
+    report = cache.refresh_workspaces(args.workspace, KINDS, args.workers)
+except IOError as e:
+    print(f"{e}, cached copy:")
+    report = {"workspaces": {}, "seconds": 0.0}
+for project in cache.all("projects"):
+    if args.workspace is None or project["workspace_id"] in args.workspace:
+        workspace = cache.workspaces.get(project["workspace_id"], {}).get("name", project["workspace_id"])
+        print(f"{project['id']:>12}  {workspace:<24}  {project['name']}")
+for workspace_id, result in report["workspaces"].items():
+    for kind, reason in result["failed"].items():
+        print(f"Failed to refresh {kind} in workspace {result['name'] or workspace_id}: {reason}")
+print(f"Refreshed {len(report['workspaces'])} workspaces in {report['seconds']:.2f} s")
+cache.close()
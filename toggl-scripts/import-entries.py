@@ -0,0 +1,27 @@
+import argparse
+import logging
+
+from toggl_client import TogglClient
+from toggl_import import WORKERS, TogglImporter
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+parser = argparse.ArgumentParser(description="Import finished sessions from CSV or JSONL as completed Toggl entries.")
+parser.add_argument('path', help='.csv (with a header row) or .jsonl file; fields: description, start, '
+                                 'stop or duration, and optionally project_id, workspace_id, tags')
+parser.add_argument('--workers', type=int, default=WORKERS, help='Concurrent requests')
+parser.add_argument('--checkpoint', help='Progress file for resuming (default: <path>.checkpoint)')
+parser.add_argument('--failed', help='Where to write rows Toggl rejected (default: <path>.failed.jsonl)')
+args = parser.parse_args()
+
+client = TogglClient.from_config()
+importer = TogglImporter(client, workers=args.workers,
+                         checkpoint_path=args.checkpoint or f"{args.path}.checkpoint",
+                         failed_path=args.failed or f"{args.path}.failed.jsonl")
+try:
+    report = importer.run(args.path)
+    print(report)
+except KeyboardInterrupt:
+    print("Interrupted; run the same command again to resume")
+finally:
+    client.close()
@@ -0,0 +1,50 @@
+import argparse
+import logging
+import sys
+from datetime import datetime, timedelta, timezone
+
+from toggl_client import TogglClient
+from toggl_metadata import MetadataCache
+from toggl_report import DIMENSIONS, api_entries, build_report, read_entries
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+parser = argparse.ArgumentParser(description="Totals by project, description, day and week, streamed from Toggl "
+                                             "or from an export of any size.")
+parser.add_argument('source', nargs='?', help='.json (array), .jsonl or .csv export; omit to read from Toggl')
+parser.add_argument('--days', type=int, default=365, help='How far back to read from Toggl')
+parser.add_argument('--by', default=",".join(DIMENSIONS), help=f'Comma-separated subset of {", ".join(DIMENSIONS)}')
+parser.add_argument('--format', choices=('csv', 'json'), default='csv')
+parser.add_argument('--output', help='Write here instead of stdout')
+args = parser.parse_args()
+
+dimensions = tuple(dimension.strip() for dimension in args.by.split(","))
+unknown = set(dimensions) - set(DIMENSIONS)
+if unknown:
+    parser.error(f"unknown dimensions: {', '.join(sorted(unknown))}")
+
+client = None
+if args.source:
+    entries = read_entries(args.source)
+else:
+    client = TogglClient.from_config()
+    end = datetime.now(timezone.utc)
+    entries = api_entries(client, end - timedelta(days=args.days), end)
+totals = build_report(entries, dimensions)
+if client is not None:
+    client.close()
+
+# Project ids become names where the local metadata cache knows them (no network)
+cache = MetadataCache()
+names = {}
+for project in cache.all("projects"):
+    names[project["id"]] = names[str(project["id"])] = project["name"]
+cache.close()
+
+output = open(args.output, "w", newline="") if args.output else sys.stdout
+if args.format == "csv":
+    totals.write_csv(output, names)
+else:
+    totals.write_json(output, names)
+if args.output:
+    output.close()
@@ -0,0 +1,39 @@
+import argparse
+import logging
+from datetime import datetime, timedelta, timezone
+
+from toggl_client import TogglClient
+from toggl_entries import EntryMirror
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+parser = argparse.ArgumentParser(description="What you worked on, from the local mirror of your time entries.")
+parser.add_argument('--days', type=int, default=7, help='How far back to look')
+parser.add_argument('--project', type=int, help='Only entries in this project id')
+parser.add_argument('--search', help='Only entries with exactly this description (any case)')
+parser.add_argument('--offline', action='store_true', help="Don't sync with Toggl first")
+args = parser.parse_args()
+
+client = None if args.offline else TogglClient.from_config()
+mirror = EntryMirror(client=client)
+if client is not None and not mirror.sync():
+    print("Sync failed; showing the local copy")
+
+end = datetime.now(timezone.utc)
+start = end - timedelta(days=args.days)
+if args.search:
+    entries = mirror.with_description(args.search, start)
+elif args.project:
+    entries = mirror.for_project(args.project, start, end)
+else:
+    entries = mirror.between(start, end)
+for entry in entries:
+    minutes = entry["duration"] // 60 if entry["duration"] >= 0 else "running"
+    print(f"{entry['start'][:16]}  {minutes:>7}  {entry.get('description') or ''}")
+
+print(f"\nTotals for the last {args.days} days:")
+for description, seconds, count in mirror.totals(start, end):
+    print(f"{seconds / 3600:6.1f} h  {count:4}x  {description}")
+mirror.close()
+if client is not None:
+    client.close()
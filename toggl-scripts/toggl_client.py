@@ -0,0 +1,238 @@
+import base64
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+
+import requests
+
+from toggl_http import BURST, RATE_LIMIT, TogglHTTP
+
+CONFIG_PATH = "./config.json"
+RUNNING_ENTRY_PATH = "./toggl-running.json"  # Lets the CLI scripts share the cached running entry
+API_URL = "https://api.track.toggl.com/api/v9"
+
+DEFAULT_WORKSPACE_ID = 8404611  # Replace with your workspace ID (or set "workspace_id" in config.json)
+DEFAULT_PROJECT_ID = 204411781  # Replace with your project ID (or set "project_id" in config.json)
+
+
+def parse_time(value):
+    # Toggl returns "Z"-suffixed timestamps, which fromisoformat only accepts from 3.11 on
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+class TogglNotFoundError(Exception):
+    pass
+
+
+def load_config(path=CONFIG_PATH):
+    with open(path) as config_file:
+        return json.load(config_file)
+
+
+class TogglClient:
+    # One long-lived client per process: the requests.Session keeps the TLS
+    # connection to Toggl alive between calls, so a transition costs one
+    # round trip instead of an interpreter start + import + handshake.
+    # Every call goes through TogglHTTP (rate limit, timeouts, retries);
+    # pass rate_limit=None to talk to a local fake server unthrottled.
+    def __init__(self, api_key, workspace_id=DEFAULT_WORKSPACE_ID, project_id=DEFAULT_PROJECT_ID,
+                 api_url=API_URL, rate_limit=RATE_LIMIT, burst=BURST):
+        self.workspace_id = workspace_id
+        self.project_id = project_id
+        self.api_url = api_url.rstrip("/")
+        self.running_entry = None  # {"id", "start", "workspace_id"} of the entry we started, if any
+
+        encoded_credentials = base64.b64encode(f"{api_key}:api_token".encode()).decode()
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Authorization': f'Basic {encoded_credentials}',
+            'Content-Type': 'application/json'
+        })
+        self.http = TogglHTTP(self.session, api_key, rate_limit=rate_limit, burst=burst)
+
+    @classmethod
+    def from_config(cls, path=CONFIG_PATH):
+        config = load_config(path)
+        return cls(
+            config['api_key'],
+            workspace_id=config.get('workspace_id', DEFAULT_WORKSPACE_ID),
+            project_id=config.get('project_id', DEFAULT_PROJECT_ID),
+            api_url=config.get('api_url', API_URL),
+            rate_limit=config.get('rate_limit', RATE_LIMIT),
+            burst=config.get('burst', BURST),
+        )
+
+    def set_pool_size(self, size):
+        # Let up to `size` threads share this session without queueing for a connection
+        adapter = requests.adapters.HTTPAdapter(pool_connections=size, pool_maxsize=size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _request(self, method, path, **kwargs):
+        started = time.perf_counter()
+        response = self.http.request(method, f"{self.api_url}{path}", **kwargs)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logging.debug(f"Toggl {method} {path} -> {response.status_code} in {elapsed_ms:.1f} ms")
+        return response
+
+    def start_time_entry(self, description):
+        return self.create_time_entry(description, datetime.now(timezone.utc).isoformat())
+
+    def create_time_entry(self, description, start, stop=None, workspace_id=None, project_id=None, tags=None):
+        workspace_id = workspace_id or self.workspace_id
+        new_time_entry = {
+            "description": description,
+            "duration": -1,  # Indicates a running time entry
+            "created_with": "python_script",
+            "start": start,
+            "workspace_id": workspace_id,
+            "project_id": project_id or self.project_id
+        }
+        if stop is not None:
+            # Completed entry: explicit stop and duration in seconds
+            new_time_entry["stop"] = stop
+            new_time_entry["duration"] = int((parse_time(stop) - parse_time(start)).total_seconds())
+        if tags:
+            new_time_entry["tags"] = tags
+        response = self._request('POST', f'/workspaces/{workspace_id}/time_entries', json=new_time_entry)
+        if response.status_code == 200:
+            created_entry = response.json()
+            if stop is None:
+                self.running_entry = {"id": created_entry["id"], "start": created_entry.get("start", start),
+                                      "workspace_id": workspace_id}
+            return created_entry
+        logging.error(f"Error creating time entry: {response.status_code}, {response.text}")
+        return None
+
+    def update_time_entry(self, time_entry_id, changes, workspace_id=None):
+        workspace_id = workspace_id or self.workspace_id
+        response = self._request('PUT', f'/workspaces/{workspace_id}/time_entries/{time_entry_id}', json=changes)
+        if response.status_code == 200:
+            return response.json()
+        if response.status_code == 404:
+            raise TogglNotFoundError(f"Time entry {time_entry_id} not found")
+        logging.error(f"Error updating time entry {time_entry_id}: {response.status_code}, {response.text}")
+        return None
+
+    def get_time_entries(self, start_date=None, end_date=None, since=None):
+        # Entries starting in [start_date, end_date], or with since (epoch
+        # seconds) everything modified after it, deleted entries included
+        if since is not None:
+            params = {'since': int(since)}
+        else:
+            params = {'start_date': start_date, 'end_date': end_date}
+        response = self._request('GET', '/me/time_entries', params=params)
+        if response.status_code == 200:
+            return response.json() or []
+        logging.error(f"Error fetching time entries: {response.status_code}, {response.text}")
+        return None
+
+    def open_time_entries(self, start_date, end_date):
+        # Streaming get_time_entries: the response with its body still unread, for
+        # the caller to decode incrementally and close, or None on error
+        response = self._request('GET', '/me/time_entries', params={'start_date': start_date, 'end_date': end_date},
+                                 stream=True)
+        if response.status_code == 200:
+            return response
+        logging.error(f"Error fetching time entries: {response.status_code}, {response.text}")
+        response.close()
+        return None
+
+    def get_current_time_entry(self):
+        response = self._request('GET', '/me/time_entries/current')
+        if response.status_code == 200:
+            try:
+                current_entry = response.json()
+            except ValueError as e:
+                logging.error(f"Unexpected API response: {e}")
+                return None
+            if current_entry and 'id' in current_entry:
+                return current_entry
+            return None
+        if response.status_code != 404:
+            logging.error(f"Error getting current time entry: {response.status_code}, {response.text}")
+        return None
+
+    def stop_time_entry(self, time_entry_id, workspace_id=None):
+        workspace_id = workspace_id or self.workspace_id
+        response = self._request('PATCH', f'/workspaces/{workspace_id}/time_entries/{time_entry_id}/stop')
+        if response.status_code == 200:
+            if self.running_entry is not None and self.running_entry["id"] == time_entry_id:
+                self.running_entry = None
+            return response.json()
+        if response.status_code == 404:
+            raise TogglNotFoundError(f"Time entry {time_entry_id} not found")
+        logging.error(f"Error stopping time entry: {response.status_code}, {response.text}")
+        return None
+
+    def stop_current_time_entry(self):
+        # One PATCH against the entry we started; only look up /current when
+        # we have nothing cached or the cached entry is gone (404)
+        if self.running_entry is not None:
+            try:
+                return self.stop_time_entry(self.running_entry["id"], self.running_entry["workspace_id"])
+            except TogglNotFoundError:
+                logging.info("Cached time entry is stale, looking up the running entry")
+                self.running_entry = None
+        current_entry = self.get_current_time_entry()
+        if current_entry is None:
+            logging.info("No running time entry found.")
+            return None
+        try:
+            return self.stop_time_entry(current_entry['id'], current_entry.get('workspace_id'))
+        except TogglNotFoundError:
+            logging.info("Running time entry disappeared before it could be stopped.")
+            return None
+
+    def save_running_entry(self, path=RUNNING_ENTRY_PATH):
+        if self.running_entry is None:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        with open(path, 'w') as state_file:
+            json.dump(self.running_entry, state_file)
+
+    def load_running_entry(self, path=RUNNING_ENTRY_PATH):
+        try:
+            with open(path) as state_file:
+                self.running_entry = json.load(state_file)
+        except (OSError, ValueError):
+            self.running_entry = None
+
+    def list_workspace_items(self, kind, since=None, etag=None, last_modified=None, workspace_id=None):
+        # kind is "projects", "tags" or "clients". Returns (status, items, etag,
+        # last_modified); items is None on 304 Not Modified or an error.
+        workspace_id = workspace_id or self.workspace_id
+        params = {'since': int(since)} if since is not None else None
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        response = self._request('GET', f'/workspaces/{workspace_id}/{kind}', params=params, headers=headers)
+        if response.status_code == 200:
+            return (200, response.json() or [], response.headers.get('ETag'),
+                    response.headers.get('Last-Modified'))
+        if response.status_code != 304:
+            logging.error(f"Failed to fetch {kind}. Status code: {response.status_code}, {response.text}")
+        return response.status_code, None, etag, last_modified
+
+    def get_workspaces(self):
+        # Every workspace this token can see
+        response = self._request('GET', '/me/workspaces')
+        if response.status_code == 200:
+            return response.json() or []
+        logging.error(f"Failed to fetch workspaces. Status code: {response.status_code}, {response.text}")
+        return None
+
+    def get_projects(self):
+        response = self._request('GET', f'/workspaces/{self.workspace_id}/projects')
+        if response.status_code == 200:
+            return response.json()
+        logging.error(f"Failed to fetch projects. Status code: {response.status_code}, {response.text}")
+        return None
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,162 @@
+import logging
+import threading
+import time
+
+from toggl_journal import FSYNC_INTERVAL, TogglJournal, TogglReplayer
+
+RETRY_MIN = 2.0  # seconds before the first retry after a failed replay
+RETRY_MAX = 300.0  # backoff cap while Toggl is unreachable
+MAX_WAITING = 100  # entries whose completion callbacks are kept; older ones are forgotten
+
+
+class TogglDispatcher:
+    # Runs every Toggl call on one background thread so the Tk mainloop only
+    # hands work off. start()/stop() append to the write-ahead journal and
+    # return; the worker replays whatever is pending, so a transition costs
+    # the same whether or not the network is up. Completions are delivered
+    # through `post`, which the GUI wires to root.after so callbacks run back
+    # on the Tk thread.
+    def __init__(self, client, journal=None, post=None):
+        self.client = client
+        self.journal = journal if journal is not None else TogglJournal()
+        self.replayer = TogglReplayer(client, self.journal)
+        self.post = post
+        self.callbacks = {}  # client_id -> (stopped, [callback], submitted_at), oldest first
+        self.pending_reconcile = None  # (description, working) from a restored session
+        self.condition = threading.Condition()
+        self.wakeup = True  # Replay anything left over from a previous run
+        self.closed = False
+        self.worker = threading.Thread(target=self._run, name="toggl-dispatcher", daemon=True)
+        self.worker.start()
+
+    def start(self, description, on_complete=None):
+        client_id = self.journal.record_start(description, self.client.workspace_id, self.client.project_id)
+        if client_id is None:
+            logging.debug("Toggl entry already running, skipping start")
+            return
+        self._submit(client_id, False, on_complete)
+
+    def stop(self, on_complete=None, at=None):
+        client_id = self.journal.record_stop(at)
+        if client_id is None:
+            logging.info("No running time entry to stop")
+            return
+        self._submit(client_id, True, on_complete)
+
+    def reconcile(self, description, working):
+        # After restoring a session from its checkpoint: once the journal
+        # has replayed, make Toggl's running entry agree with the session
+        with self.condition:
+            self.pending_reconcile = (description, working)
+            self.wakeup = True
+            self.condition.notify()
+
+    def _reconcile(self, description, working):
+        current = self.client.get_current_time_entry()
+        ours = current is not None and current.get("description") == description
+        running = self.journal.running_entry()
+        if working and not ours:
+            logging.info(f"Restored work on '{description}' but Toggl isn't tracking it, starting an entry")
+            self.start(description)
+        elif working and running is None:
+            logging.warning(f"Toggl is tracking '{description}' but the journal has no record of starting it")
+        elif not working and ours and running is not None:
+            logging.info(f"Restored session isn't working, stopping Toggl entry '{description}'")
+            self.stop()
+
+    def _submit(self, client_id, stopped, on_complete):
+        with self.condition:
+            # One waiter per entry: a stop completes whatever its start was
+            # waiting for, so a long outage keeps one slot per entry, capped
+            waiting = self.callbacks.pop(client_id, None)
+            if waiting is None:
+                waiting = (stopped, [], time.perf_counter())
+                while len(self.callbacks) >= MAX_WAITING:
+                    oldest = next(iter(self.callbacks))
+                    del self.callbacks[oldest]
+                    logging.debug(f"Forgetting completion callbacks for Toggl entry {oldest}, "
+                                  "it still replays from the journal")
+            waiting = (waiting[0] or stopped, waiting[1], waiting[2])
+            if on_complete is not None:
+                waiting[1].append(on_complete)
+            self.callbacks[client_id] = waiting
+            self.wakeup = True
+            self.condition.notify()
+
+    def _run(self):
+        retry_delay = RETRY_MIN
+        next_retry = None
+        next_sync = time.monotonic() + FSYNC_INTERVAL
+        while True:
+            with self.condition:
+                while not self.wakeup and not self.closed:
+                    now = time.monotonic()
+                    deadline = next_sync if next_retry is None else min(next_sync, next_retry)
+                    if now >= deadline:
+                        break
+                    self.condition.wait(deadline - now)
+                closing = self.closed
+                self.wakeup = False
+
+            if time.monotonic() >= next_sync or closing:
+                self.journal.sync()
+                next_sync = time.monotonic() + FSYNC_INTERVAL
+
+            if next_retry is None or time.monotonic() >= next_retry or closing:
+                try:
+                    synced = self.replayer.replay()
+                except Exception as e:
+                    logging.error(f"Error replaying Toggl journal: {e}")
+                    synced = False
+                self._complete_acknowledged()
+                reconcile = self.pending_reconcile
+                if synced and reconcile is not None and not closing:
+                    try:
+                        self._reconcile(*reconcile)
+                    except Exception as e:
+                        logging.error(f"Error reconciling the restored session with Toggl: {e}")
+                    with self.condition:
+                        if self.pending_reconcile is reconcile:
+                            self.pending_reconcile = None
+                if synced:
+                    retry_delay = RETRY_MIN
+                    next_retry = None
+                else:
+                    logging.warning(f"Toggl unreachable, retrying in {retry_delay:.0f} s")
+                    next_retry = time.monotonic() + retry_delay
+                    retry_delay = min(retry_delay * 2, RETRY_MAX)
+
+            if closing:
+                return
+
+    def _complete_acknowledged(self):
+        pending = {entry.client_id: entry for entry in self.journal.pending()}
+        with self.condition:
+            finished = []
+            for client_id, (stopped, callbacks, submitted_at) in self.callbacks.items():
+                entry = pending.get(client_id)
+                if entry is None or (entry.entry_id is not None and not stopped):
+                    finished.append((client_id, stopped, callbacks, submitted_at))
+            for client_id, _, _, _ in finished:
+                del self.callbacks[client_id]
+        for client_id, stopped, callbacks, submitted_at in finished:
+            latency_ms = (time.perf_counter() - submitted_at) * 1000
+            logging.info(f"Toggl {'stop' if stopped else 'start'} synced in {latency_ms:.1f} ms")
+            for on_complete in callbacks:
+                self._deliver(on_complete, client_id)
+
+    def _deliver(self, callback, result):
+        if self.post is None:
+            callback(result)
+            return
+        try:
+            self.post(lambda: callback(result))
+        except Exception as e:
+            logging.error(f"Error posting Toggl completion: {e}")
+
+    def close(self, timeout=2.0):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.worker.join(timeout)
+        self.journal.close()
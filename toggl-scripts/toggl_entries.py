@@ -0,0 +1,253 @@
+import bisect
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+ENTRIES_PATH = "./toggl-entries.sqlite3"
+BACKFILL_DAYS = 365  # how far back the first sync reaches
+BACKFILL_WINDOW_DAYS = 30  # one request per window of start dates
+SINCE_OVERLAP = 60  # re-fetch a little before the last sync to cover clock skew
+CLOSE_TIMEOUT = 20.0  # seconds close() waits for a background sync to finish
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    workspace_id INTEGER,
+    project_id INTEGER,
+    description TEXT NOT NULL,
+    start TEXT NOT NULL,
+    stop TEXT,
+    duration INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_by_start ON entries (start);
+CREATE INDEX IF NOT EXISTS entries_by_project ON entries (project_id, start);
+CREATE INDEX IF NOT EXISTS entries_by_description ON entries (description COLLATE NOCASE, start);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+
+def utc_iso(moment):
+    # Entries are stored with UTC "+00:00" timestamps, so string order is time order
+    return moment.astimezone(timezone.utc).isoformat(timespec="seconds")
+
+
+class DescriptionIndex:
+    # In-memory prefix index over past descriptions for autocomplete: a
+    # sorted list of casefolded keys, so a prefix is a bisect away, and the
+    # matches are ranked by when each description was last used.
+    def __init__(self):
+        self.keys = []  # sorted casefolded descriptions
+        self.entries = {}  # casefolded -> (description as last written, last used ISO start)
+
+    def add(self, description, last_used):
+        key = description.casefold()
+        if not key.strip():
+            return
+        current = self.entries.get(key)
+        if current is None:
+            bisect.insort(self.keys, key)
+        elif current[1] > last_used:
+            return
+        self.entries[key] = (description, last_used)
+
+    def discard(self, description):
+        key = description.casefold()
+        if self.entries.pop(key, None) is not None:
+            del self.keys[bisect.bisect_left(self.keys, key)]
+
+    def complete(self, prefix, limit=8):
+        key = prefix.casefold()
+        if not key:
+            return []
+        first = bisect.bisect_left(self.keys, key)
+        last = bisect.bisect_left(self.keys, key + "\U0010ffff")
+        matches = sorted((self.entries[match] for match in self.keys[first:last]),
+                         key=lambda item: item[1], reverse=True)
+        return [description for description, _ in matches[:limit]]
+
+
+class EntryMirror:
+    # Local copy of the user's time entries in SQLite, indexed by start,
+    # project and description, so history queries are local and work
+    # offline. The first sync backfills BACKFILL_DAYS window by window
+    # (resuming where it stopped if interrupted); after that, sync() only
+    # asks Toggl for what changed `since` the last one.
+    def __init__(self, path=ENTRIES_PATH, client=None):
+        self.client = client
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self.descriptions = DescriptionIndex()
+        self.thread = None  # The background sync, while one runs
+        self.closed = False
+        with self.lock:
+            for description, last_used in self.db.execute(
+                    "SELECT description, MAX(start) FROM entries GROUP BY description"):
+                self.descriptions.add(description, last_used)
+
+    def _state(self, key):
+        row = self.db.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key, value):
+        self.db.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value))
+
+    def _store(self, items):
+        # Called with the lock held; False if the mirror was closed meanwhile
+        if self.closed:
+            return False
+        for item in items:
+            old = self.db.execute("SELECT description FROM entries WHERE id = ?", (item["id"],)).fetchone()
+            if item.get("server_deleted_at") or item.get("deleted_at"):
+                self.db.execute("DELETE FROM entries WHERE id = ?", (item["id"],))
+                if old is not None:
+                    self._reindex(old[0])
+                continue
+            start = utc_iso(datetime.fromisoformat(item["start"].replace("Z", "+00:00")))
+            stop = item.get("stop")
+            description = item.get("description") or ""
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries (id, workspace_id, project_id, description, start, stop, duration, "
+                "data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (item["id"], item.get("workspace_id"), item.get("project_id"), description, start,
+                 utc_iso(datetime.fromisoformat(stop.replace("Z", "+00:00"))) if stop else None,
+                 item.get("duration", -1), json.dumps(item)))
+            self.descriptions.add(description, start)
+            if old is not None and old[0].casefold() != description.casefold():
+                self._reindex(old[0])  # Renamed
+        return True
+
+    def _reindex(self, description):
+        # An entry left this description: it stays offered only while other entries use it
+        self.descriptions.discard(description)
+        row = self.db.execute("SELECT description, MAX(start) FROM entries WHERE description = ? COLLATE NOCASE",
+                              (description,)).fetchone()
+        if row[1] is not None:
+            self.descriptions.add(row[0], row[1])
+
+    def sync(self, client=None):
+        # Backfill if it hasn't finished, else fetch changes; returns True on success
+        client = client or self.client
+        with self.lock:
+            last_sync = self._state("last_sync")
+            backfilled_to = self._state("backfilled_to")
+        started = time.time()
+
+        if last_sync is None or backfilled_to is not None:
+            # Newest window first, so recent history is usable before the backfill finishes
+            now = datetime.now(timezone.utc)
+            horizon = now - timedelta(days=BACKFILL_DAYS)
+            window_end = datetime.fromtimestamp(backfilled_to, timezone.utc) if backfilled_to else \
+                now + timedelta(days=1)
+            if last_sync is None:
+                with self.lock:
+                    self._set_state("last_sync", started)  # changes from here on come via `since`
+                    self.db.commit()
+            count = 0
+            while window_end > horizon:
+                window_start = max(horizon, window_end - timedelta(days=BACKFILL_WINDOW_DAYS))
+                items = client.get_time_entries(window_start.isoformat(), window_end.isoformat())
+                if items is None:
+                    return False
+                with self.lock:
+                    if not self._store(items):
+                        return False
+                    self._set_state("backfilled_to", window_start.timestamp())
+                    self.db.commit()
+                count += len(items)
+                window_end = window_start
+            with self.lock:
+                if self.closed:
+                    return False
+                self.db.execute("DELETE FROM sync_state WHERE key = 'backfilled_to'")
+                self.db.commit()
+                last_sync = self._state("last_sync")
+            logging.info(f"Backfilled {count} time entries from the last {BACKFILL_DAYS} days")
+
+        items = client.get_time_entries(since=last_sync - SINCE_OVERLAP)
+        if items is None:
+            return False
+        with self.lock:
+            if not self._store(items):
+                return False
+            self._set_state("last_sync", started)
+            self.db.commit()
+        logging.info(f"Synced time entries: {len(items)} changed")
+        return True
+
+    def sync_in_background(self, client=None):
+        def run():
+            try:
+                self.sync(client)
+            except Exception as e:
+                logging.error(f"Error syncing time entries: {e}")
+            finally:
+                with self.lock:
+                    self.thread = None
+
+        with self.lock:
+            if self.closed or self.thread is not None:
+                return
+            self.thread = threading.Thread(target=run, name="entry-mirror", daemon=True)
+            self.thread.start()
+
+    def _query(self, sql, params=()):
+        with self.lock:
+            rows = self.db.execute(sql, params).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def between(self, start, end):
+        # Entries that started in [start, end), oldest first
+        return self._query("SELECT data FROM entries WHERE start >= ? AND start < ? ORDER BY start",
+                           (utc_iso(start), utc_iso(end)))
+
+    def for_project(self, project_id, start=None, end=None):
+        return self._query("SELECT data FROM entries WHERE project_id = ? AND start >= ? AND start < ? "
+                           "ORDER BY start", (project_id, utc_iso(start) if start else "",
+                                              utc_iso(end) if end else "9999"))
+
+    def with_description(self, description, start=None, limit=100):
+        # Newest first
+        return self._query("SELECT data FROM entries WHERE description = ? COLLATE NOCASE AND start >= ? "
+                           "ORDER BY start DESC LIMIT ?", (description, utc_iso(start) if start else "", limit))
+
+    def running(self):
+        entries = self._query("SELECT data FROM entries WHERE stop IS NULL AND duration < 0 "
+                              "ORDER BY start DESC LIMIT 1")
+        return entries[0] if entries else None
+
+    def totals(self, start, end, by="description"):
+        # [(description or project_id, seconds, entries)] for entries started in [start, end)
+        column = {"description": "description", "project": "project_id"}[by]
+        with self.lock:
+            return self.db.execute(
+                f"SELECT {column}, SUM(CASE WHEN duration >= 0 THEN duration "
+                f"ELSE strftime('%s', 'now') - strftime('%s', start) END), COUNT(*) FROM entries "
+                f"WHERE start >= ? AND start < ? GROUP BY {column} ORDER BY 2 DESC",
+                (utc_iso(start), utc_iso(end))).fetchall()
+
+    def complete(self, prefix, limit=8):
+        with self.lock:
+            return self.descriptions.complete(prefix, limit)
+
+    def remember(self, description):
+        # A description just used locally ranks first before Toggl has it
+        with self.lock:
+            self.descriptions.add(description, utc_iso(datetime.now(timezone.utc)))
+
+    def close(self):
+        # Lets a background sync finish first, so it never writes to a closed database
+        with self.lock:
+            thread = self.thread
+        if thread is not None:
+            thread.join(CLOSE_TIMEOUT)
+        with self.lock:
+            self.closed = True
+            self.db.close()
@@ -0,0 +1,194 @@
+import logging
+import random
+import threading
+import time
+
+import requests
+
+RATE_LIMIT = 1.0  # requests per second per API token; Toggl's documented safe rate
+BURST = 3  # requests allowed back to back before the rate applies
+CONNECT_TIMEOUT = 3.05  # seconds; just over a TCP retransmit window
+READ_TIMEOUT = 15.0  # seconds
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5  # seconds; doubled per attempt, with full jitter
+BACKOFF_MAX = 30.0
+RETRY_AFTER_MAX = 300.0  # never sleep longer than this on a server's say-so
+
+# Safe to repeat: retried on 5xx and dropped connections as well as 429.
+# A POST is only repeated when it provably never reached Toggl.
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "PATCH", "DELETE")
+
+
+class TokenBucket:
+    # Client-side rate limiter shared by every thread using one API token.
+    # acquire() blocks until a request may go out; pause() empties the
+    # bucket for a while, which is how a 429's Retry-After holds back all
+    # the other threads and not just the one that was throttled.
+    def __init__(self, rate=RATE_LIMIT, burst=BURST, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = threading.Lock()
+        self.tokens = burst
+        self.updated = clock()
+
+    def acquire(self):
+        # Returns the seconds spent waiting
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            self.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds):
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.tokens, 0) - seconds * self.rate
+            self.updated = now
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def bucket_for(api_key, rate=RATE_LIMIT, burst=BURST):
+    # Clients in one process that share a token must share its budget too
+    with _buckets_lock:
+        bucket = _buckets.get(api_key)
+        if bucket is None:
+            bucket = _buckets[api_key] = TokenBucket(rate, burst)
+        return bucket
+
+
+def retry_after_seconds(response):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return min(max(float(value), 0.0), RETRY_AFTER_MAX)
+    except ValueError:
+        return None  # HTTP-date form; Toggl sends seconds
+
+
+def connection_refused(error):
+    # Whether a ConnectionRefusedError is anywhere behind a requests error.
+    # requests wraps urllib3's MaxRetryError in args[0]; its .reason is the
+    # NewConnectionError raised from (or while handling) the socket's error.
+    seen = set()
+    errors = [error]
+    while errors:
+        error = errors.pop()
+        if error is None or id(error) in seen:
+            continue
+        seen.add(id(error))
+        if isinstance(error, ConnectionRefusedError):
+            return True
+        errors.extend([error.__cause__, error.__context__, getattr(error, "reason", None)])
+        errors.extend(arg for arg in error.args if isinstance(arg, BaseException))
+    return False
+
+
+class TogglHTTP:
+    # The one way out to the Toggl API. Every request waits for the token's
+    # bucket, carries connect/read timeouts, and is retried when that is
+    # safe: 429s after Retry-After (or a backoff), and for idempotent
+    # methods also 5xx and connection errors, with jittered exponential
+    # backoff. A response is returned once it is final; the exception from
+    # the last attempt is raised if Toggl could never be reached.
+    def __init__(self, session, api_key, rate_limit=RATE_LIMIT, burst=BURST, max_retries=MAX_RETRIES,
+                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)):
+        self.session = session
+        self.bucket = bucket_for(api_key, rate_limit, burst) if rate_limit else None
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0  # 429 responses
+        self.server_errors = 0  # 5xx responses
+        self.connection_errors = 0
+        self.wait_seconds = 0.0  # time spent held back by the bucket
+        self.observe = None  # Optional observe(method, status or None, seconds) called per attempt
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                waited = self.bucket.acquire()
+                if waited:
+                    self._count("wait_seconds", waited)
+            self._count("requests")
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.ConnectionError as e:
+                self._observe(method, None, started)
+                self._count("connection_errors")
+                # A refused or timed-out connect never delivered the request
+                never_sent = isinstance(e, requests.ConnectTimeout) or connection_refused(e)
+                if attempt >= self.max_retries or not (idempotent or never_sent):
+                    raise
+                delay = self._backoff(attempt)
+                logging.warning(f"Toggl {method} failed ({e}), retrying in {delay:.1f} s")
+            except requests.Timeout:
+                self._observe(method, None, started)
+                self._count("connection_errors")
+                if attempt >= self.max_retries or not idempotent:
+                    raise
+                delay = self._backoff(attempt)
+                logging.warning(f"Toggl {method} timed out, retrying in {delay:.1f} s")
+            else:
+                self._observe(method, response.status_code, started)
+                if response.status_code == 429:
+                    self._count("throttled")
+                    retry_after = retry_after_seconds(response)
+                    delay = retry_after if retry_after is not None else self._backoff(attempt)
+                    if self.bucket is not None:
+                        self.bucket.pause(delay)
+                        delay = 0  # The bucket makes us (and everyone else) wait
+                elif response.status_code >= 500:
+                    self._count("server_errors")
+                    if not idempotent:
+                        return response
+                    delay = self._backoff(attempt)
+                else:
+                    return response
+                if attempt >= self.max_retries:
+                    return response
+                logging.warning(f"Toggl {method} got {response.status_code}, retrying")
+            attempt += 1
+            self._count("retries")
+            if delay:
+                time.sleep(delay)
+
+    def _observe(self, method, status, started):
+        if self.observe is not None:
+            self.observe(method, status, time.perf_counter() - started)
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+    def _count(self, counter, amount=1):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def counters(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "server_errors": self.server_errors,
+                "connection_errors": self.connection_errors,
+                "wait_seconds": round(self.wait_seconds, 3),
+            }
@@ -0,0 +1,198 @@
+import csv
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from toggl_client import parse_time
+
+WORKERS = 8  # concurrent POSTs, each on its own pooled keep-alive connection
+WINDOW_PER_WORKER = 4  # rows read ahead per worker; bounds memory whatever the file size
+CHECKPOINT_EVERY = 2.0  # seconds between checkpoint writes
+PROGRESS_EVERY = 5.0  # seconds between throughput log lines
+
+
+class MalformedRow:
+    # Stands in for a JSONL line that isn't valid JSON, so one bad line
+    # fails on its own instead of ending the whole stream
+    def __init__(self, line_number, text, error):
+        self.line_number = line_number
+        self.text = text
+        self.error = error
+
+
+def read_rows(path):
+    # Yields one dict per entry from a .csv (header row) or .jsonl file,
+    # streaming; None for a blank line and a MalformedRow for a corrupt one
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            yield from csv.DictReader(f)
+        return
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                yield None
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield MalformedRow(line_number, line, str(e))
+
+
+def completed_entry(row):
+    # Normalizes a row to create_time_entry arguments. Rows need a
+    # description, a start, and either a stop or a duration in seconds.
+    start = parse_time(row["start"])
+    if row.get("stop"):
+        stop = parse_time(row["stop"])
+    else:
+        stop = start + timedelta(seconds=int(float(row["duration"])))
+    if stop <= start:
+        raise ValueError(f"stop {stop.isoformat()} is not after start {start.isoformat()}")
+    tags = row.get("tags") or None
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    return {
+        "description": row.get("description") or "",
+        "start": start.isoformat(),
+        "stop": stop.isoformat(),
+        "workspace_id": int(row["workspace_id"]) if row.get("workspace_id") else None,
+        "project_id": int(row["project_id"]) if row.get("project_id") else None,
+        "tags": tags,
+    }
+
+
+class ImportCheckpoint:
+    # Which rows are done, in constant space: every row up to `watermark` is
+    # done, plus the handful finished ahead of it (at most the in-flight
+    # window). Written atomically, so a kill at any point resumes cleanly.
+    def __init__(self, path, source):
+        self.path = path
+        self.source = os.path.abspath(source)
+        self.watermark = -1
+        self.ahead = set()
+        self.saved_at = 0
+        if path and os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            if state.get("source") == self.source:
+                self.watermark = state["watermark"]
+                self.ahead = set(state["ahead"])
+            else:
+                logging.warning(f"Checkpoint {path} is for {state.get('source')}, starting over")
+
+    def is_done(self, index):
+        return index <= self.watermark or index in self.ahead
+
+    def mark(self, index):
+        self.ahead.add(index)
+        while self.watermark + 1 in self.ahead:
+            self.watermark += 1
+            self.ahead.discard(self.watermark)
+
+    def save(self, force=False):
+        if not self.path or (not force and time.monotonic() - self.saved_at < CHECKPOINT_EVERY):
+            return
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"source": self.source, "watermark": self.watermark, "ahead": sorted(self.ahead)}, f)
+        os.replace(temp_path, self.path)
+        self.saved_at = time.monotonic()
+
+
+class TogglImporter:
+    # Pushes a CSV/JSONL file of finished sessions into Toggl as completed
+    # entries. Rows are read lazily and only a small window is in flight,
+    # spread over a pool of threads that share one client's keep-alive
+    # connections. Rows Toggl rejects go to `failed_path` (as JSONL, ready
+    # to fix and re-import) and are not retried on resume.
+    def __init__(self, client, workers=WORKERS, checkpoint_path=None, failed_path=None):
+        self.client = client
+        self.workers = workers
+        self.checkpoint_path = checkpoint_path
+        self.failed_path = failed_path
+        self.client.set_pool_size(workers)
+        self.created = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def _push(self, row):
+        entry = completed_entry(row)
+        created = self.client.create_time_entry(entry.pop("description"), entry.pop("start"), **entry)
+        if created is None:
+            raise RuntimeError("Toggl rejected the entry")
+        return created
+
+    def run(self, path):
+        checkpoint = ImportCheckpoint(self.checkpoint_path, path)
+        failed_file = open(self.failed_path, "a") if self.failed_path else None
+        in_flight = {}  # future -> (row index, row)
+        started = last_progress = time.monotonic()
+
+        def collect(done):
+            nonlocal last_progress
+            for future in done:
+                index, row = in_flight.pop(future)
+                try:
+                    future.result()
+                    self.created += 1
+                except Exception as e:
+                    self.failed += 1
+                    logging.error(f"Row {index + 1} not imported: {e}")
+                    if failed_file:
+                        failed_file.write(json.dumps(dict(row, error=str(e))) + "\n")
+                checkpoint.mark(index)
+            if failed_file:
+                failed_file.flush()
+            checkpoint.save()
+            now = time.monotonic()
+            if now - last_progress >= PROGRESS_EVERY:
+                last_progress = now
+                logging.info(f"Imported {self.created} entries ({self.created / (now - started):.1f}/s), "
+                             f"{self.failed} failed")
+
+        try:
+            with ThreadPoolExecutor(self.workers, thread_name_prefix="toggl-import") as executor:
+                for index, row in enumerate(read_rows(path)):
+                    if checkpoint.is_done(index):
+                        self.skipped += 1
+                        continue
+                    if row is None:  # Blank line
+                        checkpoint.mark(index)
+                        continue
+                    if isinstance(row, MalformedRow):
+                        self.failed += 1
+                        logging.error(f"Row {index + 1} not imported: line {row.line_number} is not JSON: {row.error}")
+                        if failed_file:
+                            failed_file.write(json.dumps({"line": row.line_number, "text": row.text,
+                                                          "error": row.error}) + "\n")
+                        checkpoint.mark(index)
+                        continue
+                    while len(in_flight) >= self.workers * WINDOW_PER_WORKER:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        collect(done)
+                    in_flight[executor.submit(self._push, row)] = (index, row)
+                while in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+        finally:
+            # Interrupted: leaving the pool above let the submitted rows finish, so record them
+            collect([future for future in in_flight if future.done()])
+            checkpoint.save(force=True)
+            if failed_file:
+                failed_file.close()
+
+        elapsed = time.monotonic() - started
+        report = {
+            "created": self.created,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "seconds": round(elapsed, 3),
+            "entries_per_second": round(self.created / elapsed, 1) if elapsed else None,
+            "http": self.client.http.counters(),
+        }
+        logging.info(f"Import finished: {report}")
+        return report
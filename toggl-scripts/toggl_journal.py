@@ -0,0 +1,277 @@
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from toggl_client import TogglNotFoundError, parse_time
+
+JOURNAL_PATH = "./toggl-journal.jsonl"
+FSYNC_INTERVAL = 1.0  # seconds between batched fsyncs
+COMPACT_AFTER = 500  # records appended before a fully synced journal is rewritten
+MIN_ENTRY_SECONDS = 1  # unsent entries shorter than this are dropped instead of created
+
+# Record types. Every start/stop is appended before anything touches the
+# network; the acks are appended once Toggl has confirmed the operation.
+START = "start"
+STOP = "stop"
+CREATED = "created"
+STOPPED = "stopped"
+DROPPED = "dropped"
+
+
+def utc_now():
+    # Toggl keeps second precision, so keep journal times comparable with its responses
+    return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+
+
+class JournalEntry:
+    def __init__(self, client_id, description, start, workspace_id, project_id):
+        self.client_id = client_id  # Our own ID, used to reconcile replays
+        self.description = description
+        self.start = start
+        self.workspace_id = workspace_id
+        self.project_id = project_id
+        self.stop = None
+        self.entry_id = None  # Toggl's ID once the create is acknowledged
+        self.stop_synced = False
+        self.done = False
+        self.attempted = False  # A create may have reached Toggl without us seeing the reply
+
+    def copy(self):
+        entry = JournalEntry(self.client_id, self.description, self.start, self.workspace_id, self.project_id)
+        entry.__dict__.update(self.__dict__)
+        return entry
+
+
+class TogglJournal:
+    # Append-only write-ahead log of time entries. Appends are a buffered
+    # write + flush (microseconds); fsync happens in batches from sync(),
+    # which the dispatcher worker calls at most every FSYNC_INTERVAL.
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}  # client_id -> JournalEntry, in start order
+        self.dirty = False
+        self.appended = 0
+        self.load()
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as journal_file:
+            for line in journal_file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-append; everything before it is intact
+                    logging.warning("Ignoring unreadable journal record")
+                    continue
+                self._apply(record)
+        for entry in self.entries.values():
+            # We can't know whether an unacknowledged create reached Toggl
+            if entry.entry_id is None:
+                entry.attempted = True
+        logging.info(f"Loaded journal with {len(self.pending())} pending entries")
+
+    def _apply(self, record):
+        kind = record["type"]
+        if kind == START:
+            self.entries[record["client_id"]] = JournalEntry(
+                record["client_id"], record["description"], record["start"],
+                record["workspace_id"], record["project_id"])
+            return
+        entry = self.entries.get(record["client_id"])
+        if entry is None:
+            return
+        if kind == STOP:
+            entry.stop = record["stop"]
+        elif kind == CREATED:
+            entry.entry_id = record["entry_id"]
+            entry.stop_synced = record.get("stop_synced", False)
+        elif kind == STOPPED:
+            entry.stop_synced = True
+        elif kind == DROPPED:
+            entry.done = True
+        if entry.entry_id is not None and entry.stop is not None and entry.stop_synced:
+            entry.done = True
+        if entry.done:
+            del self.entries[entry.client_id]
+
+    def _append(self, record):
+        # Called with the lock held
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.file.flush()
+        self.dirty = True
+        self.appended += 1
+        self._apply(record)
+
+    def running_entry(self):
+        with self.lock:
+            return self._running_entry()
+
+    def _running_entry(self):
+        for entry in reversed(list(self.entries.values())):
+            if entry.stop is None:
+                return entry
+        return None
+
+    def record_start(self, description, workspace_id, project_id):
+        with self.lock:
+            now = utc_now()
+            running = self._running_entry()
+            if running is not None:
+                if running.description == description:
+                    # Already tracking this (e.g. break_timer_end then start_work)
+                    return None
+                # Toggl stops the running entry when a new one starts; mirror that
+                self._append({"type": STOP, "client_id": running.client_id, "stop": now})
+            client_id = uuid.uuid4().hex
+            self._append({"type": START, "client_id": client_id, "description": description, "start": now,
+                          "workspace_id": workspace_id, "project_id": project_id})
+            return client_id
+
+    def record_stop(self, at=None):
+        # at: ISO stop time, if the entry ended before now
+        with self.lock:
+            running = self._running_entry()
+            if running is None:
+                return None
+            self._append({"type": STOP, "client_id": running.client_id, "stop": at or utc_now()})
+            return running.client_id
+
+    def mark_attempted(self, client_id):
+        # In-memory only: after a restart every unacknowledged entry counts as attempted
+        with self.lock:
+            entry = self.entries.get(client_id)
+            if entry is not None:
+                entry.attempted = True
+
+    def mark_created(self, client_id, entry_id, stop_synced=False):
+        with self.lock:
+            self._append({"type": CREATED, "client_id": client_id, "entry_id": entry_id,
+                          "stop_synced": stop_synced})
+
+    def mark_stopped(self, client_id):
+        with self.lock:
+            self._append({"type": STOPPED, "client_id": client_id})
+
+    def mark_dropped(self, client_id):
+        with self.lock:
+            self._append({"type": DROPPED, "client_id": client_id})
+
+    def pending(self):
+        # Snapshot of entries that still need something from Toggl
+        with self.lock:
+            return [entry.copy() for entry in self.entries.values()
+                    if entry.entry_id is None or (entry.stop is not None and not entry.stop_synced)]
+
+    def sync(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            os.fsync(self.file.fileno())
+            self.dirty = False
+            if self.appended >= COMPACT_AFTER:
+                self._compact()
+
+    def _compact(self):
+        # Rewrite the journal with only the live entries; called with the lock held
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as temp_file:
+            for entry in self.entries.values():
+                temp_file.write(json.dumps({"type": START, "client_id": entry.client_id,
+                                            "description": entry.description, "start": entry.start,
+                                            "workspace_id": entry.workspace_id,
+                                            "project_id": entry.project_id}) + "\n")
+                if entry.stop is not None:
+                    temp_file.write(json.dumps({"type": STOP, "client_id": entry.client_id,
+                                                "stop": entry.stop}) + "\n")
+                if entry.entry_id is not None:
+                    temp_file.write(json.dumps({"type": CREATED, "client_id": entry.client_id,
+                                                "entry_id": entry.entry_id,
+                                                "stop_synced": entry.stop_synced}) + "\n")
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        self.file.close()
+        os.replace(temp_path, self.path)
+        self.file = open(self.path, "a", encoding="utf-8")
+        self.appended = 0
+        logging.debug("Compacted Toggl journal")
+
+    def close(self):
+        self.sync()
+        with self.lock:
+            self.file.close()
+
+
+class TogglReplayer:
+    # Pushes pending journal entries to Toggl. Creates carry the journaled
+    # start (and stop, when known), so a replay an hour late still records
+    # the real times; entries whose create may already have landed are
+    # first matched against Toggl by start time + description.
+    def __init__(self, client, journal):
+        self.client = client
+        self.journal = journal
+
+    def replay(self):
+        # One request per pending entry, oldest first. Toggl's API has no
+        # bulk create, and its bulk PATCH sets one value for every ID, while
+        # each entry needs its own stop. The requests are already minimal:
+        # an entry that ended offline is created with its stop in one call.
+        pending = self.journal.pending()
+        if not pending:
+            return True
+        if not self._reconcile([entry for entry in pending if entry.attempted and entry.entry_id is None]):
+            return False
+        for entry in self.journal.pending():
+            if not self._push(entry):
+                return False
+        return True
+
+    def _reconcile(self, entries):
+        if not entries:
+            return True
+        earliest = min(parse_time(entry.start) for entry in entries)
+        remote = self.client.get_time_entries(
+            (earliest - timedelta(minutes=1)).isoformat(),
+            (datetime.now(timezone.utc) + timedelta(minutes=1)).isoformat())
+        if remote is None:
+            return False
+        by_key = {(parse_time(item["start"]), item.get("description")): item for item in remote}
+        for entry in entries:
+            match = by_key.get((parse_time(entry.start), entry.description))
+            if match is not None:
+                logging.info(f"Reconciled journal entry {entry.client_id} with Toggl entry {match['id']}")
+                self.journal.mark_created(entry.client_id, match["id"],
+                                          stop_synced=match.get("stop") is not None and entry.stop is not None)
+        return True
+
+    def _push(self, entry):
+        if entry.entry_id is None:
+            if entry.stop is not None and \
+                    (parse_time(entry.stop) - parse_time(entry.start)).total_seconds() < MIN_ENTRY_SECONDS:
+                self.journal.mark_dropped(entry.client_id)
+                return True
+            self.journal.mark_attempted(entry.client_id)
+            created = self.client.create_time_entry(entry.description, entry.start, stop=entry.stop,
+                                                    workspace_id=entry.workspace_id,
+                                                    project_id=entry.project_id)
+            if created is None:
+                return False
+            self.journal.mark_created(entry.client_id, created["id"], stop_synced=entry.stop is not None)
+            return True
+        # Stop by the cached Toggl ID: one request, and it can't hit an entry
+        # someone started from another device
+        try:
+            updated = self.client.update_time_entry(entry.entry_id, {"stop": entry.stop},
+                                                    workspace_id=entry.workspace_id)
+        except TogglNotFoundError:
+            logging.warning(f"Toggl entry {entry.entry_id} was deleted, nothing left to stop")
+            updated = {}
+        if updated is None:
+            return False
+        self.journal.mark_stopped(entry.client_id)
+        return True
@@ -0,0 +1,264 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+METADATA_PATH = "./toggl-metadata.sqlite3"
+KINDS = ("projects", "tags", "clients")
+MAX_AGE = 300  # seconds before a lookup triggers a background revalidation
+SINCE_OVERLAP = 60  # re-fetch a little before the last sync to cover clock skew
+WORKERS = 8  # concurrent requests when refreshing every workspace
+CLOSE_TIMEOUT = 20.0  # seconds close() waits for background refreshes to finish
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    kind TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    workspace_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (kind, id)
+);
+CREATE INDEX IF NOT EXISTS items_by_name ON items (kind, name COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS sync_state (
+    kind TEXT NOT NULL,
+    workspace_id INTEGER NOT NULL,
+    synced_at REAL NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    PRIMARY KEY (kind, workspace_id)
+);
+"""
+
+
+class MetadataCache:
+    # Local copy of projects, tags and clients, persisted in SQLite and
+    # mirrored into in-memory name/ID indexes so lookups never touch the
+    # network. Refreshes are incremental (`since` plus ETag/Last-Modified);
+    # lookups against data older than max_age serve what's cached and
+    # revalidate on a background thread (stale-while-revalidate). Short-lived
+    # scripts pass revalidate=False and call refresh() themselves.
+    def __init__(self, path=METADATA_PATH, client=None, max_age=MAX_AGE, revalidate=True):
+        self.client = client
+        self.max_age = max_age
+        self.revalidate = revalidate
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self.by_id = {kind: {} for kind in KINDS}
+        self.by_name = {kind: {} for kind in KINDS}  # casefolded name -> {workspace_id: item}
+        self.workspaces = {}  # id -> workspace, as last discovered
+        self.failures = {}  # (kind, workspace_id) -> HTTP status of the last failed refresh
+        self.synced_at = {}  # (kind, workspace_id) -> epoch seconds
+        self.hits = 0
+        self.misses = 0
+        self.refreshing = {}  # (kind, workspace_id) -> background refresh thread
+        self.closed = False
+        self._load()
+
+    def _load(self):
+        with self.lock:
+            for kind, workspace_id, data in self.db.execute("SELECT kind, workspace_id, data FROM items"):
+                item = json.loads(data)
+                if kind == "workspaces":
+                    self.workspaces[item["id"]] = item
+                else:
+                    item.setdefault("workspace_id", workspace_id)
+                    self._index(kind, item)
+            for kind, workspace_id, synced_at in self.db.execute(
+                    "SELECT kind, workspace_id, synced_at FROM sync_state"):
+                self.synced_at[(kind, workspace_id)] = synced_at
+
+    def _index(self, kind, item):
+        self.by_id[kind][item["id"]] = item
+        self.by_name[kind].setdefault(item["name"].casefold(), {})[item["workspace_id"]] = item
+
+    def _unindex(self, kind, item_id):
+        item = self.by_id[kind].pop(item_id, None)
+        if item is None:
+            return
+        matches = self.by_name[kind].get(item["name"].casefold(), {})
+        if matches.get(item["workspace_id"]) is item:
+            del matches[item["workspace_id"]]
+            if not matches:
+                del self.by_name[kind][item["name"].casefold()]
+
+    def lookup(self, kind, name, workspace_id=None):
+        # The same name can exist in several workspaces: the given one wins,
+        # then the client's default workspace, then whichever was synced first
+        with self.lock:
+            matches = self.by_name[kind].get(name.casefold(), {})
+            if workspace_id is not None:
+                item = matches.get(workspace_id)
+            else:
+                default = self.client.workspace_id if self.client is not None else None
+                item = matches.get(default) or next(iter(matches.values()), None)
+            if item is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        # A miss may just be something created since the last sync
+        self._revalidate_if_stale(kind, force=item is None)
+        return item
+
+    def get(self, kind, item_id):
+        with self.lock:
+            item = self.by_id[kind].get(item_id)
+            if item is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        self._revalidate_if_stale(kind, force=item is None)
+        return item
+
+    def all(self, kind, workspace_id=None):
+        with self.lock:
+            return sorted((item for item in self.by_id[kind].values()
+                           if workspace_id is None or item["workspace_id"] == workspace_id),
+                          key=lambda item: item["name"].casefold())
+
+    def names(self, kind):
+        with self.lock:
+            return sorted((item["name"] for item in self.by_id[kind].values()), key=str.casefold)
+
+    def _revalidate_if_stale(self, kind, force=False):
+        if self.client is None or not self.revalidate:
+            return
+        workspace_id = self.client.workspace_id
+        age = time.time() - self.synced_at.get((kind, workspace_id), 0)
+        if age < self.max_age and not force:
+            return
+        with self.lock:
+            if self.closed or (kind, workspace_id) in self.refreshing:
+                return
+            thread = self.refreshing[(kind, workspace_id)] = threading.Thread(
+                target=self._background_refresh, args=(kind, workspace_id), name=f"metadata-{kind}", daemon=True)
+        thread.start()
+
+    def _background_refresh(self, kind, workspace_id):
+        try:
+            self.refresh(kind, workspace_id)
+        except Exception as e:
+            logging.error(f"Error refreshing {kind}: {e}")
+        finally:
+            with self.lock:
+                self.refreshing.pop((kind, workspace_id), None)
+
+    def refresh(self, kind, workspace_id=None, client=None):
+        # Fetch what changed since the last sync; returns True on success
+        client = client or self.client
+        workspace_id = workspace_id or client.workspace_id
+        with self.lock:
+            if self.closed:
+                return False
+            row = self.db.execute("SELECT synced_at, etag, last_modified FROM sync_state "
+                                  "WHERE kind = ? AND workspace_id = ?", (kind, workspace_id)).fetchone()
+        synced_at, etag, last_modified = row if row else (None, None, None)
+        since = synced_at - SINCE_OVERLAP if synced_at else None
+        started = time.time()
+
+        status, items, etag, last_modified = client.list_workspace_items(
+            kind, since=since, etag=etag, last_modified=last_modified, workspace_id=workspace_id)
+        if status not in (200, 304):
+            with self.lock:
+                self.failures[(kind, workspace_id)] = status
+            return False
+
+        with self.lock:
+            if self.closed:
+                # close() gave up waiting for this refresh
+                return False
+            for item in items or []:
+                if item.get("server_deleted_at") or item.get("deleted_at"):
+                    self._unindex(kind, item["id"])
+                    self.db.execute("DELETE FROM items WHERE kind = ? AND id = ?", (kind, item["id"]))
+                    continue
+                # Clients only carry "wid"; every item gets the ID the index is keyed on
+                item.setdefault("workspace_id", workspace_id)
+                self._unindex(kind, item["id"])
+                self._index(kind, item)
+                self.db.execute("INSERT OR REPLACE INTO items (kind, id, workspace_id, name, data) "
+                                "VALUES (?, ?, ?, ?, ?)",
+                                (kind, item["id"], workspace_id, item["name"], json.dumps(item)))
+            self.db.execute("INSERT OR REPLACE INTO sync_state (kind, workspace_id, synced_at, etag, last_modified) "
+                            "VALUES (?, ?, ?, ?, ?)", (kind, workspace_id, started, etag, last_modified))
+            self.db.commit()
+            self.synced_at[(kind, workspace_id)] = started
+            self.failures.pop((kind, workspace_id), None)
+        logging.info(f"Synced {kind} in workspace {workspace_id}: {len(items or [])} changed"
+                     + (" (not modified)" if status == 304 else ""))
+        return True
+
+    def refresh_all(self, workspace_id=None):
+        return all([self.refresh(kind, workspace_id) for kind in KINDS])
+
+    def discover_workspaces(self, client=None):
+        # Every workspace the token can access, remembered for offline use; None on error
+        workspaces = (client or self.client).get_workspaces()
+        if workspaces is None:
+            return None
+        with self.lock:
+            self.workspaces = {workspace["id"]: workspace for workspace in workspaces}
+            self.db.execute("DELETE FROM items WHERE kind = 'workspaces'")
+            self.db.executemany("INSERT INTO items (kind, id, workspace_id, name, data) VALUES (?, ?, ?, ?, ?)",
+                                [("workspaces", workspace["id"], workspace["id"], workspace["name"],
+                                  json.dumps(workspace)) for workspace in workspaces])
+            self.db.commit()
+        return workspaces
+
+    def refresh_workspaces(self, workspace_ids=None, kinds=KINDS, workers=WORKERS, client=None):
+        # Refreshes every kind in every workspace (all the token can see,
+        # unless given) at once on a bounded pool, so the run takes about as
+        # long as the slowest workspace rather than the sum of them. All
+        # results land in this cache's merged index. A failing workspace is
+        # reported, never fatal: {"workspaces": {id: {"name", "refreshed",
+        # "failed": {kind: reason}, "seconds"}}, "seconds": wall time}.
+        client = client or self.client
+        started = time.perf_counter()
+        if workspace_ids is None:
+            workspaces = self.discover_workspaces(client)
+            if workspaces is None:
+                raise IOError("Could not list workspaces")
+            workspace_ids = [workspace["id"] for workspace in workspaces]
+        report = {workspace_id: {"name": self.workspaces.get(workspace_id, {}).get("name"), "refreshed": [],
+                                 "failed": {}, "seconds": 0.0} for workspace_id in workspace_ids}
+        client.set_pool_size(workers)
+
+        def refresh(kind, workspace_id):
+            ok = self.refresh(kind, workspace_id, client=client)
+            return ok, time.perf_counter() - started
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="metadata") as pool:
+            futures = {pool.submit(refresh, kind, workspace_id): (kind, workspace_id)
+                       for workspace_id in workspace_ids for kind in kinds}
+            for future in as_completed(futures):
+                kind, workspace_id = futures[future]
+                result = report[workspace_id]
+                try:
+                    ok, finished = future.result()
+                except Exception as e:
+                    ok, finished = False, time.perf_counter() - started
+                    result["failed"][kind] = str(e)
+                else:
+                    if ok:
+                        result["refreshed"].append(kind)
+                    else:
+                        result["failed"][kind] = f"HTTP {self.failures.get((kind, workspace_id))}"
+                result["seconds"] = round(max(result["seconds"], finished), 3)
+        failed = [workspace_id for workspace_id, result in report.items() if result["failed"]]
+        if failed:
+            logging.warning(f"Metadata refresh failed for workspaces {failed}")
+        return {"workspaces": report, "seconds": round(time.perf_counter() - started, 3)}
+
+    def close(self):
+        # Lets background refreshes finish first, so none writes to a closed database
+        with self.lock:
+            threads = list(self.refreshing.values())
+        deadline = time.monotonic() + CLOSE_TIMEOUT
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        with self.lock:
+            self.closed = True
+            self.db.close()
@@ -0,0 +1,234 @@
+import codecs
+import csv
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+
+from toggl_client import parse_time
+from toggl_import import MalformedRow, read_rows
+
+CHUNK_SIZE = 64 * 1024  # bytes read (or downloaded) at a time
+WINDOW_DAYS = 30  # one API request per window of start dates
+DIMENSIONS = ("project", "description", "day", "week")
+DELIMITERS = frozenset(",] \t\r\n")  # what may follow an element of an array
+NUMBER_CHARS = frozenset("0123456789.eE+-")  # what may continue a number cut off at a chunk boundary
+HEX_CHARS = frozenset("0123456789abcdefABCDEF")
+LITERALS = ("true", "false", "null", "NaN", "Infinity", "-Infinity")  # what json accepts besides numbers
+
+
+def _incomplete(buffer, error):
+    # Whether more input could still complete the value raw_decode failed
+    # on: the error has to sit in a token that runs to the end of the buffer
+    rest = buffer[error.pos:]
+    if not rest or error.msg.startswith("Unterminated string"):
+        return True
+    if error.msg.startswith("Invalid \\uXXXX escape"):
+        return len(rest) < 5 and all(char in HEX_CHARS for char in rest[1:])
+    if error.msg == "Expecting value":
+        return any(literal.startswith(rest) for literal in LITERALS)
+    # A number cut off in the middle of an object or array
+    return error.msg == "Expecting ',' delimiter" and all(char in NUMBER_CHARS for char in rest)
+
+
+def iter_json_array(chunks):
+    # Yields the elements of one top-level JSON array, reading text or
+    # bytes chunks as needed: only the element being decoded is ever held,
+    # however large the array is. Malformed input raises as soon as it's
+    # seen rather than once the rest of the stream has been read.
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    position = 0
+    started = False
+    after_value = False  # An element was just read, so "," or "]" comes next
+    after_comma = False  # A "," was just read, so an element comes next
+    chunks = iter(chunks)
+    exhausted = False
+    while True:
+        while position < len(buffer) and buffer[position].isspace():
+            position += 1
+        if position < len(buffer):
+            char = buffer[position]
+            if not started:
+                if char != "[":
+                    raise ValueError(f"Expected a JSON array, found {char!r}")
+                started = True
+                position += 1
+                continue
+            if char == "]" and not after_comma:
+                return
+            if after_value:
+                if char != ",":
+                    raise ValueError(f"Expected ',' or ']' after a JSON value, found {char!r}")
+                after_value = False
+                after_comma = True
+                position += 1
+                continue
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                if not _incomplete(buffer, e):
+                    raise ValueError(f"Malformed JSON array element: {e.msg}") from e
+                end = None
+            # A value is only complete once what follows it is seen: "1" out
+            # of "1.5" or "12e3" split across chunks is just a prefix
+            if end is not None and (exhausted or end < len(buffer) and buffer[end] in DELIMITERS):
+                yield item
+                position = end
+                after_value = True
+                after_comma = False
+                continue
+            if end is not None and end < len(buffer) and \
+                    (buffer[end] not in NUMBER_CHARS or buffer[position] not in NUMBER_CHARS):
+                raise ValueError(f"Unexpected {buffer[end]!r} after a JSON value")
+        if exhausted:
+            raise ValueError("Truncated JSON array")
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            chunk = utf8.decode(b"", final=True)
+        elif isinstance(chunk, bytes):
+            chunk = utf8.decode(chunk)
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def read_chunks(f, size=CHUNK_SIZE):
+    while True:
+        chunk = f.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def read_entries(path):
+    # Streams raw entries from a JSON array export (.json), JSONL or CSV
+    if path.endswith(".json"):
+        with open(path, "rb") as f:
+            yield from iter_json_array(read_chunks(f))
+        return
+    for row in read_rows(path):
+        if isinstance(row, MalformedRow):
+            logging.warning(f"Skipping line {row.line_number} of {path}: {row.error}")
+        elif row is not None:
+            yield row
+
+
+def api_entries(client, start, end, window_days=WINDOW_DAYS):
+    # Streams every entry started in [start, end) from Toggl, one window
+    # at a time, decoding each response body as it downloads
+    window_start = start
+    while window_start < end:
+        window_end = min(end, window_start + timedelta(days=window_days))
+        response = client.open_time_entries(window_start.isoformat(), window_end.isoformat())
+        if response is None:
+            raise IOError(f"Fetching entries from {window_start.date()} failed")
+        with response:
+            for entry in iter_json_array(response.iter_content(CHUNK_SIZE)):
+                # The end date is inclusive; the next window will have it
+                if parse_time(entry["start"]) < window_end or window_end == end:
+                    yield entry
+        window_start = window_end
+
+
+def parse_duration(value):
+    # Seconds from a number or Toggl's "HH:MM:SS"
+    if isinstance(value, str) and ":" in value:
+        hours, minutes, seconds = value.split(":")
+        return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+    return int(float(value))
+
+
+def normalize(entries, now=None):
+    # (project, description, local start, seconds) per entry. Understands
+    # API and JSONL entries and Toggl's detailed CSV export ("Project",
+    # "Start date", "Start time", "Duration"); running entries count up to now.
+    now = now or datetime.now(timezone.utc)
+    for entry in entries:
+        if "start" in entry:
+            start = parse_time(entry["start"])
+            duration = entry.get("duration")
+            if duration in (None, ""):
+                seconds = int((parse_time(entry["stop"]) - start).total_seconds())
+            else:
+                seconds = parse_duration(duration)
+            if seconds < 0:
+                seconds = int((now - start).total_seconds())
+            project = entry.get("project_id") or entry.get("project")
+        else:
+            start = datetime.fromisoformat(f"{entry['Start date']}T{entry['Start time']}")
+            seconds = parse_duration(entry["Duration"])
+            project = entry.get("Project")
+        if start.tzinfo is not None:
+            start = start.astimezone()
+        description = entry.get("description", entry.get("Description")) or ""
+        yield project or None, description, start, seconds
+
+
+class ReportTotals:
+    # Seconds and entry counts per project, description, day and week.
+    # Memory grows with the number of distinct keys, never with entries.
+    def __init__(self, dimensions=DIMENSIONS):
+        self.dimensions = dimensions
+        self.totals = {dimension: {} for dimension in dimensions}
+        # (position in the key tuple built by add, table) for each dimension asked for
+        self.tables = [(DIMENSIONS.index(dimension), self.totals[dimension]) for dimension in dimensions]
+        self.labels = {}  # date -> (day, ISO week) labels, worked out once per day
+        self.entries = 0
+        self.seconds = 0
+
+    def add(self, project, description, start, seconds):
+        self.entries += 1
+        self.seconds += seconds
+        day = start.date()
+        labels = self.labels.get(day)
+        if labels is None:
+            year, week, _ = day.isocalendar()
+            labels = self.labels[day] = (day.isoformat(), f"{year}-W{week:02d}")
+        keys = (project, description) + labels
+        for position, table in self.tables:
+            totals = table.get(keys[position])
+            if totals is None:
+                table[keys[position]] = [seconds, 1]
+            else:
+                totals[0] += seconds
+                totals[1] += 1
+
+    def consume(self, normalized):
+        for project, description, start, seconds in normalized:
+            self.add(project, description, start, seconds)
+        return self
+
+    def rows(self, names=None):
+        # (dimension, key, seconds, entries); days and weeks in order, the rest biggest first
+        for dimension in self.dimensions:
+            items = self.totals[dimension].items()
+            if dimension in ("day", "week"):
+                items = sorted(items)
+            else:
+                items = sorted(items, key=lambda item: item[1][0], reverse=True)
+            for key, (seconds, count) in items:
+                if dimension == "project" and names is not None:
+                    key = names.get(key, key)
+                yield dimension, key, seconds, count
+
+    def write_csv(self, f, names=None):
+        writer = csv.writer(f)
+        writer.writerow(["dimension", "key", "hours", "seconds", "entries"])
+        for dimension, key, seconds, count in self.rows(names):
+            writer.writerow([dimension, "" if key is None else key, f"{seconds / 3600:.2f}", seconds, count])
+
+    def write_json(self, f, names=None):
+        report = {"entries": self.entries, "seconds": self.seconds}
+        for dimension in self.dimensions:
+            report[dimension] = []
+        for dimension, key, seconds, count in self.rows(names):
+            report[dimension].append({"key": key, "seconds": seconds, "entries": count})
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+
+def build_report(entries, dimensions=DIMENSIONS):
+    totals = ReportTotals(dimensions).consume(normalize(entries))
+    logging.info(f"Aggregated {totals.entries} entries, {totals.seconds / 3600:.1f} h")
+    return totals
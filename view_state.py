@@ -0,0 +1,108 @@
+import logging
+import time
+
+import metrics
+
+WORK_BG = "light green"
+BREAK_BG = "light sky blue"
+
+# Inputs that are locked for the whole session
+SESSION_INPUTS = ("go_button", "description_entry", "project_entry", "work_time_entry", "break_time_entry",
+                  "break_button")
+
+_UNSET = object()
+
+
+def desired_view(timer, default_bg):
+    # Maps the timer's state to what every control should look like. Keys
+    # name targets registered with ViewRenderer; "value" sets a Tk variable,
+    # "visible" grids/ungrids a widget, anything else is a config option.
+    view = {}
+    if timer.is_running:
+        for key in SESSION_INPUTS:
+            view[key] = {"state": "disabled"}
+        view["description_var"] = {"value": timer.description}
+        view["work_time_var"] = {"value": timer.work_time}
+        view["break_time_var"] = {"value": timer.break_time}
+        work_controls = "disabled" if timer.in_break else "normal"
+        break_controls = "normal" if timer.in_break else "disabled"
+        if timer.in_break:
+            view["mode_var"] = {"value": "Currently on Break 🏖️"}
+            view["root"] = {"bg": BREAK_BG}
+        else:
+            view["mode_var"] = {"value": "Currently Working 💸"}
+            view["root"] = {"bg": WORK_BG}
+    else:
+        for key in SESSION_INPUTS:
+            view[key] = {"state": "normal"}
+        view["timer_var"] = {"value": ""}
+        work_controls = break_controls = "normal"
+        if timer.in_break:
+            view["mode_var"] = {"value": "Break Time!"}
+            view["root"] = {"bg": BREAK_BG}
+        else:
+            view["mode_var"] = {"value": "Work Time!"}
+            view["root"] = {"bg": default_bg}
+        view["prompt_label"] = {"visible": False}
+        view["prompt_var"] = {"value": ""}
+    view["extend_work_entry"] = {"state": work_controls}
+    view["update_extend_work_button"] = {"state": work_controls}
+    view["extend_break_entry"] = {"state": break_controls}
+    view["update_extend_break_button"] = {"state": break_controls}
+    return view
+
+
+class ViewRenderer:
+    # Applies a desired view to Tk, touching only properties that differ
+    # from what was last applied. Tk variables are compared against their
+    # live value because the user can edit them through the entries.
+    def __init__(self):
+        self.targets = {}
+        self.applied = {}  # (key, prop) -> last value we set
+        self.changes = 0
+        self.renders = 0
+        self.render_seconds = 0.0
+
+    def register(self, key, target):
+        self.targets[key] = target
+
+    def render(self, view):
+        started = time.perf_counter()
+        changed = 0
+        for key, props in view.items():
+            target = self.targets[key]
+            options = {}
+            for prop, value in props.items():
+                if prop == "value":
+                    if self._variable_value(target) != value:
+                        target.set(value)
+                        changed += 1
+                    continue
+                if self.applied.get((key, prop), _UNSET) == value:
+                    continue
+                self.applied[(key, prop)] = value
+                changed += 1
+                if prop == "visible":
+                    if value:
+                        target.grid()
+                    else:
+                        target.grid_remove()
+                else:
+                    options[prop] = value
+            if options:
+                target.configure(**options)
+        elapsed = time.perf_counter() - started
+        self.renders += 1
+        self.changes += changed
+        self.render_seconds += elapsed
+        metrics.observe("pomodoro_ui_render_seconds", elapsed)
+        if changed:
+            logging.debug(f"Applied {changed} UI changes in {elapsed * 1000:.2f} ms")
+        return changed
+
+    def _variable_value(self, variable):
+        try:
+            return variable.get()
+        except Exception:
+            # e.g. an IntVar holding text the user typed
+            return None